@@ -0,0 +1,133 @@
+"""
+Submission throughput of test attempts: one commit per answer row, as the
+attempt used to be persisted, versus the single-transaction bulk insert of
+StudentTestRepository.create_attempt.
+
+Submits the full question bank of an existing test lesson for a student from
+several threads and prints submissions per second. Attempts created by the run
+are deleted at the end.
+
+    python -m benchmarks.attempt_submission --lesson-id 12 --student-id 3 \
+        --submissions 500 --concurrency 8
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.crud.question_bank import TEST_BANK, QuestionBankRepository
+from src.crud.student_test import StudentTestRepository
+from src.enums import QuestionTypeOption
+from src.models import StudentTestAnswerOrm, StudentTestAttemptsOrm, StudentTestMatchingOrm
+from src.schemas.student_practical import (
+    StudentAnswerDetail,
+    StudentAnswersDetail,
+    StudentMatchingDetail,
+    TestNewAttempt,
+)
+from src.session import engine
+
+BenchmarkSession = sessionmaker(bind=engine, class_=Session, autocommit=False, autoflush=False)
+NO_ATTEMPT_LIMIT = 2 ** 31 - 1
+
+
+def build_submission(lesson_id: int) -> tuple[int, list, list]:
+    with BenchmarkSession() as db:
+        bank = QuestionBankRepository(db=db, source=TEST_BANK).select_bank(lesson_id=lesson_id)
+
+    answers, matching = [], []
+    for question in bank.questions:
+        if question.type == QuestionTypeOption.matching.value:
+            matching.extend(
+                StudentMatchingDetail(score=question.score / 4, question_id=question.id, question_type=question.type,
+                                      left_id=option.id, right_id=option.right_id)
+                for option in question.left
+            )
+        elif question.type == QuestionTypeOption.multiple_choice.value:
+            answers.append(StudentAnswersDetail(score=question.score, question_id=question.id,
+                                                question_type=question.type,
+                                                answer_ids=[answer.id for answer in question.answers]))
+        elif question.answers:
+            answers.append(StudentAnswerDetail(score=question.score, question_id=question.id,
+                                               question_type=question.type, answer_id=question.answers[0].id))
+    return bank.id, answers, matching
+
+
+def submit_per_row(test_id: int, student_id: int, number: int, answers: list, matching: list) -> int:
+    with BenchmarkSession() as db:
+        attempt = StudentTestAttemptsOrm(attempt_number=number, test_id=test_id, student_id=student_id)
+        db.add(attempt)
+        db.commit()
+        db.refresh(attempt)
+
+        for answer in answers:
+            db.add(StudentTestAnswerOrm(**answer.model_copy(update={"student_attempt_id": attempt.id}).dict()))
+            db.commit()
+
+        for match in matching:
+            db.add(StudentTestMatchingOrm(**match.model_copy(update={"student_attempt_id": attempt.id}).dict()))
+            db.commit()
+
+        attempt.attempt_score = 0
+        db.commit()
+        db.refresh(attempt)
+        return attempt.id
+
+
+def submit_bulk(test_id: int, student_id: int, number: int, answers: list, matching: list) -> int:
+    with BenchmarkSession() as db:
+        attempt = StudentTestRepository(db=db).create_attempt(
+            attempt_data=TestNewAttempt(attempt_score=0, test_id=test_id, student_id=student_id),
+            answers=answers,
+            matching=matching,
+            max_attempts=NO_ATTEMPT_LIMIT
+        )
+        return attempt.id
+
+
+def last_attempt_number(test_id: int, student_id: int) -> int:
+    with BenchmarkSession() as db:
+        return (db.query(func.coalesce(func.max(StudentTestAttemptsOrm.attempt_number), 0))
+                .filter(StudentTestAttemptsOrm.test_id == test_id, StudentTestAttemptsOrm.student_id == student_id)
+                .scalar())
+
+
+def run(submit, args, test_id: int, answers: list, matching: list) -> tuple[float, list[int]]:
+    # attempt numbers are unique per student and test, so continue after the student's own attempts
+    first = last_attempt_number(test_id, args.student_id) + 1
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        attempt_ids = list(pool.map(
+            lambda number: submit(test_id, args.student_id, number, answers, matching),
+            range(first, first + args.submissions)
+        ))
+    return args.submissions / (time.perf_counter() - started), attempt_ids
+
+
+def cleanup(attempt_ids: list[int]):
+    with BenchmarkSession() as db:
+        for model in (StudentTestAnswerOrm, StudentTestMatchingOrm):
+            db.execute(delete(model).where(model.student_attempt_id.in_(attempt_ids)))
+        db.execute(delete(StudentTestAttemptsOrm).where(StudentTestAttemptsOrm.id.in_(attempt_ids)))
+        db.commit()
+
+
+def main(args):
+    test_id, answers, matching = build_submission(args.lesson_id)
+    print(f"test {test_id}: {len(answers)} answer rows and {len(matching)} matching rows per submission")
+
+    for name, submit in (("per-row commits", submit_per_row), ("single transaction", submit_bulk)):
+        rate, attempt_ids = run(submit, args, test_id, answers, matching)
+        cleanup(attempt_ids)
+        print(f"{name:<20} {rate:8.1f} submissions/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lesson-id", type=int, required=True)
+    parser.add_argument("--student-id", type=int, required=True)
+    parser.add_argument("--submissions", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    main(parser.parse_args())
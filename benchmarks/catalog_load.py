@@ -0,0 +1,90 @@
+"""
+Load test for the catalog read endpoints.
+
+Fires a fixed number of requests at the running API with a bounded number of
+in-flight requests and prints latency percentiles per endpoint.
+
+    python -m benchmarks.catalog_load --base-url http://localhost:8000/api/v1 \
+        --concurrency 200 --requests 5000 --token <access token>
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+ENDPOINTS = [
+    "/course/all",
+    "/course/most_popular",
+    "/course/get/{course_id}",
+    "/category/all",
+    "/user/search?query={query}",
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_endpoint(
+        client: httpx.AsyncClient,
+        url: str,
+        concurrency: int,
+        total: int,
+        headers: dict
+):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url, headers=headers)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        for endpoint in ENDPOINTS:
+            url = endpoint.format(course_id=args.course_id, query=args.query)
+            stats = await run_endpoint(client, url, args.concurrency, args.requests, headers)
+            print(
+                f"{url:<32} rps={stats['rps']:8.1f} p50={stats['p50']:8.1f}ms "
+                f"p95={stats['p95']:8.1f}ms p99={stats['p99']:8.1f}ms errors={stats['errors']}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--course-id", type=int, default=1)
+    parser.add_argument("--query", default="python")
+    parser.add_argument("--token", default=None)
+    asyncio.run(main(parser.parse_args()))
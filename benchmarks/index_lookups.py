@@ -0,0 +1,179 @@
+"""
+Seeds a throwaway schema with production-like volumes and compares the hot
+lookup queries with and without the composite indexes from migration
+a2a091fa02c2.
+
+Everything runs inside one transaction that is rolled back at the end, so the
+target database is left untouched.
+
+    python -m benchmarks.index_lookups --repeat 50
+"""
+import argparse
+import json
+import random
+import statistics
+
+from sqlalchemy import Boolean, Date, DateTime, Enum, Float, Integer, String, create_engine, text
+
+from src.config import DATABASE_URL
+from src.models import Base
+
+SCHEMA = "index_benchmark"
+
+STUDENTS = 10_000
+CATEGORIES = 10
+COURSES = 200
+LESSONS_PER_COURSE = 20
+QUESTIONS_PER_TEST = 10
+ANSWERS_PER_QUESTION = 4
+COURSES_PER_STUDENT = 2
+ATTEMPTS_PER_STUDENT = 20
+MESSAGES_PER_CHAT = 50
+
+LESSONS = COURSES * LESSONS_PER_COURSE
+LESSONS_PER_STUDENT = COURSES_PER_STUDENT * LESSONS_PER_COURSE
+
+SEED_PLAN = [
+    ("users", STUDENTS, {}),
+    ("students", STUDENTS, {"user_id": "g"}),
+    ("categories", CATEGORIES, {}),
+    ("courses", COURSES, {"category_id": f"(g - 1) % {CATEGORIES} + 1"}),
+    ("lessons", LESSONS, {
+        "course_id": f"(g - 1) / {LESSONS_PER_COURSE} + 1",
+        "number": f"(g - 1) % {LESSONS_PER_COURSE} + 1",
+    }),
+    ("tests", LESSONS, {"lesson_id": "g"}),
+    ("test_questions", LESSONS * QUESTIONS_PER_TEST, {
+        "test_id": f"(g - 1) / {QUESTIONS_PER_TEST} + 1",
+        "q_number": f"(g - 1) % {QUESTIONS_PER_TEST} + 1",
+    }),
+    ("test_answers", LESSONS * QUESTIONS_PER_TEST * ANSWERS_PER_QUESTION, {
+        "question_id": f"(g - 1) / {ANSWERS_PER_QUESTION} + 1",
+        "is_correct": f"g % {ANSWERS_PER_QUESTION} = 0",
+    }),
+    ("student_lessons", STUDENTS * LESSONS_PER_STUDENT, {
+        "student_id": f"(g - 1) / {LESSONS_PER_STUDENT} + 1",
+        "lesson_id": (
+            f"(((g - 1) / {LESSONS_PER_STUDENT}) % {COURSES // COURSES_PER_STUDENT} * {LESSONS_PER_STUDENT}"
+            f" + (g - 1) % {LESSONS_PER_STUDENT}) + 1"
+        ),
+    }),
+    ("student_test_attempts", STUDENTS * ATTEMPTS_PER_STUDENT, {
+        "student_id": f"(g - 1) / {ATTEMPTS_PER_STUDENT} + 1",
+        "test_id": f"((g - 1) / {ATTEMPTS_PER_STUDENT}) % {LESSONS // 4} * 4 + (g - 1) % 4 + 1",
+        "attempt_number": f"(g - 1) % {ATTEMPTS_PER_STUDENT} / 4 + 1",
+    }),
+    ("chat", STUDENTS, {"initiator_id": "g"}),
+    ("chat_messages", STUDENTS * MESSAGES_PER_CHAT, {
+        "chat_id": f"(g - 1) / {MESSAGES_PER_CHAT} + 1",
+        "sender_id": f"(g - 1) / {MESSAGES_PER_CHAT} + 1",
+        "timestamp": "now() - g * interval '1 second'",
+    }),
+    ("stripe_courses", COURSES, {"course_id": "g"}),
+]
+
+QUERIES = {
+    "uq_student_lessons_student_id_lesson_id": (
+        "SELECT * FROM student_lessons WHERE lesson_id = :lesson_id AND student_id = :student_id",
+        lambda: {"student_id": random.randint(1, STUDENTS), "lesson_id": random.randint(1, LESSONS)},
+    ),
+    "ix_lessons_course_id_number": (
+        "SELECT * FROM lessons WHERE course_id = :course_id AND number = :number",
+        lambda: {"course_id": random.randint(1, COURSES), "number": random.randint(1, LESSONS_PER_COURSE)},
+    ),
+    "ix_chat_messages_chat_id_timestamp": (
+        "SELECT * FROM chat_messages WHERE chat_id = :chat_id ORDER BY timestamp DESC",
+        lambda: {"chat_id": random.randint(1, STUDENTS)},
+    ),
+    "ix_test_answers_question_id_is_correct": (
+        "SELECT id FROM test_answers WHERE question_id = :question_id AND is_correct",
+        lambda: {"question_id": random.randint(1, LESSONS * QUESTIONS_PER_TEST)},
+    ),
+    "ix_student_test_attempts_student_id_test_id_attempt": (
+        "SELECT * FROM student_test_attempts WHERE student_id = :student_id AND test_id = :test_id "
+        "ORDER BY attempt_number DESC LIMIT 1",
+        lambda: {"student_id": random.randint(1, STUDENTS), "test_id": random.randint(1, LESSONS)},
+    ),
+    "ix_stripe_courses_course_id": (
+        "SELECT stripe_price_id FROM stripe_courses WHERE course_id = :course_id",
+        lambda: {"course_id": random.randint(1, COURSES)},
+    ),
+}
+
+
+def filler(column) -> str:
+    if isinstance(column.type, Enum):
+        return f"'{column.type.enums[0]}'"
+    if isinstance(column.type, Boolean):
+        return "false"
+    if isinstance(column.type, DateTime):
+        return "now()"
+    if isinstance(column.type, Date):
+        return "current_date"
+    if isinstance(column.type, (Integer, Float)):
+        return "1"
+    if isinstance(column.type, String):
+        return f"'{column.name}_' || g"
+    raise ValueError(f"No filler for {column.table.name}.{column.name}")
+
+
+def seed(conn, table_name: str, rows: int, overrides: dict[str, str]):
+    table = Base.metadata.tables[table_name]
+    columns = {}
+    for column in table.columns:
+        if column.primary_key:
+            continue
+        if column.name in overrides:
+            columns[column.name] = overrides[column.name]
+        elif not column.nullable:
+            columns[column.name] = filler(column)
+
+    names = ", ".join(f'"{name}"' for name in columns)
+    values = ", ".join(columns.values())
+    conn.execute(text(f"INSERT INTO {table_name} ({names}) SELECT {values} FROM generate_series(1, {rows}) AS g"))
+
+
+def measure(conn, query: str, params, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}"), params()).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        timings.append(plan[0]["Execution Time"])
+    return statistics.median(timings)
+
+
+def main(args):
+    engine = create_engine(args.database_url)
+
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}"))
+            Base.metadata.create_all(conn, checkfirst=False)
+
+            for table_name, rows, overrides in SEED_PLAN:
+                seed(conn, table_name, rows, overrides)
+                conn.execute(text(f"ANALYZE {table_name}"))
+
+            with_index = {name: measure(conn, *QUERIES[name], args.repeat) for name in QUERIES}
+
+            for name in QUERIES:
+                conn.execute(text(f"DROP INDEX {name}"))
+
+            without_index = {name: measure(conn, *QUERIES[name], args.repeat) for name in QUERIES}
+        finally:
+            transaction.rollback()
+
+    print(f"{'index':<55} {'without, ms':>12} {'with, ms':>10} {'speedup':>9}")
+    for name in QUERIES:
+        before, after = without_index[name], with_index[name]
+        print(f"{name:<55} {before:>12.3f} {after:>10.3f} {before / max(after, 0.001):>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--repeat", type=int, default=30)
+    main(parser.parse_args())
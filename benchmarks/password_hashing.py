@@ -0,0 +1,66 @@
+"""
+Login throughput of bcrypt verification: inline on the event loop versus the
+bounded process pool used by the auth endpoints.
+
+    PASSWORD_POOL_SIZE=4 python -m benchmarks.password_hashing --logins 200
+"""
+import argparse
+import asyncio
+import time
+
+from src.config import PASSWORD_POOL_SIZE
+from src.utils.password import check_password, check_password_async, get_password_executor, hash_password
+
+
+async def inline(logins: int, hashed: str) -> float:
+    started = time.perf_counter()
+    for _ in range(logins):
+        check_password("secret-password", hashed)
+    return time.perf_counter() - started
+
+
+async def pooled(logins: int, hashed: str) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(check_password_async("secret-password", hashed) for _ in range(logins)))
+    return time.perf_counter() - started
+
+
+async def event_loop_lag(coroutine) -> tuple[float, float]:
+    """Runs the workload while measuring how late a 10ms ticker fires."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - expected)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    elapsed = await coroutine
+    done.set()
+    await ticker_task
+    return elapsed, max(lags, default=0) * 1000
+
+
+async def main(args):
+    hashed = hash_password("secret-password")
+    # start the workers outside of the measured window
+    await asyncio.gather(*(check_password_async("secret-password", hashed) for _ in range(PASSWORD_POOL_SIZE)))
+
+    for name, workload, cores in (("inline", inline, 1), ("process pool", pooled, PASSWORD_POOL_SIZE)):
+        elapsed, lag = await event_loop_lag(workload(args.logins, hashed))
+        rate = args.logins / elapsed
+        print(
+            f"{name:<13} {rate:8.1f} logins/s  {rate / cores:8.1f} logins/s/core  "
+            f"max event loop lag {lag:8.1f}ms"
+        )
+
+    get_password_executor().shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,64 @@
+"""
+Payload size and latency of the course endpoints per response shape.
+
+Requests every endpoint with the full payload and with each fields= projection
+and prints the body size and median latency. Server-side serialization time per
+endpoint and shape is exported as http_response_serialization_seconds on /metrics.
+
+    python -m benchmarks.payload_size --base-url http://localhost:8000/api/v1 \
+        --requests 50 --token <access token>
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+ENDPOINTS = [
+    "/course/all",
+    "/course/most_popular",
+    "/course/get/{course_id}",
+    "/course/get/category/{category_id}",
+]
+
+SHAPES = [None, "card", "card,lessons.title,lessons.type"]
+
+
+async def measure(client: httpx.AsyncClient, url: str, params: dict, total: int, headers: dict):
+    latencies = []
+    size = 0
+    for _ in range(total):
+        start = time.perf_counter()
+        # no If-None-Match: every request renders a full body
+        response = await client.get(url, params=params, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        size = len(response.content)
+    return size, statistics.median(latencies)
+
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        for endpoint in ENDPOINTS:
+            url = endpoint.format(course_id=args.course_id, category_id=args.category_id)
+            full_size = None
+            for shape in SHAPES:
+                params = {"fields": shape} if shape else {}
+                size, p50 = await measure(client, url, params, args.requests, headers)
+                full_size = full_size or size
+                print(
+                    f"{url:<28} {shape or 'full':<32} bytes={size:>9} "
+                    f"({size / full_size:6.1%}) p50={p50:8.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--course-id", type=int, default=1)
+    parser.add_argument("--category-id", type=int, default=1)
+    parser.add_argument("--token", default=None)
+    asyncio.run(main(parser.parse_args()))
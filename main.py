@@ -1,4 +1,6 @@
 import logging
+import time
+
 import uvicorn
 
 # from debug_toolbar.middleware import DebugToolbarMiddleware
@@ -16,6 +18,7 @@ from src.api_routers.instruction import router as instruction_router
 from src.api_routers.lecture import router as lecture_router
 from src.api_routers.lesson import router as lesson_router
 from src.api_routers.notifications import router as notification_router
+from src.api_routers.search import router as search_router
 from src.api_routers.student_exam import router as student_exam_router
 from src.api_routers.student_test import router as student_test_router
 from src.api_routers.test import router as test_router
@@ -24,7 +27,13 @@ from src.api_routers.template import router as template_router
 from src.api_routers.notes import router as note_router
 from src.api_routers.stripe import router as stripe_router
 from src.api_routers.certificates import router as certificates_router
-from src.config import API_PREFIX
+from src.config import API_PREFIX, DB_REPLICA_HOSTS, DEBUG, METRICS_TOKEN, REPLICA_STICKY_SECONDS
+from src.session import PRIMARY_STICKY_COOKIE, AsyncSessionLocal
+from src.utils.metrics import mark_worker_dead, metrics
+from src.utils.query_counter import count_queries, query_stats_headers, report_query_stats
+from src.utils.serialization import observe_payload
+from src.utils.slow_query import query_origin
+from src.utils.suggest_index import load_suggest_index
 
 http_bearer = HTTPBearer(auto_error=False)
 
@@ -39,8 +48,12 @@ formatter = logging.Formatter(
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
-app = FastAPI(debug=True, default_response_class=ORJSONResponse)
+app = FastAPI(debug=DEBUG, default_response_class=ORJSONResponse)
 app.mount("/static", StaticFiles(directory="static"), name="static")
+if METRICS_TOKEN:
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+else:
+    logger.warning("METRICS_TOKEN is not set, /metrics is not served")
 
 app.include_router(
     user_router, prefix=API_PREFIX, tags=["User"], dependencies=[Depends(http_bearer)]
@@ -51,6 +64,7 @@ app.include_router(
 app.include_router(
     category_router, prefix=API_PREFIX, tags=["Category"], dependencies=[Depends(http_bearer)]
 )
+app.include_router(search_router, prefix=API_PREFIX, tags=["Search"])
 app.include_router(
     course_router, prefix=API_PREFIX, tags=["Course"], dependencies=[Depends(http_bearer)]
 )
@@ -106,6 +120,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "HEAD", "CONNECT"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 @app.middleware("http")
@@ -118,12 +133,61 @@ async def log_request_origin(request: Request, call_next):
     response = await call_next(request)
     return response
 
+
+@app.middleware("http")
+async def measure_payload(request: Request, call_next):
+    response = await call_next(request)
+    observe_payload(request, response)
+    return response
+
+
+@app.middleware("http")
+async def count_request_queries(request: Request, call_next):
+    endpoint = f"{request.method} {request.url.path}"
+    with count_queries() as stats, query_origin(endpoint):
+        response = await call_next(request)
+
+    report_query_stats(stats, endpoint=endpoint)
+    if DEBUG:
+        response.headers.update(query_stats_headers(stats))
+    return response
+
+
+@app.middleware("http")
+async def pin_primary_after_write(request: Request, call_next):
+    response = await call_next(request)
+
+    # reads right after a write must not hit a lagging replica
+    if DB_REPLICA_HOSTS and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            str(int(time.time()) + REPLICA_STICKY_SECONDS),
+            max_age=REPLICA_STICKY_SECONDS,
+            httponly=True
+        )
+    return response
+
 # app.add_middleware(
 #     DebugToolbarMiddleware,
 #     panels=["debug_toolbar.panels.sqlalchemy.SQLAlchemyPanel"],
 # )
 
 
+@app.on_event("startup")
+async def build_suggest_index():
+    try:
+        async with AsyncSessionLocal() as db:
+            await load_suggest_index(db=db)
+    except Exception as e:
+        # served empty until the next freshness check rebuilds it
+        logger.warning(f"Suggest index was not built at startup: {e}")
+
+
+@app.on_event("shutdown")
+async def remove_worker_metrics():
+    mark_worker_dead()
+
+
 @app.get("/")
 async def ping():
     return {"message": "I'm working right now"}
@@ -0,0 +1,112 @@
+"""Add content version columns
+
+Revision ID: 7c3e91b5d2a4
+Revises: a2a091fa02c2
+Create Date: 2026-10-18 11:40:02.518317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e91b5d2a4'
+down_revision: Union[str, None] = 'a2a091fa02c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VERSIONED_TABLES = ['categories', 'courses', 'lessons', 'lectures', 'lecture_attributes', 'tests', 'exams']
+
+# (child table, parent table, foreign key column): any change of a child row bumps the parent version,
+# which in turn bumps its own parent up to the course
+PARENT_LINKS = [
+    ('course_icons', 'courses', 'course_id'),
+    ('lessons', 'courses', 'course_id'),
+    ('lectures', 'lessons', 'lesson_id'),
+    ('tests', 'lessons', 'lesson_id'),
+    ('exams', 'lessons', 'lesson_id'),
+    ('lecture_attributes', 'lectures', 'lecture_id'),
+    ('lecture_files', 'lecture_attributes', 'attribute_id'),
+    ('lecture_links', 'lecture_attributes', 'attribute_id'),
+    ('test_questions', 'tests', 'test_id'),
+    ('test_answers', 'test_questions', 'question_id'),
+    ('test_matching_right', 'test_questions', 'question_id'),
+    ('test_matching_left', 'test_questions', 'question_id'),
+    ('exam_questions', 'exams', 'exam_id'),
+    ('exam_answers', 'exam_questions', 'question_id'),
+    ('exam_matching_right', 'exam_questions', 'question_id'),
+    ('exam_matching_left', 'exam_questions', 'question_id'),
+]
+
+
+def upgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+        op.add_column(
+            table, sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False)
+        )
+
+    op.execute(sa.text(
+        """
+        CREATE OR REPLACE FUNCTION bump_content_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.version := OLD.version + 1;
+            NEW.updated_at := now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    ))
+
+    # a no-op UPDATE of the parent row fires its own triggers, so the bump travels up the tree
+    op.execute(sa.text(
+        """
+        CREATE OR REPLACE FUNCTION touch_content_parent() RETURNS trigger AS $$
+        DECLARE
+            old_parent integer;
+            new_parent integer;
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                old_parent := (to_jsonb(OLD) ->> TG_ARGV[1])::integer;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                new_parent := (to_jsonb(NEW) ->> TG_ARGV[1])::integer;
+            END IF;
+
+            EXECUTE format('UPDATE %I SET id = id WHERE id = $1 OR id = $2', TG_ARGV[0])
+                USING old_parent, new_parent;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    ))
+
+    for table in VERSIONED_TABLES:
+        op.execute(sa.text(
+            f"CREATE TRIGGER {table}_bump_version BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION bump_content_version()"
+        ))
+
+    for table, parent, column in PARENT_LINKS:
+        op.execute(sa.text(
+            f"CREATE TRIGGER {table}_touch_parent AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION touch_content_parent('{parent}', '{column}')"
+        ))
+
+
+def downgrade() -> None:
+    for table, _, _ in reversed(PARENT_LINKS):
+        op.execute(sa.text(f"DROP TRIGGER IF EXISTS {table}_touch_parent ON {table}"))
+
+    for table in reversed(VERSIONED_TABLES):
+        op.execute(sa.text(f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}"))
+
+    op.execute(sa.text("DROP FUNCTION IF EXISTS touch_content_parent()"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS bump_content_version()"))
+
+    for table in reversed(VERSIONED_TABLES):
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
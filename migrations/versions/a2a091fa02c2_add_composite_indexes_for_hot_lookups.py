@@ -0,0 +1,91 @@
+"""Add composite indexes for hot lookups
+
+Revision ID: a2a091fa02c2
+Revises: 3df8411775e1
+Create Date: 2026-10-18 09:12:40.214512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2a091fa02c2'
+down_revision: Union[str, None] = '3df8411775e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('uq_student_lessons_student_id_lesson_id', 'student_lessons', ['student_id', 'lesson_id'], True),
+    ('ix_lessons_course_id_number', 'lessons', ['course_id', 'number'], False),
+    ('ix_chat_messages_chat_id_timestamp', 'chat_messages', ['chat_id', 'timestamp'], False),
+    ('ix_test_answers_question_id_is_correct', 'test_answers', ['question_id', 'is_correct'], False),
+    ('ix_exam_answers_question_id_is_correct', 'exam_answers', ['question_id', 'is_correct'], False),
+    (
+        'ix_student_test_attempts_student_id_test_id_attempt',
+        'student_test_attempts',
+        ['student_id', 'test_id', 'attempt_number'],
+        False
+    ),
+    (
+        'ix_student_exam_attempts_student_id_exam_id_attempt',
+        'student_exam_attempts',
+        ['student_id', 'exam_id', 'attempt_number'],
+        False
+    ),
+    ('ix_stripe_courses_course_id', 'stripe_courses', ['course_id'], False),
+]
+
+
+def drop_invalid_index(name: str, table: str) -> None:
+    # a failed CREATE INDEX CONCURRENTLY leaves an INVALID index that if_not_exists would skip
+    invalid = op.get_bind().execute(sa.text(
+        """
+        SELECT NOT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name
+        """
+    ), {"name": name}).scalar()
+    if invalid:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade() -> None:
+    # one student_lessons row per student and lesson: keep the row with the most progress
+    op.execute(sa.text(
+        """
+        DELETE FROM student_lessons sl
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY student_id, lesson_id
+                ORDER BY status = 'completed' DESC, score DESC NULLS LAST, attempt DESC NULLS LAST, id
+            ) AS rank
+            FROM student_lessons
+        ) ranked
+        WHERE sl.id = ranked.id
+          AND ranked.rank > 1
+        """
+    ))
+
+    # CREATE INDEX CONCURRENTLY can't run inside the migration transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            drop_invalid_index(name, table)
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
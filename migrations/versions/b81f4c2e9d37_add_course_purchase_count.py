@@ -0,0 +1,101 @@
+"""Add course purchase count
+
+Revision ID: b81f4c2e9d37
+Revises: 7c3e91b5d2a4
+Create Date: 2026-10-18 13:05:47.902164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4c2e9d37'
+down_revision: Union[str, None] = '7c3e91b5d2a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('courses', sa.Column('purchase_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    # existing enrollments have no known date and stay out of the time windows
+    op.add_column('student_course_association', sa.Column('enrolled_at', sa.DateTime(), nullable=True))
+    op.alter_column('student_course_association', 'enrolled_at', server_default=sa.text('now()'))
+
+    # a purchase is not a content change: keep the course version (and its ETags) stable
+    op.execute(sa.text("DROP TRIGGER courses_bump_version ON courses"))
+    op.execute(sa.text(
+        "CREATE TRIGGER courses_bump_version BEFORE UPDATE ON courses "
+        "FOR EACH ROW WHEN (OLD.purchase_count = NEW.purchase_count) EXECUTE FUNCTION bump_content_version()"
+    ))
+
+    op.execute(sa.text(
+        """
+        CREATE OR REPLACE FUNCTION count_course_purchases() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE courses c SET purchase_count = c.purchase_count + p.purchases
+                FROM (SELECT course_id, count(*) AS purchases FROM new_rows GROUP BY course_id) p
+                WHERE c.id = p.course_id;
+            ELSE
+                UPDATE courses c SET purchase_count = c.purchase_count - p.purchases
+                FROM (SELECT course_id, count(*) AS purchases FROM old_rows GROUP BY course_id) p
+                WHERE c.id = p.course_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    ))
+    op.execute(sa.text(
+        "CREATE TRIGGER student_course_association_count_insert AFTER INSERT ON student_course_association "
+        "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_course_purchases()"
+    ))
+    op.execute(sa.text(
+        "CREATE TRIGGER student_course_association_count_delete AFTER DELETE ON student_course_association "
+        "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_course_purchases()"
+    ))
+
+    op.execute(sa.text(
+        """
+        UPDATE courses c SET purchase_count = p.purchases
+        FROM (SELECT course_id, count(*) AS purchases FROM student_course_association GROUP BY course_id) p
+        WHERE c.id = p.course_id
+        """
+    ))
+
+    op.create_index('ix_courses_purchase_count', 'courses', ['purchase_count'])
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_student_course_association_enrolled_at_course_id',
+            'student_course_association',
+            ['enrolled_at', 'course_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_student_course_association_enrolled_at_course_id',
+            table_name='student_course_association',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+    op.drop_index('ix_courses_purchase_count', table_name='courses')
+
+    op.execute(sa.text("DROP TRIGGER IF EXISTS student_course_association_count_delete ON student_course_association"))
+    op.execute(sa.text("DROP TRIGGER IF EXISTS student_course_association_count_insert ON student_course_association"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS count_course_purchases()"))
+
+    op.execute(sa.text("DROP TRIGGER courses_bump_version ON courses"))
+    op.execute(sa.text(
+        "CREATE TRIGGER courses_bump_version BEFORE UPDATE ON courses "
+        "FOR EACH ROW EXECUTE FUNCTION bump_content_version()"
+    ))
+
+    op.drop_column('student_course_association', 'enrolled_at')
+    op.drop_column('courses', 'purchase_count')
@@ -0,0 +1,51 @@
+"""Add keyset pagination indexes
+
+Revision ID: d5e2a7c1f904
+Revises: b81f4c2e9d37
+Create Date: 2026-10-18 14:21:09.531877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e2a7c1f904'
+down_revision: Union[str, None] = 'b81f4c2e9d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_chat_messages_chat_id_timestamp_id', 'chat_messages', ['chat_id', 'timestamp', 'id']),
+    ('ix_chat_messages_recipient_id_chat_id', 'chat_messages', ['recipient_id', 'chat_id']),
+    ('ix_student_notifications_student_id_id', 'student_notifications', ['student_id', 'id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+        # covered by the (chat_id, timestamp, id) index
+        op.drop_index(
+            'ix_chat_messages_chat_id_timestamp',
+            table_name='chat_messages',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_chat_messages_chat_id_timestamp',
+            'chat_messages',
+            ['chat_id', 'timestamp'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
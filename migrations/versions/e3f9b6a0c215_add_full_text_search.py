@@ -0,0 +1,89 @@
+"""Add full text search
+
+Revision ID: e3f9b6a0c215
+Revises: d5e2a7c1f904
+Create Date: 2026-10-18 15:02:33.718402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f9b6a0c215'
+down_revision: Union[str, None] = 'd5e2a7c1f904'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTORS = {
+    'categories': [('title', 'A'), ('description', 'B')],
+    'courses': [('title', 'A'), ('intro_text', 'B'), ('about_text', 'C'), ('about_main_text', 'C')],
+    'lessons': [('title', 'A'), ('description', 'B')],
+    'lecture_attributes': [('a_title', 'A'), ('a_text', 'B')],
+}
+
+TRIGRAM_INDEXES = [
+    ('ix_categories_title_trgm', 'categories', 'title'),
+    ('ix_courses_title_trgm', 'courses', 'title'),
+    ('ix_lessons_title_trgm', 'lessons', 'title'),
+    ('ix_lecture_attributes_a_title_trgm', 'lecture_attributes', 'a_title'),
+]
+
+
+def search_vector_expression(weighted_columns) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    )
+
+
+def upgrade() -> None:
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    for table, weighted_columns in SEARCH_VECTORS.items():
+        op.add_column(table, sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(search_vector_expression(weighted_columns), persisted=True),
+            nullable=True
+        ))
+
+    with op.get_context().autocommit_block():
+        for table in SEARCH_VECTORS:
+            op.create_index(
+                f'ix_{table}_search_vector',
+                table,
+                ['search_vector'],
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+        for name, table, column in TRIGRAM_INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(TRIGRAM_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+        for table in reversed(SEARCH_VECTORS):
+            op.drop_index(
+                f'ix_{table}_search_vector', table_name=table, postgresql_concurrently=True, if_exists=True
+            )
+
+    for table in SEARCH_VECTORS:
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,118 @@
+"""Add unique attempt numbers and idempotency keys
+
+Revision ID: f4a8c2d6b913
+Revises: e3f9b6a0c215
+Create Date: 2026-10-18 18:02:47.310254
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a8c2d6b913'
+down_revision: Union[str, None] = 'e3f9b6a0c215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = [
+    ('student_test_attempts', 'test'),
+    ('student_exam_attempts', 'exam'),
+]
+
+
+def drop_invalid_index(name: str, table: str) -> None:
+    # a build that failed on duplicates inserted meanwhile leaves an INVALID index that if_not_exists would skip;
+    # running the migration again renumbers those and rebuilds it
+    invalid = op.get_bind().execute(sa.text(
+        """
+        SELECT NOT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name
+        """
+    ), {"name": name}).scalar()
+    if invalid:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade() -> None:
+    for table, owner in TABLES:
+        # IF NOT EXISTS: a rerun after a failed index build finds the column already committed
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64)")
+
+        # concurrent submissions could have been given the same number; renumber those attempts in id order
+        op.execute(f"""
+            UPDATE {table} AS attempt
+            SET attempt_number = numbered.number
+            FROM (
+                SELECT id, row_number() OVER (PARTITION BY student_id, {owner}_id ORDER BY attempt_number, id) AS number
+                FROM {table}
+                WHERE (student_id, {owner}_id) IN (
+                    SELECT student_id, {owner}_id
+                    FROM {table}
+                    GROUP BY student_id, {owner}_id, attempt_number
+                    HAVING count(*) > 1
+                )
+            ) AS numbered
+            WHERE attempt.id = numbered.id AND attempt.attempt_number <> numbered.number
+        """)
+
+    with op.get_context().autocommit_block():
+        for table, owner in TABLES:
+            drop_invalid_index(f'uq_{table}_student_id_{owner}_id_attempt', table)
+            drop_invalid_index(f'uq_{table}_student_id_{owner}_id_idempotency_key', table)
+            op.create_index(
+                f'uq_{table}_student_id_{owner}_id_attempt',
+                table,
+                ['student_id', f'{owner}_id', 'attempt_number'],
+                unique=True,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+            op.create_index(
+                f'uq_{table}_student_id_{owner}_id_idempotency_key',
+                table,
+                ['student_id', f'{owner}_id', 'idempotency_key'],
+                unique=True,
+                postgresql_where=sa.text('idempotency_key IS NOT NULL'),
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+            # covered by the unique index
+            op.drop_index(
+                f'ix_{table}_student_id_{owner}_id_attempt',
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, owner in reversed(TABLES):
+            op.create_index(
+                f'ix_{table}_student_id_{owner}_id_attempt',
+                table,
+                ['student_id', f'{owner}_id', 'attempt_number'],
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+            op.drop_index(
+                f'uq_{table}_student_id_{owner}_id_idempotency_key',
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True
+            )
+            op.drop_index(
+                f'uq_{table}_student_id_{owner}_id_attempt',
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True
+            )
+
+    for table, _ in reversed(TABLES):
+        op.drop_column(table, 'idempotency_key')
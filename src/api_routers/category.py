@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, File, Request, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.crud.category import CategoryRepository
+from src.crud.category import AsyncCategoryRepository, CategoryRepository
 from src.enums import StaticFileType
-from src.models import UserOrm
 from src.schemas.category import (
     CategoryCreate,
     CategoryDeleteResponse,
@@ -11,13 +11,16 @@ from src.schemas.category import (
     CategoryResponse,
     CategoryUpdate,
 )
-from src.session import get_db
+from src.session import get_async_db, get_async_read_db, get_db
 from src.utils.decode_code import decode_access_token
+from src.utils.etag import versions_etag
 from src.utils.exceptions import (
     CategoryNotFoundException,
     PermissionDeniedException
 )
 from src.utils.get_user import get_current_user
+from src.utils.principal import UserPrincipal
+from src.utils.response_cache import cached_response
 from src.utils.save_files import save_file
 
 router = APIRouter(prefix="/category")
@@ -26,7 +29,7 @@ router = APIRouter(prefix="/category")
 @router.post("/create", response_model=CategoryResponse)
 async def create_category(
         data: CategoryCreate,
-        user: UserOrm = Depends(get_current_user),
+        user: UserPrincipal = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     if user.is_moder:
@@ -37,51 +40,60 @@ async def create_category(
 
 
 @router.get("/all", response_model=list[CategoryResponse])
-async def get_categories(request: Request, db: Session = Depends(get_db)):
-    repository = CategoryRepository(db=db)
+async def get_categories(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    repository = AsyncCategoryRepository(db=db)
     authorization = request.headers.get("authorization")
 
     if authorization and authorization.startswith("Bearer") and len(authorization) > 10:
-        user = decode_access_token(db=db, access_token=authorization[7:])
+        user = await decode_access_token(db=db, access_token=authorization[7:])
 
         if user.is_moder:
-            return repository.select_all_categories(mode="admin")
+            return await repository.select_all_categories(mode="admin")
 
         else:
-            result = repository.select_all_categories(mode="user")
+            result = await repository.select_all_categories(mode="user")
 
             if not result:
                 raise CategoryNotFoundException()
             return result
 
     else:
-        result = repository.select_all_categories(mode="user")
+        async def load_categories():
+            categories = await repository.select_all_categories(mode="user")
+            if not categories:
+                raise CategoryNotFoundException()
+            return categories
 
-        if not result:
-            raise CategoryNotFoundException()
-        return result
+        return await cached_response(
+            key="category:all",
+            tags=("categories",),
+            response_model=list[CategoryResponse],
+            build=load_categories,
+            request=request,
+            etag=lambda categories: versions_etag("categories", categories)
+        )
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: int, request: Request, db: Session = Depends(get_db)):
-    repository = CategoryRepository(db=db)
+async def get_category(category_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    repository = AsyncCategoryRepository(db=db)
     authorization = request.headers.get("authorization")
 
     if authorization and authorization.startswith("Bearer") and len(authorization) > 10:
-        user = decode_access_token(db=db, access_token=authorization[7:])
+        user = await decode_access_token(db=db, access_token=authorization[7:])
 
         if user.is_moder:
-            return repository.select_category_by_id(category_id=category_id, mode="admin")
+            return await repository.select_category_by_id(category_id=category_id, mode="admin")
 
         else:
-            result = repository.select_all_categories(mode="user")
+            result = await repository.select_all_categories(mode="user")
 
             if not result:
                 raise CategoryNotFoundException()
             return result
 
     else:
-        result = repository.select_category_by_id(category_id=category_id, mode="user")
+        result = await repository.select_category_by_id(category_id=category_id, mode="user")
         if not result:
             raise CategoryNotFoundException()
         return result
@@ -92,7 +104,7 @@ async def update_category(
         data: CategoryUpdate,
         category_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = CategoryRepository(db=db)
@@ -104,7 +116,7 @@ async def update_category(
 @router.post("/upload/image", response_model=CategoryImagePathResponse)
 async def upload_category_image(
         image: UploadFile = File(...),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         path = save_file(file=image, file_type=StaticFileType.category_avatar.value)
@@ -117,7 +129,7 @@ async def upload_category_image(
 async def delete_category(
         category_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = CategoryRepository(db=db)
@@ -131,7 +143,7 @@ async def delete_category(
 async def publish_category(
         category_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = CategoryRepository(db=db)
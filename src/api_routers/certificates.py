@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from src.crud.certificate import CertificateRepository
 from src.session import get_db
 from src.utils.get_user import get_current_user
-from src.models import UserOrm
+from src.utils.principal import UserPrincipal
 from src.utils.exceptions import PermissionDeniedException
 
 
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/certificates")
 async def get_my_certificates(
         student_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         repository = CertificateRepository(db=db)
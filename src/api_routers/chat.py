@@ -1,10 +1,11 @@
 import logging
 
-from fastapi import APIRouter, Depends, File, UploadFile, status
+from fastapi import APIRouter, Depends, File, Response, UploadFile, status
 from fastapi.exceptions import WebSocketException
 from fastapi.websockets import WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
 
+from src.config import PAGE_DEFAULT_LIMIT
 from src.crud.chat import (
     check_active_chat,
     initialization_chat_db,
@@ -15,8 +16,8 @@ from src.crud.chat import (
     update_chat_status_db,
     update_recipient_db
 )
+from src.crud.pagination import PageParams
 from src.enums import ChatStatusType, StaticFileType
-from src.models import UserOrm
 from src.schemas.chat import InitializationChat
 from src.session import get_db
 from src.utils.chat_manager import (
@@ -24,8 +25,10 @@ from src.utils.chat_manager import (
     serialize_messages,
 )
 
-from src.utils.exceptions import PermissionDeniedException
+from src.utils.exceptions import ChatNotFoundException, PermissionDeniedException
 from src.utils.get_user import get_current_user
+from src.utils.pagination import page_params, set_page_headers
+from src.utils.principal import UserPrincipal
 from src.utils.save_files import save_file
 from src.utils.chat_commands import (
     NewMessageHandler,
@@ -46,12 +49,12 @@ logging.getLogger("Websocket").setLevel(logging.INFO)
 async def initialization_chat(
         data: InitializationChat,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if not user.is_student:
         raise PermissionDeniedException()
 
-    student_id = user.student.id
+    student_id = user.student_id
 
     if data.chat_subject:
         chat = initialization_chat_db(
@@ -126,6 +129,26 @@ async def upload_chat_file(file: UploadFile = File(...)):
     }
 
 
+@router.get("/{chat_id}/history")
+async def get_chat_history(
+        chat_id: int,
+        response: Response,
+        page: PageParams = Depends(page_params),
+        db: Session = Depends(get_db),
+        user: UserPrincipal = Depends(get_current_user)
+):
+    chat = select_chat_db(db=db, chat_id=chat_id)
+    if chat is None:
+        raise ChatNotFoundException()
+
+    if user.is_moder or (user.is_student and chat.initiator_id == user.student_id):
+        messages = select_new_chat_messages_db(db=db, chat_id=chat_id, page=page)
+        set_page_headers(response, messages)
+        return serialize_messages(messages=messages, db=db)
+    else:
+        raise PermissionDeniedException()
+
+
 @router.websocket("/user/{chat_id}/{token}")
 async def user_chat(
         chat_id: int,
@@ -157,7 +180,8 @@ async def user_chat(
 
         messages = select_new_chat_messages_db(
             db=db,
-            chat_id=chat_id
+            chat_id=chat_id,
+            page=PageParams(limit=PAGE_DEFAULT_LIMIT)
         )
 
         json_messages = serialize_messages(
@@ -257,7 +281,7 @@ async def moder_chat(
                 reason="Other admin helping this student"
             )
 
-        messages = select_new_chat_messages_db(db=db, chat_id=chat_id)
+        messages = select_new_chat_messages_db(db=db, chat_id=chat_id, page=PageParams(limit=PAGE_DEFAULT_LIMIT))
         json_messages = serialize_messages(messages=messages, db=db)
         await websocket.send_json(json_messages)
 
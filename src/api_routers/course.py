@@ -1,17 +1,18 @@
-from fastapi import APIRouter, Depends, File, Request, UploadFile, status, Response
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Query, Request, UploadFile, status, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from src.celery_tasks import tasks
-from src.crud.course import CourseRepository
+from src.crud.course import AsyncCourseRepository, CourseRepository
 from src.crud.lesson import LessonRepository
-from src.crud.student_course import (
-    select_student_course_info,
-    select_student_lesson_info,
-)
+from src.crud.pagination import PageParams
+from src.crud.student_course import bulk_enroll_from_csv, select_student_courses_info, select_student_state
 from src.enums import StaticFileType
-from src.models import UserOrm
 from src.schemas.course import (
     AttachedIconResponse,
+    BulkEnrollResponse,
     CourseCreate,
     CourseDetailResponse,
     CourseIconsCreate,
@@ -24,14 +25,20 @@ from src.schemas.course import (
     ImageUploadedResponse,
     PublishCourseResponse,
 )
-from src.session import get_db
+from src.session import get_async_read_db, get_db
 from src.utils.decode_code import decode_access_token
+from src.utils.etag import etag_matches, make_etag, not_modified, versions_etag
 from src.utils.exceptions import (
     CourseNotFoundException,
     PermissionDeniedException
 )
+from src.utils.fields import FieldSet, course_fields
 from src.utils.get_user import get_current_user
+from src.utils.pagination import page_headers, page_params
+from src.utils.principal import UserPrincipal
+from src.utils.response_cache import cached_response
 from src.utils.save_files import save_file
+from src.utils.serialization import json_response
 
 router = APIRouter(prefix="/course")
 
@@ -41,7 +48,7 @@ async def create_course(
         data: CourseCreate,
         icon_data: CourseIconsCreate = None,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if not user.is_moder:
         raise PermissionDeniedException()
@@ -63,7 +70,7 @@ async def update_course(
         course_id: int,
         data: CourseUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = CourseRepository(db=db)
@@ -85,7 +92,7 @@ async def update_course(
 async def delete_course(
         course_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = CourseRepository(db=db)
@@ -99,84 +106,174 @@ async def delete_course(
 @router.get("/all", response_model=list[CourseDetailResponse])
 async def get_courses(
         request: Request,
-        db: Session = Depends(get_db)
+        page: PageParams = Depends(page_params),
+        fields: Optional[FieldSet] = Depends(course_fields),
+        db: AsyncSession = Depends(get_async_read_db)
 ):
-    repository = CourseRepository(db=db)
+    repository = AsyncCourseRepository(db=db)
+    shape = fields.cache_key() if fields else "full"
     authorization = request.headers.get("authorization")
     if authorization and authorization.startswith("Bearer") and len(authorization) > 10:
-        user = decode_access_token(db=db, access_token=authorization[7:])
+        user = await decode_access_token(db=db, access_token=authorization[7:])
 
         if user.is_student:
-            courses = repository.select_all_courses()
-            for course in courses:
-                select_student_course_info(db=db, course=course, student_id=user.student.id)
-                select_student_lesson_info(db=db, course=course, student_id=user.student.id)
-            return courses
+            etag = make_etag(
+                versions_etag("courses", await repository.select_all_course_versions(page=page)),
+                await select_student_state(db=db, student_id=user.student_id),
+                shape
+            )
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+            courses = await repository.select_all_courses(page=page, fields=fields)
+            await select_student_courses_info(db=db, student_id=user.student_id, courses=courses)
 
         else:
-            return repository.select_all_courses_for_moder()
+            etag = make_etag(
+                versions_etag("courses", await repository.select_all_course_versions_for_moder(page=page)), shape
+            )
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+            courses = await repository.select_all_courses_for_moder(page=page, fields=fields)
+
+        return json_response(
+            request, list[CourseDetailResponse], courses, fields, headers={"ETag": etag, **page_headers(courses)}
+        )
+
+    elif page.cursor:
+        # only the first page is cached, so clients can't mint a cache key per cursor
+        etag = make_etag(versions_etag("courses", await repository.select_all_course_versions(page=page)), shape)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        courses = await repository.select_all_courses(page=page, fields=fields)
+        return json_response(
+            request, list[CourseDetailResponse], courses, fields, headers={"ETag": etag, **page_headers(courses)}
+        )
 
     else:
-        return repository.select_all_courses()
+        return await cached_response(
+            key=f"course:all:{page.limit}:{shape}",
+            tags=("courses",),
+            response_model=list[CourseDetailResponse],
+            build=lambda: repository.select_all_courses(page=page, fields=fields),
+            request=request,
+            etag=lambda courses: make_etag(versions_etag("courses", courses), shape),
+            headers=page_headers,
+            fields=fields
+        )
 
 
 @router.get("/most_popular", response_model=list[CourseDetailResponse])
-async def get_popular_course(db: Session = Depends(get_db)):
-    repository = CourseRepository(db=db)
-    return repository.select_popular_course()
+async def get_popular_course(
+        request: Request,
+        days: Optional[int] = Query(default=None, ge=1, le=90),
+        limit: int = Query(default=20, ge=1, le=100),
+        fields: Optional[FieldSet] = Depends(course_fields),
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    repository = AsyncCourseRepository(db=db)
+    shape = fields.cache_key() if fields else "full"
+    return await cached_response(
+        key=f"course:most_popular:{days or 'all'}:{limit}:{shape}",
+        tags=("courses", "popular"),
+        response_model=list[CourseDetailResponse],
+        build=lambda: repository.select_popular_course(limit=limit, days=days, fields=fields),
+        request=request,
+        etag=lambda courses: make_etag("most_popular", [(course.id, course.version) for course in courses], shape),
+        fields=fields
+    )
 
 
 @router.get("/get/{course_id}", response_model=CourseDetailResponse)
 async def get_course(
         request: Request,
         course_id: int,
-        db: Session = Depends(get_db)
+        fields: Optional[FieldSet] = Depends(course_fields),
+        db: AsyncSession = Depends(get_async_read_db)
 ):
-    repository = CourseRepository(db=db)
+    repository = AsyncCourseRepository(db=db)
+    shape = fields.cache_key() if fields else "full"
     authorization = request.headers.get("authorization")
     if authorization and authorization.startswith("Bearer") and len(authorization) > 10:
-        user = decode_access_token(db=db, access_token=authorization[7:])
+        user = await decode_access_token(db=db, access_token=authorization[7:])
+
+        versions = await repository.select_course_version(course_id=course_id)
+        if not versions:
+            raise CourseNotFoundException()
 
+        etag = make_etag(versions_etag("course", versions), shape)
         if user.is_student:
-            course = repository.select_course_by_id(course_id=course_id)
-            if course is None:
-                CourseNotFoundException()
+            etag = make_etag(etag, await select_student_state(db=db, student_id=user.student_id))
 
-            select_student_course_info(db=db, course=course, student_id=user.student.id)
-            select_student_lesson_info(db=db, course=course, student_id=user.student.id)
-            return course
-        else:
-            return repository.select_course_by_id(course_id=course_id)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        course = await repository.select_course_by_id(course_id=course_id, fields=fields)
+        if course is None:
+            raise CourseNotFoundException()
+
+        if user.is_student:
+            await select_student_courses_info(db=db, student_id=user.student_id, courses=[course])
+        return json_response(request, CourseDetailResponse, course, fields, headers={"ETag": etag})
 
     else:
-        return repository.select_course_by_id(course_id=course_id)
+        async def load_course():
+            course = await repository.select_course_by_id(course_id=course_id, fields=fields)
+            if course is None:
+                raise CourseNotFoundException()
+            return course
+
+        return await cached_response(
+            key=f"course:{course_id}:{shape}",
+            tags=("courses",),
+            response_model=CourseDetailResponse,
+            build=load_course,
+            request=request,
+            etag=lambda course: make_etag(versions_etag("course", [course]), shape),
+            fields=fields
+        )
 
 
 @router.get("/get/category/{category_id}", response_model=list[CourseDetailResponse])
 async def get_courses_by_category(
         request: Request,
         category_id: int,
-        db: Session = Depends(get_db)
+        page: PageParams = Depends(page_params),
+        fields: Optional[FieldSet] = Depends(course_fields),
+        db: AsyncSession = Depends(get_async_read_db)
 ):
-    repository = CourseRepository(db=db)
+    repository = AsyncCourseRepository(db=db)
+    etag = make_etag(
+        versions_etag("courses", await repository.select_category_course_versions(category_id=category_id, page=page)),
+        fields.cache_key() if fields else "full"
+    )
+
+    student_id = None
     authorization = request.headers.get("authorization")
     if authorization and authorization.startswith("Bearer") and len(authorization) > 10:
-        user = decode_access_token(db=db, access_token=authorization[7:])
+        user = await decode_access_token(db=db, access_token=authorization[7:])
         if user.is_student:
-            courses = repository.select_courses_by_category_id(category_id=category_id)
-            for course in courses:
-                select_student_course_info(db=db, course=course, student_id=user.student.id)
-                select_student_lesson_info(db=db, course=course, student_id=user.student.id)
+            student_id = user.student_id
+            etag = make_etag(etag, await select_student_state(db=db, student_id=student_id))
 
-            return courses
-    else:
-        return repository.select_courses_by_category_id(category_id=category_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    courses = await repository.select_courses_by_category_id(category_id=category_id, page=page, fields=fields)
+    if student_id is not None:
+        await select_student_courses_info(db=db, student_id=student_id, courses=courses)
+
+    return json_response(
+        request, list[CourseDetailResponse], courses, fields, headers={"ETag": etag, **page_headers(courses)}
+    )
 
 
 @router.post("/upload/course/image", response_model=ImageUploadedResponse)
 async def upload_course_image(
         file: UploadFile = File(...),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         image_path = save_file(file=file, file_type=StaticFileType.course_image.value)
@@ -188,7 +285,7 @@ async def upload_course_image(
 @router.post("/upload/course/icons", response_model=IconUploadedResponse)
 async def upload_course_icons(
         file: UploadFile = File(...),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         icon_path = save_file(file=file, file_type=StaticFileType.course_icon.value)
@@ -197,12 +294,25 @@ async def upload_course_icons(
         raise PermissionDeniedException()
 
 
+@router.post("/bulk-enroll", response_model=BulkEnrollResponse)
+async def bulk_enroll_students(
+        file: UploadFile = File(...),
+        db: Session = Depends(get_db),
+        user: UserPrincipal = Depends(get_current_user)
+):
+    if user.is_moder:
+        enrolled_courses, created_lessons = bulk_enroll_from_csv(db=db, csv_file=file.file)
+        return BulkEnrollResponse(enrolled_courses=enrolled_courses, created_lessons=created_lessons)
+    else:
+        raise PermissionDeniedException()
+
+
 @router.post("/attach/icon", response_model=AttachedIconResponse)
 async def attach_icons_for_course(
         course_id: int,
         data: CourseIconsCreate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = CourseRepository(db=db)
@@ -218,7 +328,7 @@ async def update_icon(
         icon_id: int,
         data: CourseIconUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = CourseRepository(db=db)
@@ -237,7 +347,7 @@ async def publish_course(
         course_id: int,
         response: Response,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         lesson_repo = LessonRepository(db=db)
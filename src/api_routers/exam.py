@@ -1,10 +1,12 @@
-from typing import List
+from typing import List, Union
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
+from src.celery_tasks import tasks
+from src.crud.regrade import EXAM_ATTEMPTS
 from src.crud.exam import ExamRepository
-from src.models import UserOrm
+from src.enums import LessonType
 from src.schemas.practical import (
     DeleteMessageResponse,
     ExamAnswerAdd,
@@ -18,12 +20,16 @@ from src.schemas.practical import (
     MatchingResponseAfterAdd,
     MatchingTuple,
     QuestionListResponse,
+    RegradeStartedResponse,
     UpdateMessageResponse,
+    ExamRegradeReport,
 )
 from src.session import get_db
 from src.utils.create_practical import CreatePracticalLesson
 from src.utils.exceptions import PermissionDeniedException
 from src.utils.get_user import get_current_user
+from src.utils.principal import UserPrincipal
+from src.utils.regrade import regrade_assessment
 
 router = APIRouter(prefix="/exam")
 
@@ -33,7 +39,7 @@ async def update_exam(
         exam_id: int,
         data: ExamConfigUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = ExamRepository(db=db)
@@ -49,7 +55,7 @@ async def add_question(
         exam_id: int,
         data: List[ExamQuestionBase],
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         practical_worker = CreatePracticalLesson(
@@ -68,7 +74,7 @@ async def add_question(
 async def delete_question(
         question_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = ExamRepository(db=db)
@@ -84,7 +90,7 @@ async def update_question(
         question_id: int,
         data: ExamQuestionUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = ExamRepository(db=db)
@@ -99,7 +105,7 @@ async def update_question(
 async def add_answer(
         data: ExamAnswerAdd,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = ExamRepository(db=db)
@@ -118,7 +124,7 @@ async def add_answer(
 async def delete_answer(
         answer_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = ExamRepository(db=db)
@@ -133,7 +139,7 @@ async def update_answer(
         answer_id: int,
         data: ExamAnswerUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = ExamRepository(db=db)
@@ -148,7 +154,7 @@ async def update_answer(
 async def add_matching(
         data: ExamMatchingAdd,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = ExamRepository(db=db)
@@ -172,7 +178,7 @@ async def update_matching(
         left_option_id: int,
         data: ExamMatchingUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = ExamRepository(db=db)
@@ -187,7 +193,7 @@ async def update_matching(
 async def delete_test_matching(
         left_option_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = ExamRepository(db=db)
@@ -196,3 +202,21 @@ async def delete_test_matching(
 
     else:
         raise PermissionDeniedException()
+
+
+@router.post("/regrade", response_model=Union[ExamRegradeReport, RegradeStartedResponse])
+async def regrade_exam_attempts(
+        exam_id: int,
+        dry_run: bool = True,
+        db: Session = Depends(get_db),
+        user: UserPrincipal = Depends(get_current_user)
+):
+    if user.is_moder:
+        if dry_run:
+            return regrade_assessment(db=db, source=EXAM_ATTEMPTS, assessment_id=exam_id, dry_run=True)
+
+        tasks.regrade_attempts.delay(lesson_type=LessonType.exam.value, assessment_id=exam_id)
+        return RegradeStartedResponse()
+
+    else:
+        raise PermissionDeniedException()
@@ -3,9 +3,9 @@ from typing import List
 from fastapi import APIRouter, Depends, File, UploadFile
 from sqlalchemy.orm import Session
 
+from src.crud.course import CourseRepository
 from src.crud.instruction import InstructionRepository
 from src.enums import StaticFileType, UserType
-from src.models import UserOrm
 from src.schemas.instruction import (
     InstructionCreate,
     InstructionDeleteResponse,
@@ -17,6 +17,8 @@ from src.schemas.instruction import (
 from src.session import get_db
 from src.utils.exceptions import InstructionNotFoundException, PermissionDeniedException
 from src.utils.get_user import get_current_user
+from src.utils.principal import UserPrincipal
+from src.utils.response_cache import cached_response
 from src.utils.save_files import save_file
 
 router = APIRouter(prefix="/instruction")
@@ -25,7 +27,7 @@ router = APIRouter(prefix="/instruction")
 @router.post("/upload", response_model=InstructionFileBase)
 async def upload_instruction_file(
         file: UploadFile = File(...),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         file_path = save_file(file=file, file_type=StaticFileType.instruction_file.value)
@@ -43,7 +45,7 @@ async def upload_instruction_file(
 async def create_instruction(
         data: InstructionCreate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = InstructionRepository(db=db)
@@ -61,24 +63,30 @@ async def create_instruction(
 @router.get("/general", response_model=List[InstructionDetailResponse])
 async def get_general_instruction(db: Session = Depends(get_db)):
     repository = InstructionRepository(db=db)
-    result = repository.select_general_instruction()
-    if not result:
-        raise InstructionNotFoundException()
-    return result
+
+    def load_instructions():
+        instructions = repository.select_general_instruction()
+        if not instructions:
+            raise InstructionNotFoundException()
+        return instructions
+
+    return await cached_response(
+        key="instruction:general",
+        tags=("instructions",),
+        response_model=List[InstructionDetailResponse],
+        build=load_instructions
+    )
 
 
 @router.get("/courses", response_model=list[InstructionDetailResponse])
 async def get_courses_instruction(
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 
 ):
     repository = InstructionRepository(db=db)
     if user.is_student:
-        categories = set()
-        courses = user.student.courses
-        for course in courses:
-            categories.add(course.category_id)
+        categories = set(CourseRepository(db=db).select_category_ids_by_student(student_id=user.student_id))
 
         result = repository.select_course_instruction_for_student(categories=categories)
         if not result:
@@ -97,7 +105,7 @@ async def update_instruction(
         data: InstructionUpdate,
         instruction_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = InstructionRepository(db=db)
@@ -118,7 +126,7 @@ async def update_instruction(
 async def delete_instruction(
         instruction_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.usertype == UserType.moder.value:
         repository = InstructionRepository(db=db)
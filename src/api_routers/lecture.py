@@ -9,7 +9,6 @@ from src.crud.student_lesson import (
     select_student_lesson_db,
     set_active_student_lesson_db,
 )
-from src.models import UserOrm
 from src.schemas.lecture import (
     ConfirmLectureResponse,
     DeleteAttributeResponse,
@@ -27,6 +26,7 @@ from src.schemas.lecture import (
 from src.session import get_db
 from src.utils.exceptions import PermissionDeniedException
 from src.utils.get_user import get_current_user
+from src.utils.principal import UserPrincipal
 
 router = APIRouter(prefix="/lecture")
 
@@ -36,7 +36,7 @@ async def create_text_attribute(
         lecture_id: int,
         data: LectureAttributeBase,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -71,7 +71,7 @@ async def update_text_attribute(
         attr_id: int,
         data: LectureAttributeBaseUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -97,7 +97,7 @@ async def create_file_attribute(
         lecture_id: int,
         data: LectureFileBase,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -144,7 +144,7 @@ async def update_file_attribute(
         attr_id: int,
         data: LectureFileAttributeUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -163,7 +163,7 @@ async def create_files_attribute(
         lecture_id: int,
         data: LectureAttributeCreate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -213,7 +213,7 @@ async def update_files_attribute(
         attr_id: int,
         data: LectureAttributeUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -233,7 +233,7 @@ async def create_images_attribute(
         lecture_id: int,
         data: LectureAttributeCreate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -283,7 +283,7 @@ async def update_images_attribute(
         attr_id: int,
         data: LectureAttributeUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -303,7 +303,7 @@ async def create_link_attribute(
         lecture_id: int,
         data: LectureAttributeCreate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -350,7 +350,7 @@ async def update_link_attribute(
         attr_id: int,
         data: LectureAttributeUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -369,7 +369,7 @@ async def update_link_attribute(
 async def delete_attribute(
         attr_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LectureRepository(db=db)
@@ -383,20 +383,20 @@ async def delete_attribute(
 async def confirm_lecture(
         lesson_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     lesson_repo = LessonRepository(db=db)
     if user.is_student:
         lesson = lesson_repo.select_lesson_by_id_db(lesson_id=lesson_id)
-        student_lesson = select_student_lesson_db(db=db, lesson_id=lesson_id, student_id=user.student.id)
+        student_lesson = select_student_lesson_db(db=db, lesson_id=lesson_id, student_id=user.student_id)
         confirm_student_lecture_db(db=db, student_lesson=student_lesson)
 
         number = lesson.number + 1
         next_lesson = lesson_repo.select_lesson_by_number_and_course_id_db(number=number, course_id=lesson.course_id)
-        next_student_lesson = select_student_lesson_db(db=db, lesson_id=next_lesson.id, student_id=user.student.id)
+        next_student_lesson = select_student_lesson_db(db=db, lesson_id=next_lesson.id, student_id=user.student_id)
         set_active_student_lesson_db(db=db, student_lesson=next_student_lesson)
 
-        tasks.update_student_course_progress.delay(student_id=user.student.id, lesson_id=lesson_id)
+        tasks.update_student_course_progress.delay(student_id=user.student_id, lesson_id=lesson_id)
         return ConfirmLectureResponse()
     else:
         raise PermissionDeniedException()
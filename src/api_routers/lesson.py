@@ -1,6 +1,8 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Body, Depends, File, UploadFile
+import orjson
+from fastapi import APIRouter, Body, Depends, File, Request, Response, UploadFile
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
 from src.celery_tasks import tasks
@@ -8,11 +10,13 @@ from src.crud.course import CourseRepository
 from src.crud.lesson import LessonRepository
 from src.crud.student_course import select_count_student_course_db
 from src.enums import LessonType, StaticFileType
-from src.models import UserOrm
 from src.schemas.lesson import LessonCreate, LessonUpdate
-from src.session import get_db
+from src.session import get_db, get_read_db
+from src.utils.etag import etag_matches, make_etag, not_modified
 from src.utils.exceptions import PermissionDeniedException
+from src.utils.fields import lesson_fields, project_lesson
 from src.utils.get_user import get_current_user
+from src.utils.principal import UserPrincipal
 from src.utils.save_files import save_file
 
 router = APIRouter(prefix="/lesson")
@@ -22,7 +26,7 @@ router = APIRouter(prefix="/lesson")
 async def create_lesson(
         data: Annotated[LessonCreate, Body],
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LessonRepository(db=db)
@@ -73,7 +77,7 @@ async def create_lesson(
 @router.post("/upload/file")
 async def upload_lesson_image(
         file: UploadFile = File(...),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         file_path = save_file(file=file, file_type=StaticFileType.lesson_image.value)
@@ -84,15 +88,35 @@ async def upload_lesson_image(
 
 @router.get("/get/{lesson_id}")
 async def get_lesson(
+        request: Request,
+        response: Response,
         lesson_id: int,
-        db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        fields: Optional[tuple[str, ...]] = Depends(lesson_fields),
+        db: Session = Depends(get_read_db),
+        user: UserPrincipal = Depends(get_current_user)
 ):
     repository = LessonRepository(db=db)
-    if user.is_student:
-        return repository.select_lesson_db(lesson_id=lesson_id, student_id=user.student.id)
-    else:
-        return repository.select_lesson_db(lesson_id=lesson_id)
+    student_id = user.student_id if user.is_student else None
+
+    version = repository.select_lesson_version(lesson_id=lesson_id, student_id=student_id)
+    if version is not None:
+        etag = make_etag("lesson", lesson_id, *version, fields)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+
+        if version.type == LessonType.lecture.value:
+            # students all see the same lecture, served as rendered once per lesson version
+            body = repository.lecture_repo.select_lecture_document(lesson_id=lesson_id, version=version.version)
+            if fields:
+                body = orjson.dumps(project_lesson(orjson.loads(body), fields))
+            return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    lesson = repository.select_lesson_db(lesson_id=lesson_id, student_id=student_id)
+    if fields and version is not None:
+        # test and exam lessons come back as ORM objects with their data attached
+        return project_lesson(jsonable_encoder(lesson), fields)
+    return lesson
 
 
 @router.put("/update/{lesson_id}", response_model=LessonUpdate, response_model_exclude_none=True)
@@ -100,7 +124,7 @@ async def update_lesson(
         lesson_id: int,
         data: Annotated[LessonUpdate, Body],
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = LessonRepository(db=db)
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 
 from src.session import get_db
 from src.utils.get_user import get_current_user
-from src.models import UserOrm
+from src.utils.principal import UserPrincipal
 from src.schemas.notes import (
     CreateNote,
     CreateNoteResponse,
@@ -20,7 +20,7 @@ router = APIRouter(prefix="/notes")
 @router.post("/create/folder", status_code=status.HTTP_201_CREATED, response_model=CreateFolderResponse)
 async def create_new_folder(
         data: CreateFolder,
-        user: UserOrm = Depends(get_current_user),
+        user: UserPrincipal = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     if user.is_student:
@@ -34,7 +34,7 @@ async def create_new_folder(
 @router.post("/create/note", status_code=status.HTTP_201_CREATED, response_model=CreateNoteResponse)
 async def create_new_note(
         data: CreateNote,
-        user: UserOrm = Depends(get_current_user),
+        user: UserPrincipal = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     if user.is_student:
@@ -48,7 +48,7 @@ async def create_new_note(
 @router.delete("/delete/folder")
 async def delete_folder(
         folder_id: int,
-        user: UserOrm = Depends(get_current_user),
+        user: UserPrincipal = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     if user.is_student:
@@ -62,7 +62,7 @@ async def delete_folder(
 @router.delete("/delete/note")
 async def delete_note(
         note_id: int,
-        user: UserOrm = Depends(get_current_user),
+        user: UserPrincipal = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     if user.is_student:
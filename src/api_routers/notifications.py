@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
 from src.celery_tasks import tasks
 from src.crud.lesson import LessonRepository
 from src.crud.notifications import NotificationRepository
-from src.models import UserOrm
+from src.crud.pagination import PageParams
 from src.session import get_db
 from src.utils.exceptions import PermissionDeniedException
 from src.utils.get_user import get_current_user
+from src.utils.pagination import page_params, set_page_headers
+from src.utils.principal import UserPrincipal
 from src.utils.notifications import parse_notification_text
 
 router = APIRouter(prefix="/notifications")
@@ -15,12 +17,15 @@ router = APIRouter(prefix="/notifications")
 
 @router.get("/get")
 async def get_my_notifications(
+        response: Response,
+        page: PageParams = Depends(page_params),
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         repository = NotificationRepository(db=db)
-        notifications = repository.select_student_notifications(student_id=user.student.id)
+        notifications = repository.select_student_notifications(student_id=user.student_id, page=page)
+        set_page_headers(response, notifications)
         return notifications
     else:
         raise PermissionDeniedException()
@@ -30,7 +35,7 @@ async def get_my_notifications(
 async def send_notification(
         notification_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         repository = NotificationRepository(db=db)
@@ -44,12 +49,12 @@ async def send_notification(
 async def agree_with_notification(
         notification_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         repository = NotificationRepository(db=db)
         notification = repository.select_one_student_notification(
-            student_id=user.student.id,
+            student_id=user.student_id,
             notification_id=notification_id
         )
 
@@ -59,8 +64,8 @@ async def agree_with_notification(
             lesson_title=lesson_info["lesson_title"], lesson_type=lesson_info["lesson_type"]
         )
 
-        tasks.update_student_lessons.delay(student_id=user.student.id, lesson_info=lesson_info)
-        tasks.update_student_course_progress.delay(student_id=user.student.id, lesson_id=new_lesson.id)
+        tasks.update_student_lessons.delay(student_id=user.student_id, lesson_info=lesson_info)
+        tasks.update_student_course_progress.delay(student_id=user.student_id, lesson_id=new_lesson.id)
         return {"message": "Wait for your course update"}
     else:
         raise PermissionDeniedException()
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.schemas.search import Suggestion
+from src.session import get_async_db
+from src.utils.suggest_index import refresh_suggest_index, suggest_index
+
+router = APIRouter(prefix="/search")
+
+
+@router.get("/suggest", response_model=list[Suggestion])
+async def suggest(
+        query: str = Query(min_length=1, max_length=100),
+        limit: int = Query(default=10, ge=1, le=20),
+        db: AsyncSession = Depends(get_async_db)
+):
+    await refresh_suggest_index(db=db)
+    return suggest_index.suggest(prefix=query, limit=limit)
@@ -18,7 +18,7 @@ from src.celery_tasks import tasks
 from src.crud.stripe import StripeCourseRepository
 from src.crud.course import CourseRepository
 from src.schemas.course import CourseCart
-from src.crud.student_course import subscribe_student_to_course_db, create_student_lesson
+from src.crud.student_course import enroll_student
 from src.utils.check_discount import WebDiscount, MobileDiscount
 
 
@@ -68,21 +68,9 @@ async def course_subscribe_desktop(
 
     for key, value in metadata.items():
         if key.startswith("item"):
-            course_id = int(value)
-            items_id.append(course_id)
-
-            subscribe_student_to_course_db(
-                db=db,
-                student_id=student_id,
-                course_id=course_id
-            )
-
-            create_student_lesson(
-                db=db,
-                student_id=student_id,
-                course_id=course_id
-            )
+            items_id.append(int(value))
 
+    enroll_student(db=db, student_id=student_id, course_ids=items_id)
     return {"status": "Successfully subscribed", "items": items_id}
 
 
@@ -97,21 +85,9 @@ async def course_subscribe_app(
 
     for key, value in metadata.items():
         if key.startswith("item"):
-            course_id = int(value)
-            items_id.append(course_id)
-
-            subscribe_student_to_course_db(
-                db=db,
-                student_id=student_id,
-                course_id=course_id
-            )
-
-            create_student_lesson(
-                db=db,
-                student_id=student_id,
-                course_id=course_id
-            )
+            items_id.append(int(value))
 
+    enroll_student(db=db, student_id=student_id, course_ids=items_id)
     return {"status": "Successfully subscribed", "items": items_id}
 
 @router.post("/mobile/cart")
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Response
 from sqlalchemy.orm import Session
 
 from src.celery_tasks import tasks
+from src.crud.pagination import PageParams
 from src.crud.student_exam import StudentExamRepository
 from src.crud.student_lesson import (
     confirm_student_practical_db,
     select_student_lesson_db,
 )
-from src.models import UserOrm
 from src.schemas.student_practical import (
     ExamResponse,
     StudentExam,
@@ -17,6 +19,8 @@ from src.session import get_db
 from src.utils.assessment_managers import ExamManager
 from src.utils.exceptions import PermissionDeniedException
 from src.utils.get_user import get_current_user
+from src.utils.pagination import page_params, set_page_headers
+from src.utils.principal import UserPrincipal
 
 router = APIRouter(prefix="/student-exam")
 
@@ -24,11 +28,12 @@ router = APIRouter(prefix="/student-exam")
 @router.post("/send", response_model=ExamResponse)
 async def confirm_student_exam(
         data: StudentExam,
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=64),
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
-        manager = ExamManager(student_id=user.student.id, data=data, db=db)
+        manager = ExamManager(student_id=user.student_id, data=data, db=db, idempotency_key=idempotency_key)
         new_attempt = manager.start_inspect()
         return new_attempt
 
@@ -39,12 +44,19 @@ async def confirm_student_exam(
 @router.get("/attempts")
 async def get_exam_attempts(
         exam_id: int,
+        response: Response,
+        page: PageParams = Depends(page_params),
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         student_exam_repository = StudentExamRepository(db=db)
-        return student_exam_repository.select_student_attempts(exam_id=exam_id, student_id=user.student.id)
+        attempts = student_exam_repository.select_student_attempts(
+            exam_id=exam_id, student_id=user.student_id, page=page
+        )
+        if attempts:
+            set_page_headers(response, attempts)
+        return attempts
     else:
         raise PermissionDeniedException()
 
@@ -53,7 +65,7 @@ async def get_exam_attempts(
 async def get_attempt_detail(
         attempt_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         student_exam_repository = StudentExamRepository(db=db)
@@ -66,7 +78,7 @@ async def get_attempt_detail(
 async def submit_exam_attempt(
         data: SubmitStudentPractical,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         student_exam_repository = StudentExamRepository(db=db)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Response
 from sqlalchemy.orm import Session
 
 from src.celery_tasks import tasks
@@ -6,8 +8,8 @@ from src.crud.student_lesson import (
     confirm_student_practical_db,
     select_student_lesson_db,
 )
+from src.crud.pagination import PageParams
 from src.crud.student_test import StudentTestRepository
-from src.models import UserOrm
 from src.schemas.student_practical import (
     StudentPractical,
     SubmitStudentPractical,
@@ -17,6 +19,8 @@ from src.session import get_db
 from src.utils.assessment_managers import TestManager
 from src.utils.exceptions import PermissionDeniedException
 from src.utils.get_user import get_current_user
+from src.utils.pagination import page_params, set_page_headers
+from src.utils.principal import UserPrincipal
 
 router = APIRouter(prefix="/student-test")
 
@@ -24,11 +28,12 @@ router = APIRouter(prefix="/student-test")
 @router.post("/send", response_model=TestResponse)
 async def confirm_student_test(
         data: StudentPractical,
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=64),
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
-        manager = TestManager(db=db, data=data, student_id=user.student.id)
+        manager = TestManager(db=db, data=data, student_id=user.student_id, idempotency_key=idempotency_key)
         new_attempt = manager.start_inspect()
         return new_attempt
     else:
@@ -38,12 +43,17 @@ async def confirm_student_test(
 @router.get("/attempts")
 async def get_test_attempts(
         test_id: int,
+        response: Response,
+        page: PageParams = Depends(page_params),
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         student_test_repo = StudentTestRepository(db=db)
-        return student_test_repo.select_student_attempts(test_id=test_id, student_id=user.student.id)
+        attempts = student_test_repo.select_student_attempts(test_id=test_id, student_id=user.student_id, page=page)
+        if attempts:
+            set_page_headers(response, attempts)
+        return attempts
     else:
         raise PermissionDeniedException()
 
@@ -52,7 +62,7 @@ async def get_test_attempts(
 async def get_attempt_info(
         attempt_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         student_test_repo = StudentTestRepository(db=db)
@@ -65,7 +75,7 @@ async def get_attempt_info(
 async def submit_test_attempt(
         data: SubmitStudentPractical,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         student_test_repo = StudentTestRepository(db=db)
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from src.session import get_db
 from src.utils.get_user import get_current_user
-from src.models import UserOrm
+from src.utils.principal import UserPrincipal
 from src.enums import LessonTemplateType
 from src.utils.exceptions import PermissionDeniedException
 from src.utils.template_serialize import (
@@ -29,7 +29,7 @@ router = APIRouter(prefix="/template")
 async def create_lecture_template(
         data: CreateLectureTemplate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TemplateRepository(db)
@@ -45,7 +45,7 @@ async def create_lecture_template(
 async def create_practical_template(
         data: CreatePracticalTemplate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TemplateRepository(db)
@@ -60,7 +60,7 @@ async def create_practical_template(
 @router.get("/get/all", response_model=list[TemplateBaseResponse])
 async def get_all_templates(
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TemplateRepository(db)
@@ -73,7 +73,7 @@ async def get_all_templates(
 async def get_template_by_id(
         template_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TemplateRepository(db)
@@ -91,7 +91,7 @@ async def get_template_by_id(
 async def get_template_by_id(
         template_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TemplateRepository(db)
@@ -109,7 +109,7 @@ async def get_template_by_id(
 async def delete_template_by_id(
         template_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TemplateRepository(db)
@@ -1,15 +1,18 @@
-from typing import List
+from typing import List, Union
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
+from src.celery_tasks import tasks
+from src.crud.regrade import TEST_ATTEMPTS
 from src.crud.test import TestRepository
-from src.models import UserOrm
+from src.enums import LessonType
 from src.schemas.practical import (
     DeleteMessageResponse,
     MatchingResponseAfterAdd,
     MatchingTuple,
     QuestionListResponse,
+    RegradeStartedResponse,
     TestAnswerAdd,
     TestAnswerResponse,
     TestAnswerUpdate,
@@ -18,12 +21,15 @@ from src.schemas.practical import (
     TestMatchingUpdate,
     TestQuestionBase,
     TestQuestionUpdate,
+    TestRegradeReport,
     UpdateMessageResponse,
 )
 from src.session import get_db
 from src.utils.create_practical import CreatePracticalLesson
 from src.utils.exceptions import PermissionDeniedException
 from src.utils.get_user import get_current_user
+from src.utils.principal import UserPrincipal
+from src.utils.regrade import regrade_assessment
 
 router = APIRouter(prefix="/test")
 
@@ -33,7 +39,7 @@ async def update_test(
         test_id: int,
         data: TestConfigUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TestRepository(db=db)
@@ -49,7 +55,7 @@ async def create_test(
         test_id: int,
         data: List[TestQuestionBase],
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         practical_worker = CreatePracticalLesson(
@@ -67,7 +73,7 @@ async def create_test(
 async def delete_test_question(
         question_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TestRepository(db=db)
@@ -83,7 +89,7 @@ async def update_test_question(
         question_id: int,
         data: TestQuestionUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TestRepository(db=db)
@@ -98,7 +104,7 @@ async def update_test_question(
 async def add_test_answer(
         data: TestAnswerAdd,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TestRepository(db=db)
@@ -118,7 +124,7 @@ async def add_test_answer(
 async def delete_test_answer(
         answer_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TestRepository(db=db)
@@ -133,7 +139,7 @@ async def update_test_answer(
         answer_id: int,
         data: TestAnswerUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TestRepository(db=db)
@@ -148,7 +154,7 @@ async def update_test_answer(
 async def add_test_matching(
         data: TestMatchingAdd,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TestRepository(db=db)
@@ -173,7 +179,7 @@ async def update_test_matching(
         left_option_id: int,
         data: TestMatchingUpdate,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TestRepository(db=db)
@@ -188,7 +194,7 @@ async def update_test_matching(
 async def delete_test_matching(
         left_option_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_moder:
         repository = TestRepository(db=db)
@@ -197,3 +203,21 @@ async def delete_test_matching(
 
     else:
         raise PermissionDeniedException()
+
+
+@router.post("/regrade", response_model=Union[TestRegradeReport, RegradeStartedResponse])
+async def regrade_test_attempts(
+        test_id: int,
+        dry_run: bool = True,
+        db: Session = Depends(get_db),
+        user: UserPrincipal = Depends(get_current_user)
+):
+    if user.is_moder:
+        if dry_run:
+            return regrade_assessment(db=db, source=TEST_ATTEMPTS, assessment_id=test_id, dry_run=True)
+
+        tasks.regrade_attempts.delay(lesson_type=LessonType.test.value, assessment_id=test_id)
+        return RegradeStartedResponse()
+
+    else:
+        raise PermissionDeniedException()
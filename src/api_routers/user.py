@@ -1,20 +1,21 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends, File, Request, UploadFile, status
+from fastapi import APIRouter, Body, Depends, File, Query, Request, Response, UploadFile, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from src.celery_tasks import tasks
+from src.config import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
 from src.crud.certificate import  CertificateRepository
-from src.crud.category import CategoryRepository
 from src.crud.chat import select_chats_for_moderator
-from src.crud.course import CourseRepository
-from src.crud.lesson import LessonRepository
 from src.crud.user import UserRepository
 from src.crud.notes import NotesRepository
+from src.crud.pagination import PageParams
+from src.crud.search import AsyncSearchRepository
 from src.enums import StaticFileType
-from src.models import UserOrm
+from src.schemas.search import SearchResponse
 from src.schemas.user import (
     AuthResponse,
     LoginWithGoogle,
@@ -29,7 +30,7 @@ from src.schemas.user import (
     UserRegistrationResponse,
     UserUpdate,
 )
-from src.session import get_db
+from src.session import get_async_read_db, get_db
 from src.utils.email_regex import is_email
 from src.utils.decode_code import (
     decode_and_check_refresh_token,
@@ -41,6 +42,7 @@ from src.utils.exceptions import (
     EmailNotFoundException,
     InvalidActivateCodeException,
     InvalidPasswordException,
+    InvalidRefreshTokenException,
     InvalidResetCodeException,
     InvalidUsernameException,
     NotActivateAccountException,
@@ -50,11 +52,14 @@ from src.utils.exceptions import (
     UsernameDoesExistException,
 )
 from src.utils.get_user import get_current_user
+from src.utils.principal import UserPrincipal
 from src.utils.info_me import set_info_me
-from src.utils.password import check_password
+from src.utils.pagination import page_params, set_page_headers
+from src.utils.password import check_password_async, hash_password_async
 from src.utils.responses import after_auth_response
 from src.utils.save_files import save_file
-from src.utils.token import create_access_token, create_refresh_token
+from src.utils.token import create_auth_tokens, payload_claims, user_claims
+from src.utils.token_revocation import get_token_generation, revoke_user_tokens
 
 router = APIRouter(prefix="/user")
 
@@ -65,11 +70,13 @@ async def create_admin(
         db: Session = Depends(get_db)
 ):
     user_repository = UserRepository(db=db)
-    user = user_repository.create_admin(password=form_data.password, username=form_data.username)
+    hashed_pass = await hash_password_async(form_data.password)
+    user = user_repository.create_admin(hashed_pass=hashed_pass, username=form_data.username)
 
-    token_data = {"sub": user.username}
-    access_token, access_token_expire = create_access_token(data=token_data)
-    refresh_token, refresh_token_expire = create_refresh_token(data=token_data)
+    generation = revoke_user_tokens(user_id=user.id)
+    access_token, access_token_expire, refresh_token, refresh_token_expire = create_auth_tokens(
+        claims=user_claims(user), generation=generation
+    )
 
     response_data = AuthResponse(
         access_token=access_token,
@@ -82,16 +89,7 @@ async def create_admin(
         message="Success login"
     )
 
-    response = after_auth_response(response_data=response_data)
-
-    tasks.update_user_token_after_login.delay(
-        user_id=user.id,
-        access_token=access_token,
-        refresh_token=refresh_token,
-        exp_token=access_token_expire
-    )
-
-    return response
+    return after_auth_response(response_data=response_data)
 
 
 @router.post("/create", status_code=status.HTTP_201_CREATED, response_model=UserRegistrationResponse)
@@ -109,7 +107,8 @@ async def create_user(
     if user:
         raise UsernameDoesExistException(form_data.username)
 
-    new_user = user_repository.create_new_user(username=form_data.username, password=form_data.password)
+    hashed_pass = await hash_password_async(form_data.password)
+    new_user = user_repository.create_new_user(username=form_data.username, hashed_pass=hashed_pass)
     student_data = StudentCreate(
         user_id=new_user.id,
         name=form_data.name if form_data.name else "",
@@ -147,12 +146,13 @@ async def login(
     if user.is_active is False:
         raise NotActivateAccountException()
 
-    if not check_password(form_data.password, user.hashed_pass):
+    if not await check_password_async(form_data.password, user.hashed_pass):
         raise InvalidPasswordException()
 
-    token_data = {"sub": user.username}
-    access_token, access_token_expire = create_access_token(data=token_data)
-    refresh_token, refresh_token_expire = create_refresh_token(data=token_data)
+    generation = revoke_user_tokens(user_id=user.id)
+    access_token, access_token_expire, refresh_token, refresh_token_expire = create_auth_tokens(
+        claims=user_claims(user), generation=generation
+    )
 
     response_data = AuthResponse(
         access_token=access_token,
@@ -165,27 +165,16 @@ async def login(
         message="Success login"
     )
 
-    response = after_auth_response(response_data=response_data)
-
-    tasks.update_user_token_after_login.delay(
-        user_id=user.id,
-        access_token=access_token,
-        refresh_token=refresh_token,
-        exp_token=access_token_expire
-    )
-
-    return response
+    return after_auth_response(response_data=response_data)
 
 
 @router.get("/logout")
 async def logout(
-        db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     response = JSONResponse(content={"message": "User have been logout"})
     response.set_cookie(key="refresh_token", value="", secure=True, httponly=True, samesite="none", path="/")
-    user_repository = UserRepository(db=db)
-    user_repository.user_logout_db(user=user)
+    revoke_user_tokens(user_id=user.id)
     return response
 
 
@@ -195,28 +184,29 @@ async def refresh(
         db: Session = Depends(get_db),
 ):
     if "refresh_token" in request.cookies.keys():
-        user_repository = UserRepository(db=db)
-
         client_refresh_token = request.cookies.get("refresh_token")
-        data = decode_and_check_refresh_token(client_refresh_token)
-        user = user_repository.select_user_by_username(username=data["sub"])
+        payload = decode_and_check_refresh_token(client_refresh_token)
 
-        access_token, access_token_expire = create_access_token(data=data)
-        refresh_token, refresh_token_expire = create_refresh_token(data=data)
+        if "gen" in payload:
+            claims, generation = payload_claims(payload), payload["gen"]
+        else:
+            user_repository = UserRepository(db=db)
+            user = user_repository.select_user_by_username(username=payload["sub"])
+            if user is None or get_token_generation(user_id=user.id) != 0:
+                raise InvalidRefreshTokenException()
 
-        user_repository.update_user_token(
-            user=user,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            exp_token=access_token_expire.strftime("%Y-%m-%d %H:%M:%S")
+            claims, generation = user_claims(user), 0
+
+        access_token, access_token_expire, refresh_token, refresh_token_expire = create_auth_tokens(
+            claims=claims, generation=generation
         )
 
         response_data = AuthResponse(
             access_token=access_token,
             access_token_expire=access_token_expire,
-            user_id=user.id,
-            user_type=user.usertype,
-            username=user.username,
+            user_id=claims["uid"],
+            user_type=claims["utype"],
+            username=claims["sub"],
             refresh_token=refresh_token,
             refresh_token_expire=refresh_token_expire,
             message="Access and refresh tokens have been updated"
@@ -242,10 +232,10 @@ async def activate_user(
     db_code = user_repository.select_activate_code(user_id=user.id)
 
     if activate_data.code == db_code:
-
-        data = {"sub": user.username}
-        access_token, access_token_expire = create_access_token(data=data)
-        refresh_token, refresh_token_expire = create_refresh_token(data=data)
+        generation = revoke_user_tokens(user_id=user.id)
+        access_token, access_token_expire, refresh_token, refresh_token_expire = create_auth_tokens(
+            claims=user_claims(user), generation=generation
+        )
 
         response_data = AuthResponse(
             access_token=access_token,
@@ -260,12 +250,7 @@ async def activate_user(
 
         response = after_auth_response(response_data=response_data)
 
-        tasks.activate_user.delay(
-            user_id=user.id,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            exp_token=access_token_expire.strftime("%Y-%m-%d %H:%M:%S")
-        )
+        tasks.activate_user.delay(user_id=user.id)
 
         return response
 
@@ -310,13 +295,12 @@ async def set_new_password(
     if db_code[0] == data.code:
         user = user_repository.select_user_by_id(user_id=student.user_id)
 
-        access_token, access_token_expire = create_access_token(data={"sub": user.username})
-        refresh_token, refresh_token_expire = create_refresh_token(data={"sub": user.username})
+        hashed_pass = await hash_password_async(data.new_pass)
+        user_repository.update_user_password(user=user, hashed_pass=hashed_pass)
 
-        user_repository.update_user_password(user=user, password=data.new_pass)
-        user_repository.update_user_token(
-            user=user, access_token=access_token, refresh_token=refresh_token,
-            exp_token=access_token_expire.strftime("%Y-%m-%d %H:%M:%S")
+        generation = revoke_user_tokens(user_id=user.id)
+        access_token, access_token_expire, refresh_token, refresh_token_expire = create_auth_tokens(
+            claims=user_claims(user), generation=generation
         )
 
         response_data = AuthResponse(
@@ -360,11 +344,9 @@ async def login_with_google(
 
     if student:
         user = user_repository.select_user_by_id(user_id=student.user_id)
-        access_token, access_token_expire = create_access_token(data={"sub": user.username})
-        refresh_token, refresh_token_expire = create_refresh_token(data={"sub": user.username})
-        user_repository.update_user_token(
-            user=user, access_token=access_token, refresh_token=refresh_token,
-            exp_token=access_token_expire.strftime("%Y-%m-%d %H:%M:%S")
+        generation = revoke_user_tokens(user_id=user.id)
+        access_token, access_token_expire, refresh_token, refresh_token_expire = create_auth_tokens(
+            claims=user_claims(user), generation=generation
         )
 
         response_data = AuthResponse(
@@ -384,15 +366,9 @@ async def login_with_google(
     else:
         end_index = decoded_data["email"].index("@")
         username = decoded_data["email"][:end_index]
-        access_token, access_token_expire = create_access_token(data={"sub": username})
-        refresh_token, refresh_token_expire = create_refresh_token(data={"sub": username})
 
-        user = user_repository.create_new_user_with_google(
-            username=username,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            exp_token=access_token_expire
-        )
+        hashed_pass = await hash_password_async(username)
+        user = user_repository.create_new_user_with_google(username=username, hashed_pass=hashed_pass)
 
         student_data = StudentCreateViaGoogle(
             user_id=user.id,
@@ -404,6 +380,11 @@ async def login_with_google(
         user_repository.create_new_student_google(student_data)
         user_repository.create_student_image_db(user_id=user.id, image_path=decoded_data["picture"])
 
+        generation = revoke_user_tokens(user_id=user.id)
+        access_token, access_token_expire, refresh_token, refresh_token_expire = create_auth_tokens(
+            claims=user_claims(user), generation=generation
+        )
+
         response_data = AuthResponse(
             access_token=access_token,
             access_token_expire=access_token_expire,
@@ -423,7 +404,7 @@ async def login_with_google(
 async def update_user_image(
         image: UploadFile = File(...),
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     user_repository = UserRepository(db=db)
     image_path = save_file(file=image, file_type=StaticFileType.student_avatar.value)
@@ -437,7 +418,7 @@ async def update_user_image(
 @router.get("/my-images")
 async def get_last_user_images(
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     user_repository = UserRepository(db=db)
     return user_repository.select_student_images_db(user_id=user.id)
@@ -447,7 +428,7 @@ async def get_last_user_images(
 async def set_new_main_image(
         image_id: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     user_repository = UserRepository(db=db)
     main_image = user_repository.select_student_image_db(user_id=user.id)
@@ -461,26 +442,25 @@ async def set_new_main_image(
 async def update_user_username(
         data: Annotated[UsernameUpdate, Body],
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     user_repository = UserRepository(db=db)
-    user_db = user_repository.select_user_by_username(username=data.username)
-    if user_db is None:
-        user_repository.update_user_username_db(user=user, username=data.username)
-
-        access_token, access_token_expire = create_access_token(data={"sub": user.username})
-        refresh_token, refresh_token_expire = create_refresh_token(data={"sub": user.username})
-        user_repository.update_user_token(
-            user=user, access_token=access_token, refresh_token=refresh_token,
-            exp_token=access_token_expire.strftime("%Y-%m-%d %H:%M:%S")
+    existing_user = user_repository.select_user_by_username(username=data.username)
+    if existing_user is None:
+        user_db = user_repository.select_user_by_id(user_id=user.id)
+        user_repository.update_user_username_db(user=user_db, username=data.username)
+
+        generation = revoke_user_tokens(user_id=user_db.id)
+        access_token, access_token_expire, refresh_token, refresh_token_expire = create_auth_tokens(
+            claims=user_claims(user_db), generation=generation
         )
 
         response_data = AuthResponse(
             access_token=access_token,
             access_token_expire=access_token_expire,
-            user_id=user.id,
-            user_type=user.usertype,
-            username=user.username,
+            user_id=user_db.id,
+            user_type=user_db.usertype,
+            username=user_db.username,
             refresh_token=refresh_token,
             refresh_token_expire=refresh_token_expire,
             message="Success updated username"
@@ -496,13 +476,15 @@ async def update_user_username(
 async def update_user_info(
         data: Annotated[UserUpdate, Body],
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     user_repository = UserRepository(db=db)
     student = user_repository.select_student_by_user_id(user_id=user.id)
 
     if data.password:
-        user_repository.update_user_password(user=user, password=data.password)
+        user_db = user_repository.select_user_by_id(user_id=user.id)
+        hashed_pass = await hash_password_async(data.password)
+        user_repository.update_user_password(user=user_db, hashed_pass=hashed_pass)
 
     if data.email:
         res = user_repository.select_student_by_email(email=data.email)
@@ -519,7 +501,7 @@ async def update_user_info(
 async def update_studying_time(
         time: int,
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         user_repository = UserRepository(db=db)
@@ -531,40 +513,45 @@ async def update_studying_time(
 
 @router.get("/info/me")
 async def info_me(
+        response: Response,
+        page: PageParams = Depends(page_params),
         db: Session = Depends(get_db),
-        user: UserOrm = Depends(get_current_user)
+        user: UserPrincipal = Depends(get_current_user)
 ):
     if user.is_student:
         user_repository = UserRepository(db=db)
         student, image, courses = user_repository.select_user_dashboard_info(user_id=user.id)
-        response = set_info_me(user=user, student=student, image=image, courses=courses)
+        info = set_info_me(user=user, student=student, image=image, courses=courses)
 
         notes_repository = NotesRepository(db=db)
-        response["my_notes"] = notes_repository.select_folder_with_notes(student_id=student.id)
+        info["my_notes"] = notes_repository.select_folder_with_notes(student_id=student.id)
 
         certificate_repository = CertificateRepository(db=db)
-        response["certificates"] = certificate_repository.select_student_certificate(student_id=student.id)
+        info["certificates"] = certificate_repository.select_student_certificate(student_id=student.id)
 
-        return response
+        return info
 
     else:
+        chats = select_chats_for_moderator(db=db, user_id=user.id, page=page)
+        set_page_headers(response, chats)
         return {
             "user_id": user.id,
             "user_type": user.usertype,
             "username": user.username,
-            "chats": select_chats_for_moderator(db=db, user_id=user.id)
+            "chats": chats
         }
 
 
-@router.get("/search")
-async def search(query: str, db: Session = Depends(get_db),):
-    results = dict()
-    category_repository = CategoryRepository(db=db)
-    results["categories"] = category_repository.search_category(query=query)
-
-    course_repository = CourseRepository(db=db)
-    results["courses"] = course_repository.search_course(query=query)
-
-    lesson_repository = LessonRepository(db=db)
-    results["lessons"] = lesson_repository.search_lesson(query=query)
-    return results
+@router.get("/search", response_model=SearchResponse)
+async def search(
+        query: str = Query(min_length=1, max_length=200),
+        limit: int = Query(default=SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    repository = AsyncSearchRepository(db=db)
+    return SearchResponse(
+        categories=await repository.search_categories(query=query, limit=limit),
+        courses=await repository.search_courses(query=query, limit=limit),
+        lessons=await repository.search_lessons(query=query, limit=limit),
+        lectures=await repository.search_lectures(query=query, limit=limit)
+    )
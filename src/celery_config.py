@@ -1,17 +1,28 @@
 import logging
 
 from kombu import Exchange, Queue
+from prometheus_client import start_http_server
 
 from celery import Celery, Task
 from celery.signals import (
     after_task_publish,
     task_prerun,
     task_postrun,
-    task_failure
+    task_failure,
+    worker_process_init
 )
-
-from src.config import BROKER_URL
-from src.session import SessionLocal
+from celery.utils.log import current_process_index
+
+from src.config import BROKER_URL, CELERY_METRICS_PORT
+from src.session import (
+    CelerySessionLocal,
+    async_engine,
+    async_replica_engines,
+    celery_engine,
+    engine,
+    replica_engines
+)
+from src.utils.slow_query import set_query_origin
 
 
 logger = logging.getLogger(__name__)
@@ -34,11 +45,13 @@ def task_sent_handler(sender=None, headers=None, body=None, **kwargs):
 @task_prerun.connect
 def task_started_handler(task_id=None, task=None, **kwargs):
     logger.info(f"Task {task.name} with id {task_id} started")
+    set_query_origin(f"task {task.name}[{task_id}]")
 
 
 @task_postrun.connect
 def task_succeeded_handler(task_id=None, task=None, retval=None, **kwargs):
     logger.info(f"Task {task.name} with id {task_id} completed successfully")
+    set_query_origin(None)
 
 
 @task_failure.connect
@@ -46,13 +59,30 @@ def task_failure_handler(task_id=None, exception=None, traceback=None, sender=No
     logger.error(f"Task {sender.name} with id {task_id} failed due to {exception}")
 
 
+@worker_process_init.connect
+def worker_process_init_handler(**kwargs):
+    # connections inherited from the parent process must not be reused after fork
+    forked_engines = (
+        celery_engine,
+        engine,
+        async_engine.sync_engine,
+        *replica_engines,
+        *(replica.sync_engine for replica in async_replica_engines)
+    )
+    for forked_engine in forked_engines:
+        forked_engine.dispose(close=False)
+
+    if CELERY_METRICS_PORT:
+        start_http_server(CELERY_METRICS_PORT + (current_process_index() or 0))
+
+
 class DatabaseTask(Task):
     _db = None
 
     @property
     def db(self):
         if self._db is None:
-            self._db = SessionLocal()
+            self._db = CelerySessionLocal()
         return self._db
 
     def on_success(self, retval, task_id, args, kwargs):
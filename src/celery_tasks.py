@@ -1,5 +1,4 @@
 import os
-from datetime import datetime
 
 from src.celery_config import DatabaseTask, celery_app
 from src.config import SPEECHES_DIR
@@ -10,8 +9,10 @@ from src.crud.exam import ExamRepository
 from src.crud.lecture import LectureRepository
 from src.crud.lesson import LessonRepository
 from src.crud.notifications import NotificationRepository
+from src.crud.regrade import EXAM_ATTEMPTS, TEST_ATTEMPTS
 from src.crud.stripe import StripeCourseRepository
 from src.crud.student_course import (
+    create_student_lesson,
     select_student_course_db,
     select_students_whose_bought_courses,
     update_course_present,
@@ -19,7 +20,6 @@ from src.crud.student_course import (
     update_course_status, check_competed_category,
 )
 from src.crud.student_lesson import (
-    create_student_lesson_db,
     select_count_completed_student_lessons_db,
     select_count_student_lessons_db,
     select_student_lessons_db,
@@ -30,7 +30,6 @@ from src.crud.student_lesson import (
 from src.crud.test import TestRepository
 from src.crud.user import UserRepository
 from src.enums import (
-    LessonStatus,
     LessonType,
     CeleryQueues
 )
@@ -48,6 +47,7 @@ from src.utils.notifications import (
     create_notification_text_for_add_new_course,
     create_notification_text_for_update_course,
 )
+from src.utils.regrade import regrade_assessment
 from src.utils.save_files import delete_files_in_directory
 from src.utils.smtp import send_mail_with_code
 from src.utils.speaches import (
@@ -86,21 +86,10 @@ class CeleryTasks:
         )
 
     @celery_app.task(bind=True, base=DatabaseTask, queue=CeleryQueues.auth)
-    def activate_user(
-            self,
-            user_id: int,
-            access_token: str,
-            exp_token: datetime,
-            refresh_token: str
-    ):
+    def activate_user(self, user_id: int):
         user_repository = UserRepository(db=self.db)
         user = user_repository.select_user_by_id(user_id=user_id)
-        user_repository.activate_user(
-            user=user,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            exp_token=exp_token
-        )
+        user_repository.activate_user(user=user)
 
     @celery_app.task(bind=True, base=DatabaseTask, queue=CeleryQueues.auth)
     def send_reset_pass_code(
@@ -151,40 +140,7 @@ class CeleryTasks:
             student_id: int,
             course_id: int
     ):
-        lesson_repo = LessonRepository(db=self.db)
-        lessons = lesson_repo.select_lessons_by_course_db(course_id=course_id)
-
-        for index, lesson in enumerate(lessons):
-            if lesson.number == 1:
-                create_student_lesson_db(
-                    db=self.db,
-                    student_id=student_id,
-                    lesson_id=lesson.id,
-                    status=LessonStatus.active
-                )
-
-            elif lesson.type == LessonType.test.value or lesson.type == LessonType.exam.value:
-                create_student_lesson_db(
-                    db=self.db,
-                    student_id=student_id,
-                    lesson_id=lesson.id,
-                    status=LessonStatus.blocked
-                )
-            else:
-                if any(les.type == LessonType.test.value for les in lessons[:index]):
-                    create_student_lesson_db(
-                        db=self.db,
-                        student_id=student_id,
-                        lesson_id=lesson.id,
-                        status=LessonStatus.blocked
-                    )
-                else:
-                    create_student_lesson_db(
-                        db=self.db,
-                        student_id=student_id,
-                        lesson_id=lesson.id,
-                        status=LessonStatus.available
-                    )
+        create_student_lesson(db=self.db, student_id=student_id, course_id=course_id)
 
     @celery_app.task(bind=True, base=DatabaseTask, queue=CeleryQueues.course)
     def update_student_course_progress(
@@ -322,6 +278,19 @@ class CeleryTasks:
             )
 
 
+    @celery_app.task(bind=True, base=DatabaseTask, queue=CeleryQueues.course)
+    def regrade_attempts(
+            self,
+            lesson_type: str,
+            assessment_id: int
+    ):
+        regrade_assessment(
+            db=self.db,
+            source=TEST_ATTEMPTS if lesson_type == LessonType.test.value else EXAM_ATTEMPTS,
+            assessment_id=assessment_id,
+            dry_run=False
+        )
+
     @celery_app.task(bind=True, base=DatabaseTask, queue=CeleryQueues.tts)
     def create_lecture_audio(
             self,
@@ -467,23 +436,6 @@ class CeleryTasks:
                     data=ExamConfigUpdate(score=new_exam_score)
                 )
 
-    @celery_app.task(bind=True, base=DatabaseTask, queue=CeleryQueues.auth)
-    def update_user_token_after_login(
-            self,
-            user_id: int,
-            access_token: str,
-            refresh_token: str,
-            exp_token: datetime
-    ):
-        user_repository = UserRepository(db=self.db)
-        user = user_repository.select_user_by_id(user_id=user_id)
-        user_repository.update_user_token(
-            user=user,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            exp_token=exp_token
-        )
-
     @celery_app.task(bind=True, base=DatabaseTask, queue=CeleryQueues.stripe)
     def create_stripe_price(
             self,
@@ -12,6 +12,7 @@ ACCESS_TOKEN_EXPIRE = int(os.getenv("ACCESS_TOKEN_EXPIRE"))
 REFRESH_TOKEN_EXPIRE = int(os.getenv("REFRESH_TOKEN_EXPIRE"))
 GOOGLE_AUTH_SECRET = os.getenv("GOOGLE_AUTH_SECRET")
 DOMAIN = os.getenv("DOMAIN")
+DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 
 # Postgres
 DB_HOST = os.getenv("DB_HOST")
@@ -20,9 +21,94 @@ DB_USER = os.getenv("DB_USER")
 DB_PASS = os.getenv("DB_PASS")
 DB_NAME = os.getenv("DB_NAME")
 DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Postgres read replicas, comma separated host[:port] list
+DB_REPLICA_HOSTS = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+DB_REPLICA_USER = os.getenv("DB_REPLICA_USER", DB_USER)
+DB_REPLICA_PASS = os.getenv("DB_REPLICA_PASS", DB_PASS)
+DB_REPLICA_NAME = os.getenv("DB_REPLICA_NAME", DB_NAME)
+REPLICA_DATABASE_URLS = [
+    f"postgresql+psycopg2://{DB_REPLICA_USER}:{DB_REPLICA_PASS}"
+    f"@{host if ':' in host else f'{host}:{DB_PORT}'}/{DB_REPLICA_NAME}"
+    for host in DB_REPLICA_HOSTS
+]
+REPLICA_ASYNC_DATABASE_URLS = [url.replace("+psycopg2", "+asyncpg", 1) for url in REPLICA_DATABASE_URLS]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+# Connection pools
+PGBOUNCER_MODE = os.getenv("PGBOUNCER_MODE", "false").lower() == "true"
+DB_NULL_POOL = os.getenv("DB_NULL_POOL", "false").lower() == "true"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOLS = {
+    "api": {
+        "pool_size": int(os.getenv("API_DB_POOL_SIZE", 20)),
+        "max_overflow": int(os.getenv("API_DB_MAX_OVERFLOW", 30)),
+        "pool_timeout": int(os.getenv("API_DB_POOL_TIMEOUT", 30)),
+    },
+    "celery": {
+        "pool_size": int(os.getenv("CELERY_DB_POOL_SIZE", 2)),
+        "max_overflow": int(os.getenv("CELERY_DB_MAX_OVERFLOW", 3)),
+        "pool_timeout": int(os.getenv("CELERY_DB_POOL_TIMEOUT", 30)),
+    },
+}
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", 0))
+# /metrics is only served with a token; scrapers send it as "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Query diagnostics
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 10))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", 0.05))
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", 5))
 
 # Redis
 BROKER_URL = os.getenv("BROKER_URL")
+REDIS_URL = os.getenv("REDIS_URL", BROKER_URL)
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.2))
+
+# Auth cache
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 300))
+PRINCIPAL_LOCAL_CACHE_TTL = int(os.getenv("PRINCIPAL_LOCAL_CACHE_TTL", 10))
+PRINCIPAL_LOCAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_LOCAL_CACHE_SIZE", 10000))
+# upper bound, in seconds, on how long a logout or password reset takes to reach the other workers;
+# 0 checks every token against Redis
+TOKEN_REVOCATION_MAX_DELAY = float(os.getenv("TOKEN_REVOCATION_MAX_DELAY", 10))
+
+# Anonymous catalog response cache
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 600))
+RESPONSE_CACHE_LOCK_TTL = int(os.getenv("RESPONSE_CACHE_LOCK_TTL", 10))
+RESPONSE_CACHE_WAIT = float(os.getenv("RESPONSE_CACHE_WAIT", 3))
+
+# Keyset pagination
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", 50))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", 200))
+
+# Search
+SEARCH_DEFAULT_LIMIT = int(os.getenv("SEARCH_DEFAULT_LIMIT", 10))
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", 50))
+SUGGEST_MAX_ENTRIES = int(os.getenv("SUGGEST_MAX_ENTRIES", 100_000))
+SUGGEST_KEY_LENGTH = int(os.getenv("SUGGEST_KEY_LENGTH", 48))
+SUGGEST_REFRESH_INTERVAL = float(os.getenv("SUGGEST_REFRESH_INTERVAL", 30))
+
+# Rendered lecture documents
+LECTURE_CACHE_SIZE = int(os.getenv("LECTURE_CACHE_SIZE", 512))
+LECTURE_CACHE_TTL = int(os.getenv("LECTURE_CACHE_TTL", 3600))
+
+# Question banks of tests and exams
+QUESTION_BANK_CACHE_SIZE = int(os.getenv("QUESTION_BANK_CACHE_SIZE", 1024))
+QUESTION_BANK_CACHE_TTL = int(os.getenv("QUESTION_BANK_CACHE_TTL", 3600))
+ANSWER_KEY_CACHE_TTL = int(os.getenv("ANSWER_KEY_CACHE_TTL", 3600))
+
+# Re-grading of past attempts
+REGRADE_CHUNK_SIZE = int(os.getenv("REGRADE_CHUNK_SIZE", 2000))
+REGRADE_REPORT_LIMIT = int(os.getenv("REGRADE_REPORT_LIMIT", 1000))
+
+# Password hashing
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", os.cpu_count() or 1))
+PASSWORD_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_QUEUE_TIMEOUT", 2))
 
 # SMTP
 SMTP_PASS = os.getenv("SMTP_PASSWORD")
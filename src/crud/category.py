@@ -1,10 +1,13 @@
 from datetime import datetime
-from typing import List, Literal, Type, TypeVar, Union
+from typing import List, Literal, TypeVar, Union
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from src.models import CategoryOrm
 from src.schemas.category import CategoryCreate, CategoryUpdate
+from src.utils.suggest_index import suggest_index
 
 T = TypeVar("T", bound=CategoryOrm)
 MODE = Literal['admin', 'user']
@@ -31,11 +34,6 @@ class CategoryRepository:
         self.db.refresh(new_category)
         return new_category
 
-    def select_all_categories(self, mode: MODE) -> List[Type[T]]:
-        if mode == "admin":
-            return self.db.query(self.model).all()
-        return self.db.query(self.model).filter(self.model.is_published).all()
-
     def select_category_by_id(self, category_id: int, mode: MODE) -> Union[T, None]:
         if mode == "admin":
             return self.db.query(self.model).filter(self.model.id == category_id).first()
@@ -52,12 +50,15 @@ class CategoryRepository:
 
         self.db.commit()
         self.db.refresh(category)
+        if category.is_published:
+            suggest_index.upsert("category", category.id, category.title)
         return category
 
     def delete_category(self, category_id: int) -> None:
         category = self.select_category_by_id(category_id=category_id, mode="admin")
         self.db.delete(category)
         self.db.commit()
+        suggest_index.remove("category", category_id)
 
     def publish_category(self, category_id: int) -> T:
         category = self.select_category_by_id(category_id=category_id, mode="admin")
@@ -65,14 +66,33 @@ class CategoryRepository:
         category.timestamp_change = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.db.commit()
         self.db.refresh(category)
+        suggest_index.upsert("category", category.id, category.title)
         return category
 
-    def search_category(self, query: str) -> List[Type[T]]:
-        regex_query = fr"\y{query}.*"
-        return self.db.query(self.model).filter(self.model.title.op('~*')(regex_query)).all()
-
     def select_category_discount(self, category_id):
         return self.db.query(self.model.discount).filter(self.model.id == category_id).scalar()
 
     def select_category_name_by_id(self, category_id: int):
         return self.db.query(self.model.title).filter(self.model.id == category_id).scalar()
+
+
+class AsyncCategoryRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.model = CategoryOrm
+
+    async def select_all_categories(self, mode: MODE) -> List[T]:
+        query = select(self.model)
+        if mode != "admin":
+            query = query.filter(self.model.is_published)
+
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def select_category_by_id(self, category_id: int, mode: MODE) -> Union[T, None]:
+        query = select(self.model).filter(self.model.id == category_id)
+        if mode != "admin":
+            query = query.filter(self.model.is_published)
+
+        result = await self.db.execute(query)
+        return result.scalars().first()
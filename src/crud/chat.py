@@ -1,8 +1,10 @@
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import desc
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, exists
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from src.crud.pagination import PageParams, paginate, to_page
 from src.enums import ChatStatusType, MessageSenderType
 from src.models import ChatMessageOrm, ChatOrm, MessageFilesOrm
 from src.schemas.chat import MessageFile
@@ -91,12 +93,14 @@ def save_message_files_db(db: Session, files: list, message_id: int):
     db.commit()
 
 
-def select_new_chat_messages_db(db: Session, chat_id: int):
-    return (db.query(ChatMessageOrm)
-            .filter(ChatMessageOrm.chat_id == chat_id)
-            .options(joinedload(ChatMessageOrm.files))
-            .order_by(desc(ChatMessageOrm.timestamp))
-            .all())
+def select_new_chat_messages_db(db: Session, chat_id: int, page: Optional[PageParams] = None):
+    keys = (ChatMessageOrm.timestamp, ChatMessageOrm.id)
+    query = (db.query(ChatMessageOrm)
+             .filter(ChatMessageOrm.chat_id == chat_id)
+             .options(selectinload(ChatMessageOrm.files)))
+    if page is None:
+        return query.order_by(desc(ChatMessageOrm.timestamp)).all()
+    return to_page(paginate(query, keys, page, descending=True).all(), keys, page)
 
 
 def select_chat_db(db: Session, chat_id: int):
@@ -127,18 +131,12 @@ def select_last_message_db(db: Session, message_id: int):
             .first())
 
 
-def select_chats_for_moderator(db: Session, user_id: int):
-    common_chats = (db.query(ChatOrm)
-                    .filter(ChatOrm.status.in_([ChatStatusType.new.value, ChatStatusType.archive.value]))
-                    .all())
-
-    personal_chats = (db.query(ChatOrm)
-                      .join(ChatMessageOrm, ChatMessageOrm.chat_id == ChatOrm.id)
-                      .filter(ChatMessageOrm.recipient_id == user_id)
-                      .filter(ChatOrm.status == ChatStatusType.active)
-                      .all())
-
-    return common_chats + personal_chats
+def select_chats_for_moderator(db: Session, user_id: int, page: Optional[PageParams] = None):
+    personal = exists().where(ChatMessageOrm.chat_id == ChatOrm.id, ChatMessageOrm.recipient_id == user_id)
+    query = (db.query(ChatOrm)
+             .filter(ChatOrm.status.in_([ChatStatusType.new.value, ChatStatusType.archive.value])
+                     | ((ChatOrm.status == ChatStatusType.active.value) & personal)))
+    return to_page(paginate(query, (ChatOrm.id,), page).all(), (ChatOrm.id,), page)
 
 
 def check_active_chat(db: Session, user_id: int):
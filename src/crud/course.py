@@ -1,9 +1,12 @@
-from typing import List, cast
+from datetime import timedelta
+from typing import List, Optional
 
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only, noload, selectinload
 
-from src.crud.lesson import LessonRepository
+from src.crud.lesson import AsyncLessonRepository
+from src.crud.pagination import Page, PageParams, paginate, to_page
 from src.models import CourseIconOrm, CourseOrm, LessonOrm, StudentCourseAssociation
 from src.schemas.course import (
     CourseCreate,
@@ -11,23 +14,17 @@ from src.schemas.course import (
     CourseIconUpdate,
     CourseUpdate,
 )
+from src.utils.fields import FieldSet
+from src.utils.suggest_index import suggest_index
 
 
 class CourseRepository:
-    _lesson_repo = None
-
     def __init__(self, db: Session):
         self.db = db
         self.course_model = CourseOrm
         self.icon_model = CourseIconOrm
         self.student_course_model = StudentCourseAssociation
 
-    @property
-    def lesson_repo(self):
-        if self._lesson_repo is None:
-            self._lesson_repo = LessonRepository(db=self.db)
-        return self._lesson_repo
-
     def create_course(self, data: CourseCreate) -> CourseOrm:
         new_course = CourseOrm(**data.dict())
         self.db.add(new_course)
@@ -47,58 +44,6 @@ class CourseRepository:
     def select_base_course_by_id(self, course_id: int):
         return self.db.query(self.course_model).filter(self.course_model.id == course_id).first()
 
-    def select_course_by_id(self, course_id: int):
-        course = (self.db.query(self.course_model)
-                  .filter(self.course_model.id == course_id, self.course_model.is_published)
-                  .options(joinedload(self.course_model.icons))
-                  .options(joinedload(self.course_model.lessons))
-                  .first())
-
-        if course and course.lessons:
-            lessons: List[LessonOrm] = cast(List[LessonOrm], course.lessons)
-            self.lesson_repo.get_lesson_info(lessons=lessons)
-        return course
-
-    def select_courses_by_category_id(self, category_id: int):
-        courses = (self.db.query(self.course_model)
-                   .filter(self.course_model.category_id == category_id, self.course_model.is_published)
-                   .options(joinedload(self.course_model.icons))
-                   .all())
-
-        for course in courses:
-            if course and course.lessons:
-                lessons: List[LessonOrm] = cast(List[LessonOrm], course.lessons)
-                self.lesson_repo.get_lesson_info(lessons=lessons)
-
-        return courses
-
-    def select_all_courses(self):
-        courses = (self.db.query(self.course_model)
-                   .filter(self.course_model.is_published)
-                   .options(joinedload(self.course_model.icons))
-                   .options(joinedload(self.course_model.lessons))
-                   .all())
-
-        for course in courses:
-            if course and course.lessons:
-                lessons: List[LessonOrm] = cast(List[LessonOrm], course.lessons)
-                self.lesson_repo.get_lesson_info(lessons=lessons)
-
-        return courses
-
-    def select_all_courses_for_moder(self):
-        courses = (self.db.query(self.course_model)
-                   .options(joinedload(self.course_model.icons))
-                   .options(joinedload(self.course_model.lessons))
-                   .all())
-
-        for course in courses:
-            if course and course.lessons:
-                lessons: List[LessonOrm] = cast(List[LessonOrm], course.lessons)
-                self.lesson_repo.get_lesson_info(lessons=lessons)
-
-        return courses
-
     def select_course_title_by_id(self, course_id: int):
         return self.db.query(self.course_model.title).filter(self.course_model.id == course_id).scalar()
 
@@ -114,6 +59,10 @@ class CourseRepository:
          .update({self.course_model.is_published: True}, synchronize_session=False))
 
         self.db.commit()
+        suggest_index.upsert("course", course_id, self.select_course_title_by_id(course_id=course_id))
+        # lessons are only suggested once their course is published
+        for lesson_id, title in self.db.query(LessonOrm.id, LessonOrm.title).filter(LessonOrm.course_id == course_id):
+            suggest_index.upsert("lesson", lesson_id, title)
 
     def update_course(self, data: CourseUpdate, course: CourseOrm):
         for key, value in data.dict().items():
@@ -122,6 +71,8 @@ class CourseRepository:
 
         self.db.commit()
         self.db.refresh(course)
+        if course.is_published:
+            suggest_index.upsert("course", course.id, course.title)
         return course
 
     def update_quantity_lecture(self, course_id: int):
@@ -156,45 +107,7 @@ class CourseRepository:
     def delete_course(self, course: CourseOrm) -> None:
         self.db.delete(course)
         self.db.commit()
-
-    def search_course(self, query: str):
-        regex_query = fr"\y{query}.*"
-        return self.db.query(self.course_model).filter(self.course_model.title.op('~*')(regex_query)).all()
-
-    def select_popular_course(self):
-        all_courses = (self.db.query(self.course_model)
-                       .filter(self.course_model.is_published)
-                       .options(joinedload(self.course_model.icons))
-                       .options(joinedload(self.course_model.lessons))
-                       .all())
-
-        course_purchase_counts = dict(
-            self.db.query(
-                self.student_course_model.course_id,
-                func.count(self.student_course_model.course_id).label('purchase_count'))
-            .group_by(self.student_course_model.course_id)
-            .all())
-
-        # Добавить количество покупок для каждого курса и сортировать
-        all_courses_with_counts = [
-            {
-                "course": course,
-                "purchase_count": course_purchase_counts.get(course.id, 0)
-            }
-            for course in all_courses
-        ]
-
-        # Сортировка курсов по количеству покупок (от большего к меньшему)
-        sorted_courses = sorted(
-            all_courses_with_counts,
-            key=lambda x: x["purchase_count"],
-            reverse=True
-        )
-
-        # Извлечь только курсы (если требуется вернуть массив курсов без дополнительной информации)
-        sorted_all_courses = [item["course"] for item in sorted_courses]
-
-        return sorted_all_courses
+        suggest_index.remove("course", course.id)
 
     def select_course_by_category(self, category_id):
         courses = (self.db.query(self.course_model.id.label("id"))
@@ -204,6 +117,15 @@ class CourseRepository:
         result = [course.id for course in courses]
         return result
 
+    def select_category_ids_by_student(self, student_id: int):
+        categories = (self.db.query(self.course_model.category_id.label("category_id"))
+                      .join(self.student_course_model, self.student_course_model.course_id == self.course_model.id)
+                      .filter(self.student_course_model.student_id == student_id)
+                      .distinct()
+                      .all())
+
+        return [category.category_id for category in categories]
+
     def select_courses_name_by_category(self, category_id):
         courses = (self.db.query(self.course_model.title.label("title"))
                    .filter(self.course_model.category_id == category_id)
@@ -224,3 +146,119 @@ class CourseRepository:
 
         return total
 
+
+class AsyncCourseRepository:
+    _lesson_repo = None
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.course_model = CourseOrm
+        self.student_course_model = StudentCourseAssociation
+
+    @property
+    def lesson_repo(self):
+        if self._lesson_repo is None:
+            self._lesson_repo = AsyncLessonRepository(db=self.db)
+        return self._lesson_repo
+
+    def _catalog_options(self, fields: Optional[FieldSet] = None) -> list:
+        if fields is None:
+            return [selectinload(self.course_model.icons), selectinload(self.course_model.lessons)]
+
+        # a card never loads the large text columns or the collections it doesn't show
+        return [
+            load_only(self.course_model.version, *fields.columns(self.course_model)),
+            selectinload(self.course_model.icons) if "icons" in fields else noload(self.course_model.icons),
+            selectinload(self.course_model.lessons).load_only(
+                LessonOrm.type, LessonOrm.course_id, *fields.nested_columns("lessons", LessonOrm)
+            ) if "lessons" in fields else noload(self.course_model.lessons),
+        ]
+
+    async def _select_catalog(
+            self,
+            *filters,
+            page: Optional[PageParams] = None,
+            fields: Optional[FieldSet] = None
+    ) -> Page:
+        """Courses with icons, lessons and question counts in a fixed number of queries."""
+        query = select(self.course_model).filter(*filters).options(*self._catalog_options(fields))
+        result = await self.db.execute(paginate(query, (self.course_model.id,), page))
+        courses = to_page(result.scalars().all(), (self.course_model.id,), page)
+
+        lessons: List[LessonOrm] = [lesson for course in courses for lesson in course.lessons]
+        if lessons:
+            await self.lesson_repo.get_lesson_info(lessons=lessons)
+
+        return courses
+
+    async def _select_catalog_versions(self, *filters, page: Optional[PageParams] = None):
+        query = select(self.course_model.id, self.course_model.version).filter(*filters)
+        result = await self.db.execute(paginate(query, (self.course_model.id,), page))
+        return result.all()
+
+    async def select_course_version(self, course_id: int):
+        return await self._select_catalog_versions(self.course_model.id == course_id, self.course_model.is_published)
+
+    async def select_category_course_versions(self, category_id: int, page: Optional[PageParams] = None):
+        return await self._select_catalog_versions(
+            self.course_model.category_id == category_id, self.course_model.is_published, page=page
+        )
+
+    async def select_all_course_versions(self, page: Optional[PageParams] = None):
+        return await self._select_catalog_versions(self.course_model.is_published, page=page)
+
+    async def select_all_course_versions_for_moder(self, page: Optional[PageParams] = None):
+        return await self._select_catalog_versions(page=page)
+
+    async def select_course_by_id(self, course_id: int, fields: Optional[FieldSet] = None):
+        courses = await self._select_catalog(
+            self.course_model.id == course_id, self.course_model.is_published, fields=fields
+        )
+        return courses[0] if courses else None
+
+    async def select_courses_by_category_id(
+            self,
+            category_id: int,
+            page: Optional[PageParams] = None,
+            fields: Optional[FieldSet] = None
+    ):
+        return await self._select_catalog(
+            self.course_model.category_id == category_id, self.course_model.is_published, page=page, fields=fields
+        )
+
+    async def select_all_courses(self, page: Optional[PageParams] = None, fields: Optional[FieldSet] = None):
+        return await self._select_catalog(self.course_model.is_published, page=page, fields=fields)
+
+    async def select_all_courses_for_moder(
+            self,
+            page: Optional[PageParams] = None,
+            fields: Optional[FieldSet] = None
+    ):
+        return await self._select_catalog(page=page, fields=fields)
+
+    async def select_popular_course(self, limit: int, days: Optional[int] = None, fields: Optional[FieldSet] = None):
+        query = (
+            select(self.course_model)
+            .filter(self.course_model.is_published)
+            .options(*self._catalog_options(fields))
+            .limit(limit)
+        )
+
+        if days is None:
+            query = query.order_by(self.course_model.purchase_count.desc(), self.course_model.id)
+        else:
+            recent = (
+                select(self.student_course_model.course_id, func.count().label("purchases"))
+                .filter(self.student_course_model.enrolled_at >= func.now() - timedelta(days=days))
+                .group_by(self.student_course_model.course_id)
+                .subquery()
+            )
+            query = (
+                query.outerjoin(recent, recent.c.course_id == self.course_model.id)
+                .order_by(func.coalesce(recent.c.purchases, 0).desc(),
+                          self.course_model.purchase_count.desc(),
+                          self.course_model.id)
+            )
+
+        result = await self.db.execute(query)
+        return result.scalars().all()
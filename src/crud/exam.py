@@ -1,7 +1,8 @@
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from src.enums import LessonStatus, LessonType, QuestionTypeOption
+from src.crud.question_bank import EXAM_BANK, QuestionBankRepository
+from src.enums import LessonType, QuestionTypeOption
 from src.models import (
     ExamAnswerOrm,
     ExamMatchingLeftOrm,
@@ -143,30 +144,6 @@ class ExamRepository:
                 .filter(self.question_model.exam_id == exam_id)
                 .scalar())
 
-    def select_correct_answer(self, question_id: int) -> int:
-        return (self.db.query(self.answer_model.id)
-                .filter(self.answer_model.question_id == question_id)
-                .filter(self.answer_model.is_correct)
-                .scalar())
-
-    def select_count_correct_answers(self, question_id: int) -> int:
-        return (self.db.query(self.answer_model.id.label("id"))
-                .filter(self.answer_model.question_id == question_id)
-                .filter(self.answer_model.is_correct)
-                .count())
-
-    def select_correct_answers(self, question_id: int) -> list:
-        answers_ids = (self.db.query(self.answer_model.id.label("id"))
-                       .filter(self.answer_model.question_id == question_id)
-                       .filter(self.answer_model.is_correct)
-                       .all())
-
-        answers = [answer.id for answer in answers_ids]
-        return answers
-
-    def select_correct_right_option(self, left_id: int) -> int:
-        return self.db.query(self.matching_left_model.right_id).filter(self.matching_left_model.id == left_id).scalar()
-
     def select_exam_answers(self, question_id: int):
         return self.db.query(self.answer_model).filter(self.answer_model.question_id == question_id).all()
 
@@ -272,104 +249,11 @@ class ExamRepository:
             self.db.rollback()
 
     def select_exam_data(self, lesson: LessonOrm, student_id: int = None):
-        exam = self.db.query(self.exam_model).filter(self.exam_model.lesson_id == lesson.id).first()
-
-        if exam:
-            exam_questions = self.db.query(self.question_model).filter(self.question_model.exam_id == exam.id).all()
-            exam_data = {
-                "exam_id": exam.id,
-                "score": exam.score,
-                "attempts": exam.attempts,
-                "timer": exam.timer,
-                "min_score": exam.min_score,
-                "questions": []
-            }
-
-            if student_id:
-                student_exam_info = (self.db.query(self.student_lesson_model)
-                                     .filter(self.student_lesson_model.lesson_id == lesson.id)
-                                     .filter(self.student_lesson_model.student_id == student_id)
-                                     .first())
-
-                if student_exam_info.status == LessonStatus.completed.value:
-                    exam_data["my_score"] = student_exam_info.score
-                    exam_data["my_attempt_id"] = student_exam_info.attempt
-
-            for question in exam_questions:
-                question_data = {
-                    "q_id": question.id,
-                    "q_text": question.q_text,
-                    "q_number": question.q_number,
-                    "q_score": question.q_score,
-                    "q_type": question.q_type,
-                    "hidden": question.hidden,
-                    "image_path": None,
-                    "answers": []
-                }
-
-                if question.q_type in [QuestionTypeOption.test.value, QuestionTypeOption.boolean.value]:
-                    answers = self.select_exam_answers(question_id=question.id)
-
-                    for answer in answers:
-                        answer_data = {"a_id": answer.id, "a_text": answer.a_text, "is_correct": answer.is_correct}
-                        question_data["answers"].append(answer_data)
-
-                elif question.q_type == QuestionTypeOption.answer_with_photo.value:
-                    answers = self.select_exam_answers(question_id=question.id)
-
-                    for answer in answers:
-                        answer_data = {
-                            "a_id": answer.id,
-                            "a_text": answer.a_text,
-                            "is_correct": answer.is_correct,
-                            "image_path": answer.image_path
-                        }
-                        question_data["answers"].append(answer_data)
-
-                elif question.q_type == QuestionTypeOption.question_with_photo.value:
-                    question_data["image_path"] = question.image_path
-                    answers = self.select_exam_answers(question_id=question.id)
-
-                    for answer in answers:
-                        answer_data = {"a_id": answer.id, "a_text": answer.a_text, "is_correct": answer.is_correct}
-                        question_data["answers"].append(answer_data)
-
-                elif question.q_type == QuestionTypeOption.multiple_choice.value:
-                    answers = self.select_exam_answers(question_id=question.id)
-
-                    for answer in answers:
-                        counter = 0
-                        if answer.is_correct:
-                            counter += 1
-
-                        answer_data = {"a_id": answer.id, "a_text": answer.a_text, "is_correct": answer.is_correct}
-                        question_data["answers"].append(answer_data)
-                        question_data["count_correct"] = counter
-
-                else:
-                    left_options = (self.db.query(self.matching_left_model)
-                                    .filter(self.matching_left_model.question_id == question.id).all())
-
-                    right_options = (self.db.query(self.matching_right_model)
-                                     .filter(self.matching_right_model.question_id == question.id).all())
-
-                    question_data["answers"] = {
-                        "left": [
-                            {
-                                "value": left_option.text,
-                                "id": left_option.id
-                            } for left_option in left_options
-                        ],
-                        "right": [
-                            {
-                                "value": right_option.text,
-                                "id": right_option.id
-                            } for right_option in right_options
-                        ]
-                    }
-
-                exam_data["questions"].append(question_data)
+        exam_data = QuestionBankRepository(db=self.db, source=EXAM_BANK).select_bank_data(
+            lesson_id=lesson.id,
+            student_id=student_id
+        )
+
+        if exam_data:
             setattr(lesson, "exam_data", exam_data)
-            return lesson
-        else:
-            return lesson
\ No newline at end of file
+        return lesson
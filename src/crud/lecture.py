@@ -1,4 +1,6 @@
-from sqlalchemy.orm import Session, joinedload
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session, selectinload
 
 from src.enums import LectureAttributeType
 from src.models import (
@@ -9,6 +11,7 @@ from src.models import (
     LessonOrm,
 )
 from src.schemas.lecture import LectureAttributeUpdate, LectureFileAttributeUpdate
+from src.utils.lecture_cache import get_lecture_document, invalidate_lecture_document, store_lecture_document
 from src.utils.save_files import delete_file
 from src.crud.template import TemplateRepository
 
@@ -50,6 +53,7 @@ class LectureRepository:
         self.db.add(new_attr)
         self.db.commit()
         self.db.refresh(new_attr)
+        invalidate_lecture_document(lecture_id)
         return new_attr
 
     def create_attribute_file(
@@ -73,6 +77,7 @@ class LectureRepository:
         self.db.add(file)
         self.db.commit()
         self.db.refresh(file)
+        invalidate_lecture_document(self.select_lecture_by_attr_id(attr_id=attribute_id))
         return file
 
     def create_attribute_link(
@@ -86,6 +91,7 @@ class LectureRepository:
         self.db.add(link)
         self.db.commit()
         self.db.refresh(link)
+        invalidate_lecture_document(self.select_lecture_by_attr_id(attr_id=attribute_id))
         return link
 
     def select_lecture_attrs(self, lecture_id: int) -> list:
@@ -103,6 +109,7 @@ class LectureRepository:
          .update({self.model.audios: audios}, synchronize_session=False))
 
         self.db.commit()
+        invalidate_lecture_document(lecture_id)
 
     def update_lecture_attr(
             self,
@@ -128,6 +135,7 @@ class LectureRepository:
 
         self.db.commit()
         self.db.refresh(attribute)
+        invalidate_lecture_document(attribute.lecture_id)
 
     def update_lecture_file_attr(self, attr_id: int, data: LectureFileAttributeUpdate):
         file = self.db.query(self.file_model).filter(self.file_model.attribute_id == attr_id).first()
@@ -223,13 +231,14 @@ class LectureRepository:
 
         self.db.delete(attr)
         self.db.commit()
+        invalidate_lecture_document(attr.lecture_id)
 
     def select_lecture_data(self, lesson: LessonOrm):
         lecture = (
             self.db.query(self.model)
             .filter(self.model.lesson_id == lesson.id)
-            .options(joinedload(self.model.lecture_attributes).joinedload(self.attr_model.files))
-            .options(joinedload(self.model.lecture_attributes).joinedload(self.attr_model.links))
+            .options(selectinload(self.model.lecture_attributes).selectinload(self.attr_model.files),
+                     selectinload(self.model.lecture_attributes).selectinload(self.attr_model.links))
             .first()
         )
 
@@ -289,3 +298,22 @@ class LectureRepository:
 
         else:
             return lesson
+
+    def select_lecture_document(self, lesson_id: int, version: int) -> bytes:
+        """
+        The rendered /lesson/get payload of a lecture lesson. Every student gets the same
+        document, so it is rendered once per lesson version, which the content triggers bump.
+        """
+        body = get_lecture_document(lesson_id=lesson_id, version=version)
+        if body is None:
+            lesson = self.db.query(self.lesson_model).filter(self.lesson_model.id == lesson_id).first()
+            lesson = self.select_lecture_data(lesson=lesson)
+            body = orjson.dumps(jsonable_encoder(lesson))
+            lecture_info = getattr(lesson, "lecture_info", None)
+            store_lecture_document(
+                lesson_id=lesson_id,
+                lecture_id=lecture_info["lecture_id"] if lecture_info else None,
+                version=version,
+                body=body
+            )
+        return body
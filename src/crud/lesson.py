@@ -1,14 +1,23 @@
 from typing import List
 
-from sqlalchemy import asc
+from sqlalchemy import asc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from src.crud.exam import ExamRepository
 from src.crud.lecture import LectureRepository
 from src.crud.test import TestRepository
 from src.enums import LessonType
-from src.models import LessonOrm
+from src.models import (
+    ExamOrm,
+    ExamQuestionOrm,
+    LessonOrm,
+    StudentLessonOrm,
+    TestOrm,
+    TestQuestionOrm,
+)
 from src.schemas.lesson import LessonCreate, LessonUpdate
+from src.utils.suggest_index import suggest_index
 
 
 class LessonRepository:
@@ -43,6 +52,8 @@ class LessonRepository:
         self.db.add(new_lesson)
         self.db.commit()
         self.db.refresh(new_lesson)
+        if new_lesson.course.is_published:
+            suggest_index.upsert("lesson", new_lesson.id, new_lesson.title)
         return new_lesson
 
     def select_lesson_db(self, lesson_id: int, student_id: int = None):
@@ -59,6 +70,23 @@ class LessonRepository:
         else:
             return self.exam_repo.select_exam_data(lesson=lesson, student_id=student_id)
 
+    def select_lesson_version(self, lesson_id: int, student_id: int = None):
+        """Content version and type of the lesson and, for a student, the progress shown alongside it."""
+        if student_id is None:
+            return (self.db.query(self.lesson_model.version, self.lesson_model.type)
+                    .filter(self.lesson_model.id == lesson_id)
+                    .first())
+
+        return (self.db.query(self.lesson_model.version,
+                              self.lesson_model.type,
+                              StudentLessonOrm.status,
+                              StudentLessonOrm.score,
+                              StudentLessonOrm.attempt)
+                .outerjoin(StudentLessonOrm, (StudentLessonOrm.lesson_id == self.lesson_model.id)
+                           & (StudentLessonOrm.student_id == student_id))
+                .filter(self.lesson_model.id == lesson_id)
+                .first())
+
     def select_lessons_by_course_db(self, course_id: int):
         return (self.db.query(self.lesson_model)
                 .filter(self.lesson_model.course_id == course_id)
@@ -103,23 +131,8 @@ class LessonRepository:
                 setattr(lesson, key, value)
 
         self.db.commit()
-
-    def search_lesson(self, query: str):
-        regex_query = fr"\y{query}.*"
-        return self.db.query(self.lesson_model).filter(self.lesson_model.title.op('~*')(regex_query)).all()
-
-    def get_lesson_info(self, lessons: List[LessonOrm]):
-        for lesson in lessons:
-            if lesson.type == LessonType.exam.value:
-                count_questions = self.exam_repo.select_quantity_question(lesson_id=lesson.id)
-                setattr(lesson, "count_questions", count_questions)
-
-            elif lesson.type == LessonType.test.value:
-                count_questions = self.test_repo.select_quantity_question(lesson_id=lesson.id)
-                setattr(lesson, "count_questions", count_questions)
-
-            else:
-                continue
+        if lesson.course.is_published:
+            suggest_index.upsert("lesson", lesson.id, lesson.title)
 
     def check_validity_lessons(self, course_id: int):
         tests_score = self.test_repo.select_test_sum_scores(course_id=course_id)
@@ -180,3 +193,41 @@ class LessonRepository:
                 "result": True,
                 "message": "Course successfully published"
             }
+
+
+class AsyncLessonRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.lesson_model = LessonOrm
+
+    async def select_test_question_counts(self, lesson_ids: List[int]) -> dict[int, int]:
+        result = await self.db.execute(
+            select(TestOrm.lesson_id, func.count(TestQuestionOrm.id))
+            .join(TestQuestionOrm, TestOrm.id == TestQuestionOrm.test_id)
+            .filter(TestOrm.lesson_id.in_(lesson_ids))
+            .group_by(TestOrm.lesson_id)
+        )
+        return dict(result.all())
+
+    async def select_exam_question_counts(self, lesson_ids: List[int]) -> dict[int, int]:
+        result = await self.db.execute(
+            select(ExamOrm.lesson_id, func.count(ExamQuestionOrm.id))
+            .join(ExamQuestionOrm, ExamOrm.id == ExamQuestionOrm.exam_id)
+            .filter(ExamOrm.lesson_id.in_(lesson_ids))
+            .group_by(ExamOrm.lesson_id)
+        )
+        return dict(result.all())
+
+    async def get_lesson_info(self, lessons: List[LessonOrm]):
+        test_ids = [lesson.id for lesson in lessons if lesson.type == LessonType.test.value]
+        exam_ids = [lesson.id for lesson in lessons if lesson.type == LessonType.exam.value]
+
+        test_counts = await self.select_test_question_counts(lesson_ids=test_ids) if test_ids else {}
+        exam_counts = await self.select_exam_question_counts(lesson_ids=exam_ids) if exam_ids else {}
+
+        for lesson in lessons:
+            if lesson.type == LessonType.exam.value:
+                setattr(lesson, "count_questions", exam_counts.get(lesson.id, 0))
+
+            elif lesson.type == LessonType.test.value:
+                setattr(lesson, "count_questions", test_counts.get(lesson.id, 0))
@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta
+from typing import Optional
 
 from sqlalchemy.orm import Session
 
+from src.crud.pagination import PageParams, paginate, to_page
 from src.enums import NotificationType
 from src.models import StudentNotification
 
@@ -36,8 +38,9 @@ class NotificationRepository:
         self.db.commit()
         self.db.refresh(new_notification)
 
-    def select_student_notifications(self, student_id: int):
-        return self.db.query(self.model).filter(self.model.student_id == student_id).all()
+    def select_student_notifications(self, student_id: int, page: Optional[PageParams] = None):
+        query = self.db.query(self.model).filter(self.model.student_id == student_id)
+        return to_page(paginate(query, (self.model.id,), page).all(), (self.model.id,), page)
 
     def select_one_student_notification(self, student_id: int, notification_id: int):
         return (self.db.query(self.model)
@@ -0,0 +1,65 @@
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+import orjson
+from sqlalchemy import tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+from src.utils.exceptions import InvalidCursorException
+
+
+@dataclass(frozen=True)
+class PageParams:
+    limit: int
+    cursor: Optional[str] = None
+
+
+class Page(list):
+    """A list of rows plus the cursor of the page after it (None on the last page)."""
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(list(values))).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute]) -> list:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+
+        return [
+            datetime.fromisoformat(value) if key.type.python_type is datetime else key.type.python_type(value)
+            for key, value in zip(keys, values)
+        ]
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise InvalidCursorException()
+
+
+def paginate(query, keys: Sequence[InstrumentedAttribute], params: Optional[PageParams], descending: bool = False):
+    """
+    Orders a select()/Query by the unique key columns and applies the cursor of params.
+    Fetches one extra row so to_page can tell whether another page follows.
+    """
+    if params is None:
+        return query
+
+    if params.cursor:
+        values = decode_cursor(params.cursor, keys)
+        key, value = tuple_(*keys), tuple_(*values)
+        query = query.filter(key < value if descending else key > value)
+
+    return (query
+            .order_by(*[key.desc() if descending else key.asc() for key in keys])
+            .limit(params.limit + 1))
+
+
+def to_page(rows: Sequence, keys: Sequence[InstrumentedAttribute], params: Optional[PageParams]) -> Page:
+    page = Page(rows[:params.limit] if params else rows)
+    if params and len(rows) > params.limit:
+        page.next_cursor = encode_cursor([getattr(page[-1], key.key) for key in keys])
+    return page
@@ -0,0 +1,216 @@
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from src.config import QUESTION_BANK_CACHE_SIZE, QUESTION_BANK_CACHE_TTL
+from src.enums import LessonStatus, QuestionTypeOption
+from src.models import (
+    ExamAnswerOrm,
+    ExamMatchingLeftOrm,
+    ExamMatchingRightOrm,
+    ExamOrm,
+    ExamQuestionOrm,
+    StudentLessonOrm,
+    TestAnswerOrm,
+    TestMatchingLeftOrm,
+    TestMatchingRightOrm,
+    TestOrm,
+    TestQuestionOrm,
+)
+from src.utils.cache import TTLCache
+
+
+class BankAnswer(NamedTuple):
+    id: int
+    text: str
+    is_correct: bool
+    image_path: Optional[str]
+
+
+class BankOption(NamedTuple):
+    id: int
+    text: str
+    right_id: Optional[int] = None
+
+
+class BankQuestion(NamedTuple):
+    id: int
+    text: str
+    number: int
+    score: int
+    type: QuestionTypeOption
+    hidden: bool
+    image_path: Optional[str]
+    answers: tuple[BankAnswer, ...]
+    left: tuple[BankOption, ...]
+    right: tuple[BankOption, ...]
+
+
+class QuestionBank(NamedTuple):
+    """All questions of a test or exam as loaded at one content version."""
+    id: int
+    version: int
+    settings: tuple[tuple[str, Any], ...]
+    questions: tuple[BankQuestion, ...]
+
+
+class BankSource(NamedTuple):
+    name: str
+    model: type
+    question_model: type
+    answer_model: type
+    left_model: type
+    right_model: type
+    owner_fk: str
+    settings: tuple[str, ...]
+
+
+TEST_BANK = BankSource(
+    name="test",
+    model=TestOrm,
+    question_model=TestQuestionOrm,
+    answer_model=TestAnswerOrm,
+    left_model=TestMatchingLeftOrm,
+    right_model=TestMatchingRightOrm,
+    owner_fk="test_id",
+    settings=("score", "attempts")
+)
+EXAM_BANK = BankSource(
+    name="exam",
+    model=ExamOrm,
+    question_model=ExamQuestionOrm,
+    answer_model=ExamAnswerOrm,
+    left_model=ExamMatchingLeftOrm,
+    right_model=ExamMatchingRightOrm,
+    owner_fk="exam_id",
+    settings=("score", "attempts", "timer", "min_score")
+)
+
+# (source name, lesson_id) -> QuestionBank; a stale entry is replaced once the version moves on
+_banks = TTLCache(maxsize=QUESTION_BANK_CACHE_SIZE, ttl=QUESTION_BANK_CACHE_TTL)
+
+
+class QuestionBankRepository:
+    def __init__(self, db: Session, source: BankSource):
+        self.db = db
+        self.source = source
+
+    def select_bank(self, lesson_id: int) -> Optional[QuestionBank]:
+        """
+        The question bank of the lesson's test or exam. Cached per content version,
+        which the triggers bump on any change of its questions, answers or options.
+        """
+        source = self.source
+        owner = (self.db.query(source.model.id, source.model.version,
+                               *(getattr(source.model, name) for name in source.settings))
+                 .filter(source.model.lesson_id == lesson_id)
+                 .first())
+        if owner is None:
+            return None
+
+        bank = _banks.get((source.name, lesson_id))
+        if bank is None or bank.version != owner.version:
+            bank = self._load_bank(owner)
+            _banks.set((source.name, lesson_id), bank)
+        return bank
+
+    def _load_bank(self, owner) -> QuestionBank:
+        source = self.source
+        owner_fk = getattr(source.question_model, source.owner_fk)
+
+        questions = (self.db.query(source.question_model)
+                     .filter(owner_fk == owner.id)
+                     .order_by(source.question_model.id)
+                     .all())
+
+        answers, left, right = {}, {}, {}
+        for answer in (self.db.query(source.answer_model)
+                       .join(source.question_model, source.answer_model.question_id == source.question_model.id)
+                       .filter(owner_fk == owner.id)
+                       .order_by(source.answer_model.id)):
+            answers.setdefault(answer.question_id, []).append(
+                BankAnswer(answer.id, answer.a_text, answer.is_correct, answer.image_path)
+            )
+
+        for options, model, columns in ((left, source.left_model, (source.left_model.right_id,)),
+                                        (right, source.right_model, ())):
+            for option in (self.db.query(model.question_id, model.id, model.text, *columns)
+                           .join(source.question_model, model.question_id == source.question_model.id)
+                           .filter(owner_fk == owner.id)
+                           .order_by(model.id)):
+                options.setdefault(option.question_id, []).append(BankOption(*option[1:]))
+
+        return QuestionBank(
+            id=owner.id,
+            version=owner.version,
+            settings=tuple((name, getattr(owner, name)) for name in source.settings),
+            questions=tuple(
+                BankQuestion(
+                    id=question.id,
+                    text=question.q_text,
+                    number=question.q_number,
+                    score=question.q_score,
+                    type=question.q_type,
+                    hidden=question.hidden,
+                    image_path=question.image_path,
+                    answers=tuple(answers.get(question.id, ())),
+                    left=tuple(left.get(question.id, ())),
+                    right=tuple(right.get(question.id, ())),
+                )
+                for question in questions
+            )
+        )
+
+    def select_bank_data(self, lesson_id: int, student_id: int = None) -> Optional[dict]:
+        """The test_data/exam_data payload: the bank with the student's result laid over it."""
+        bank = self.select_bank(lesson_id=lesson_id)
+        if bank is None:
+            return None
+
+        data = {f"{self.source.name}_id": bank.id, **dict(bank.settings)}
+        if student_id:
+            student_lesson = (self.db.query(StudentLessonOrm.status, StudentLessonOrm.score, StudentLessonOrm.attempt)
+                              .filter(StudentLessonOrm.lesson_id == lesson_id,
+                                      StudentLessonOrm.student_id == student_id)
+                              .first())
+
+            if student_lesson and student_lesson.status == LessonStatus.completed.value:
+                data["my_score"] = student_lesson.score
+                data["my_attempt_id"] = student_lesson.attempt
+
+        data["questions"] = [render_question(question) for question in bank.questions]
+        return data
+
+
+def render_question(question: BankQuestion) -> dict:
+    question_data = {
+        "q_id": question.id,
+        "q_text": question.text,
+        "q_number": question.number,
+        "q_score": question.score,
+        "q_type": question.type,
+        "hidden": question.hidden,
+        "image_path": None,
+        "answers": []
+    }
+
+    if question.type == QuestionTypeOption.matching.value:
+        question_data["answers"] = {
+            "left": [{"value": option.text, "id": option.id} for option in question.left],
+            "right": [{"value": option.text, "id": option.id} for option in question.right]
+        }
+        return question_data
+
+    for answer in question.answers:
+        answer_data = {"a_id": answer.id, "a_text": answer.text, "is_correct": answer.is_correct}
+        if question.type == QuestionTypeOption.answer_with_photo.value:
+            answer_data["image_path"] = answer.image_path
+        question_data["answers"].append(answer_data)
+
+    if question.type == QuestionTypeOption.question_with_photo.value:
+        question_data["image_path"] = question.image_path
+
+    elif question.type == QuestionTypeOption.multiple_choice.value and question.answers:
+        question_data["count_correct"] = sum(answer.is_correct for answer in question.answers)
+
+    return question_data
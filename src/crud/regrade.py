@@ -0,0 +1,122 @@
+from typing import Iterator, NamedTuple
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from src.crud.question_bank import EXAM_BANK, TEST_BANK, BankSource
+from src.enums import LessonStatus
+from src.models import (
+    LessonOrm,
+    StudentCourseAssociation,
+    StudentExamAnswerOrm,
+    StudentExamAttemptsOrm,
+    StudentExamMatchingOrm,
+    StudentLessonOrm,
+    StudentTestAnswerOrm,
+    StudentTestAttemptsOrm,
+    StudentTestMatchingOrm,
+)
+
+
+class AttemptSource(NamedTuple):
+    bank: BankSource
+    attempt_model: type
+    answer_model: type
+    matching_model: type
+    owner_fk: str
+
+
+TEST_ATTEMPTS = AttemptSource(
+    bank=TEST_BANK,
+    attempt_model=StudentTestAttemptsOrm,
+    answer_model=StudentTestAnswerOrm,
+    matching_model=StudentTestMatchingOrm,
+    owner_fk="test_id"
+)
+EXAM_ATTEMPTS = AttemptSource(
+    bank=EXAM_BANK,
+    attempt_model=StudentExamAttemptsOrm,
+    answer_model=StudentExamAnswerOrm,
+    matching_model=StudentExamMatchingOrm,
+    owner_fk="exam_id"
+)
+
+
+class RegradeRepository:
+    def __init__(self, db: Session, source: AttemptSource):
+        self.db = db
+        self.source = source
+
+    def select_lesson(self, assessment_id: int):
+        model = self.source.bank.model
+        return (self.db.query(LessonOrm.id, LessonOrm.course_id)
+                .join(model, model.lesson_id == LessonOrm.id)
+                .filter(model.id == assessment_id)
+                .first())
+
+    def select_attempt_chunks(self, assessment_id: int, chunk_size: int) -> Iterator[list]:
+        """(id, student_id, attempt_score) of all attempts, chunk by chunk in id order."""
+        model = self.source.attempt_model
+        last_id = 0
+        while True:
+            chunk = (self.db.query(model.id, model.student_id, model.attempt_score)
+                     .filter(getattr(model, self.source.owner_fk) == assessment_id, model.id > last_id)
+                     .order_by(model.id)
+                     .limit(chunk_size)
+                     .all())
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].id
+
+    def select_answer_rows(self, attempt_ids: list[int]) -> list:
+        model = self.source.answer_model
+        return (self.db.query(model.id, model.student_attempt_id, model.question_id,
+                              model.answer_id, model.answer_ids, model.score)
+                .filter(model.student_attempt_id.in_(attempt_ids))
+                .all())
+
+    def select_matching_rows(self, attempt_ids: list[int]) -> list:
+        model = self.source.matching_model
+        return (self.db.query(model.id, model.student_attempt_id, model.question_id,
+                              model.left_id, model.right_id, model.score)
+                .filter(model.student_attempt_id.in_(attempt_ids))
+                .all())
+
+    def select_submitted_lessons(self, lesson_id: int, attempt_ids: list[int]) -> list:
+        """Student lessons whose submitted attempt is among attempt_ids."""
+        return (self.db.query(StudentLessonOrm.id, StudentLessonOrm.student_id,
+                              StudentLessonOrm.attempt, StudentLessonOrm.score)
+                .filter(StudentLessonOrm.lesson_id == lesson_id,
+                        StudentLessonOrm.status == LessonStatus.completed.value,
+                        StudentLessonOrm.attempt.in_(attempt_ids))
+                .all())
+
+    def update_scores(
+            self,
+            course_id: int,
+            attempts: list[dict],
+            answers: list[dict],
+            matching: list[dict],
+            student_lessons: list[dict],
+            grades: list[dict]
+    ) -> None:
+        """Writes one chunk of re-graded scores in a single transaction."""
+        for model, rows in ((self.source.attempt_model, attempts),
+                            (self.source.answer_model, answers),
+                            (self.source.matching_model, matching),
+                            (StudentLessonOrm, student_lessons)):
+            if rows:
+                self.db.execute(update(model), rows)
+
+        if grades:
+            # relative, so grades earned meanwhile in other lessons are kept
+            self.db.connection().execute(
+                update(StudentCourseAssociation)
+                .where(StudentCourseAssociation.student_id == bindparam("b_student_id"),
+                       StudentCourseAssociation.course_id == course_id)
+                .values(grade=func.least(200, func.greatest(0, StudentCourseAssociation.grade + bindparam("b_delta")))),
+                grades
+            )
+
+        self.db.commit()
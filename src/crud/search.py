@@ -0,0 +1,93 @@
+from typing import List
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import TS_CONFIG, CategoryOrm, CourseOrm, LectureAttributeOrm, LectureOrm, LessonOrm
+
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=24, MinWords=8, FragmentDelimiter=' … ', StartSel=<b>, StopSel=</b>"
+
+
+class AsyncSearchRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _search(self, model, title, text, columns: list, query: str, limit: int, *filters) -> List[dict]:
+        """
+        Ranked matches of query against model.search_vector, with a trigram fallback on title
+        for misspelled and partial words. Snippets are only built for the returned rows.
+        """
+        ts_query = func.websearch_to_tsquery(TS_CONFIG, query)
+        rank = (func.ts_rank_cd(model.search_vector, ts_query, 32) + func.word_similarity(query, title)).label("rank")
+        hits = (
+            select(model.id, title.label("title"), *columns, text.label("text"), rank)
+            .filter(model.search_vector.bool_op("@@")(ts_query) | title.bool_op("%>")(query), *filters)
+            .order_by(rank.desc(), model.id)
+            .limit(limit)
+            .subquery()
+        )
+
+        result = await self.db.execute(
+            select(
+                *[column for column in hits.c if column.key != "text"],
+                func.ts_headline(TS_CONFIG, hits.c.text, ts_query, HEADLINE_OPTIONS).label("snippet")
+            )
+            .order_by(hits.c.rank.desc(), hits.c.id)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    async def search_categories(self, query: str, limit: int) -> List[dict]:
+        return await self._search(
+            CategoryOrm,
+            CategoryOrm.title,
+            CategoryOrm.description,
+            [CategoryOrm.image_path],
+            query,
+            limit
+        )
+
+    async def search_courses(self, query: str, limit: int) -> List[dict]:
+        return await self._search(
+            CourseOrm,
+            CourseOrm.title,
+            func.concat_ws(" ", CourseOrm.intro_text, CourseOrm.about_text, CourseOrm.about_main_text),
+            [CourseOrm.image_path, CourseOrm.category_id, CourseOrm.price],
+            query,
+            limit,
+            CourseOrm.is_published
+        )
+
+    async def search_lessons(self, query: str, limit: int) -> List[dict]:
+        return await self._search(
+            LessonOrm,
+            LessonOrm.title,
+            LessonOrm.description,
+            [LessonOrm.type, LessonOrm.image_path, LessonOrm.course_id],
+            query,
+            limit,
+            LessonOrm.course.has(CourseOrm.is_published)
+        )
+
+    async def search_lectures(self, query: str, limit: int) -> List[dict]:
+        return await self._search(
+            LectureAttributeOrm,
+            LectureAttributeOrm.a_title,
+            LectureAttributeOrm.a_text,
+            [LectureOrm.id.label("lecture_id"), LessonOrm.id.label("lesson_id"), LessonOrm.course_id],
+            query,
+            limit,
+            LectureAttributeOrm.lecture_id == LectureOrm.id,
+            LectureOrm.lesson_id == LessonOrm.id,
+            LectureAttributeOrm.hidden.is_(False),
+            LessonOrm.course.has(CourseOrm.is_published)
+        )
+
+    async def select_suggest_titles(self) -> List[tuple[str, int, str]]:
+        """(kind, id, title) of every published category, course and lesson."""
+        result = await self.db.execute(union_all(
+            select(literal("category"), CategoryOrm.id, CategoryOrm.title).filter(CategoryOrm.is_published),
+            select(literal("course"), CourseOrm.id, CourseOrm.title).filter(CourseOrm.is_published),
+            select(literal("lesson"), LessonOrm.id, LessonOrm.title)
+            .filter(LessonOrm.course.has(CourseOrm.is_published))
+        ))
+        return [tuple(row) for row in result.all()]
@@ -1,34 +1,77 @@
-from sqlalchemy import func
+from psycopg2 import DataError
+from sqlalchemy import Integer, case, cast, column, func, literal_column, select, table, text, values
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, aliased
 
-from src.crud.student_lesson import select_student_lesson_db, create_student_lesson_db
 from src.enums import CourseStatus, LessonStatus, LessonType
-from src.models import CourseOrm, StudentCourseAssociation, CategoryOrm
-from src.crud.lesson import LessonRepository
-
-
-def select_student_course_info(db: Session, student_id: int, course: CourseOrm):
-    student_course = (db.query(StudentCourseAssociation.grade.label("grade"),
-                               StudentCourseAssociation.progress.label("progress"))
-                      .filter(StudentCourseAssociation.course_id == course.id,
-                              StudentCourseAssociation.student_id == student_id)
-                      .first())
-
-    if student_course is not None:
-        setattr(course, "bought", True)
-        setattr(course, "grade", student_course.grade)
-        setattr(course, "progress", student_course.progress)
-
-    return course
+from src.models import CourseOrm, LessonOrm, StudentCourseAssociation, StudentLessonOrm, StudentOrm
+from src.utils.exceptions import InvalidEnrollmentFileException
+
+
+async def select_student_courses_info(db: AsyncSession, student_id: int, courses: list[CourseOrm]):
+    """Overlays the student's purchase and lesson statuses on the courses in two queries."""
+    course_ids = [course.id for course in courses]
+    lessons = [lesson for course in courses for lesson in course.lessons]
+    if not course_ids:
+        return courses
+
+    result = await db.execute(
+        select(StudentCourseAssociation.course_id,
+               StudentCourseAssociation.grade,
+               StudentCourseAssociation.progress)
+        .filter(StudentCourseAssociation.student_id == student_id,
+                StudentCourseAssociation.course_id.in_(course_ids))
+    )
+    student_courses = {row.course_id: row for row in result.all()}
+
+    student_lessons = {}
+    if lessons:
+        result = await db.execute(
+            select(StudentLessonOrm.lesson_id, StudentLessonOrm.status, StudentLessonOrm.score)
+            .filter(StudentLessonOrm.student_id == student_id,
+                    StudentLessonOrm.lesson_id.in_([lesson.id for lesson in lessons]))
+        )
+        student_lessons = {row.lesson_id: row for row in result.all()}
+
+    for course in courses:
+        student_course = student_courses.get(course.id)
+        if student_course is not None:
+            setattr(course, "bought", True)
+            setattr(course, "grade", student_course.grade)
+            setattr(course, "progress", student_course.progress)
+
+    for lesson in lessons:
+        student_lesson = student_lessons.get(lesson.id)
+        if student_lesson is not None:
+            setattr(lesson, "status", student_lesson.status)
+            setattr(lesson, "score", student_lesson.score)
 
+    return courses
 
-def select_student_lesson_info(db: Session, course: CourseOrm, student_id: int):
-    for lesson in course.lessons:
-        student_lesson = select_student_lesson_db(db=db, student_id=student_id, lesson_id=lesson.id)
 
-        if student_lesson:
-            setattr(lesson, "status", student_lesson.status)
-            setattr(lesson, "score", student_lesson.score)
+async def select_student_state(db: AsyncSession, student_id: int):
+    """Digest of everything the per-student overlay shows, so overlaid responses can be given an ETag."""
+    course_state = (
+        select(func.md5(func.string_agg(
+            func.concat_ws(":", StudentCourseAssociation.course_id, StudentCourseAssociation.grade,
+                           StudentCourseAssociation.progress),
+            aggregate_order_by(literal_column("','"), StudentCourseAssociation.course_id)
+        )))
+        .filter(StudentCourseAssociation.student_id == student_id)
+        .scalar_subquery()
+    )
+    lesson_state = (
+        select(func.md5(func.string_agg(
+            func.concat_ws(":", StudentLessonOrm.lesson_id, StudentLessonOrm.status, StudentLessonOrm.score),
+            aggregate_order_by(literal_column("','"), StudentLessonOrm.lesson_id)
+        )))
+        .filter(StudentLessonOrm.student_id == student_id)
+        .scalar_subquery()
+    )
+    result = await db.execute(select(course_state, lesson_state))
+    return tuple(result.one())
 
 
 def subscribe_student_to_course_db(db: Session, student_id: int, course_id: int):
@@ -103,45 +146,107 @@ def check_bought_course(db: Session, student_id: int, courses_ids: list[int]):
     return True
 
 
-def create_student_lesson(
-        db: Session,
-        student_id: int,
-        course_id: int
-):
-    lesson_repo = LessonRepository(db=db)
-    lessons = lesson_repo.select_lessons_by_course_db(course_id=course_id)
-
-    for index, lesson in enumerate(lessons):
-        if lesson.number == 1:
-            create_student_lesson_db(
-                db=db,
-                student_id=student_id,
-                lesson_id=lesson.id,
-                status=LessonStatus.active
-            )
+def _new_lesson_statuses(course_ids):
+    """
+    Status of every lesson for a newly enrolled student, in one ordered pass per course:
+    the first lesson is active, tests and exams and everything after a test are blocked.
+    """
+    after_test = func.bool_or(LessonOrm.type == LessonType.test.value).over(
+        partition_by=LessonOrm.course_id,
+        order_by=(LessonOrm.number, LessonOrm.id),
+        rows=(None, -1)
+    )
+    status = case(
+        (LessonOrm.number == 1, LessonStatus.active.value),
+        (LessonOrm.type.in_((LessonType.test.value, LessonType.exam.value)), LessonStatus.blocked.value),
+        (after_test, LessonStatus.blocked.value),
+        else_=LessonStatus.available.value
+    )
+    return (select(LessonOrm.id.label("lesson_id"), LessonOrm.course_id,
+                   cast(status, StudentLessonOrm.status.type).label("status"))
+            .where(LessonOrm.course_id.in_(course_ids))
+            .subquery("new_lessons"))
+
+
+def _enrollments(student_id: int, course_ids: list[int]):
+    return (values(column("student_id", Integer), column("course_id", Integer), name="enrollments")
+            .data([(student_id, course_id) for course_id in dict.fromkeys(course_ids)]))
+
+
+def provision_enrollments(db: Session, enrollments) -> tuple[int, int]:
+    """
+    Subscribes every (student_id, course_id) row of enrollments and creates its student
+    lessons, one INSERT ... SELECT each. Existing subscriptions and lessons are kept as they are.
+    Returns the number of new subscriptions and lessons; the caller commits.
+    """
+    courses = db.execute(
+        pg_insert(StudentCourseAssociation)
+        .from_select(
+            ["student_id", "course_id", "status"],
+            select(enrollments.c.student_id, enrollments.c.course_id,
+                   cast(CourseStatus.in_progress.value, StudentCourseAssociation.status.type))
+        )
+        .on_conflict_do_nothing(index_elements=["student_id", "course_id"])
+    )
+
+    return courses.rowcount, _insert_student_lessons(db=db, enrollments=enrollments)
+
+
+def _insert_student_lessons(db: Session, enrollments) -> int:
+    lessons = _new_lesson_statuses(course_ids=select(enrollments.c.course_id))
+    result = db.execute(
+        pg_insert(StudentLessonOrm)
+        .from_select(
+            ["student_id", "lesson_id", "status"],
+            select(enrollments.c.student_id, lessons.c.lesson_id, lessons.c.status)
+            .join(lessons, lessons.c.course_id == enrollments.c.course_id)
+        )
+        .on_conflict_do_nothing(index_elements=["student_id", "lesson_id"])
+    )
+    return result.rowcount
+
+
+def enroll_student(db: Session, student_id: int, course_ids: list[int]):
+    """Subscribes the student to all bought courses in one transaction."""
+    if course_ids:
+        provision_enrollments(db=db, enrollments=_enrollments(student_id, course_ids))
+        db.commit()
 
-        elif lesson.type == LessonType.test.value or lesson.type == LessonType.exam.value:
-            create_student_lesson_db(
-                db=db,
-                student_id=student_id,
-                lesson_id=lesson.id,
-                status=LessonStatus.blocked
+
+def create_student_lesson(db: Session, student_id: int, course_id: int):
+    _insert_student_lessons(db=db, enrollments=_enrollments(student_id, [course_id]))
+    db.commit()
+
+
+def bulk_enroll_from_csv(db: Session, csv_file) -> tuple[int, int]:
+    """
+    Admin bulk enrollment from a student_id,course_id CSV with a header row. The file is
+    streamed into a temporary table with COPY; rows naming an unknown student or course are skipped.
+    """
+    db.execute(text(
+        "CREATE TEMPORARY TABLE enrollment_import (student_id integer, course_id integer) ON COMMIT DROP"
+    ))
+    try:
+        with db.connection().connection.cursor() as cursor:
+            cursor.copy_expert(
+                "COPY enrollment_import (student_id, course_id) FROM STDIN WITH (FORMAT csv, HEADER true)",
+                csv_file
             )
-        else:
-            if any(les.type == LessonType.test.value for les in lessons[:index]):
-                create_student_lesson_db(
-                    db=db,
-                    student_id=student_id,
-                    lesson_id=lesson.id,
-                    status=LessonStatus.blocked
-                )
-            else:
-                create_student_lesson_db(
-                    db=db,
-                    student_id=student_id,
-                    lesson_id=lesson.id,
-                    status=LessonStatus.available
-                )
+    except DataError:
+        db.rollback()
+        raise InvalidEnrollmentFileException()
+
+    imported = table("enrollment_import", column("student_id", Integer), column("course_id", Integer))
+    enrollments = (select(imported.c.student_id, imported.c.course_id)
+                   .distinct()
+                   .join(StudentOrm, StudentOrm.id == imported.c.student_id)
+                   .join(CourseOrm, CourseOrm.id == imported.c.course_id)
+                   .subquery("enrollments"))
+
+    counts = provision_enrollments(db=db, enrollments=enrollments)
+    db.commit()
+    return counts
+
 
 def check_competed_category(db: Session, student_id: int, category_id: int) -> bool:
     category_courses = (db.query(CourseOrm.id)
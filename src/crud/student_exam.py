@@ -1,8 +1,10 @@
-from typing import List, Optional, Union
+from typing import Optional
 
-from sqlalchemy import desc
+from sqlalchemy import cast, func, insert, select
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
+from src.crud.pagination import Page, PageParams, paginate, to_page
 from src.models import (
     StudentExamAnswerOrm,
     StudentExamAttemptsOrm,
@@ -23,53 +25,87 @@ class StudentExamRepository:
         self.attempt_model = StudentExamAttemptsOrm
         self.answer_model = StudentExamAnswerOrm
         self.matching_model = StudentExamMatchingOrm
+        # first advisory lock key, so test and exam attempt locks never share a key
+        self.lock_namespace = 2
 
-    def create_attempt(self, attempt_data: ExamNewAttempt) -> StudentExamAttemptsOrm:
-        new_attempt = self.attempt_model(**attempt_data.dict())
-        self.db.add(new_attempt)
-        self.db.commit()
-        self.db.refresh(new_attempt)
-        return new_attempt
+    def create_attempt(
+            self,
+            attempt_data: ExamNewAttempt,
+            answers: list[StudentAnswerDetail | StudentAnswersDetail],
+            matching: list[StudentMatchingDetail],
+            max_attempts: int,
+            idempotency_key: Optional[str] = None
+    ) -> Optional[Row]:
+        """
+        Writes the graded attempt with all its answers and matching pairs in one transaction.
+        The attempt number is allocated under the student's advisory lock, so concurrent
+        submissions never get the same number. None when no attempts are left.
+        """
+        student_id, exam_id = attempt_data.student_id, attempt_data.exam_id
+        self.db.execute(select(func.pg_advisory_xact_lock(self.lock_namespace, student_id)))
+
+        if idempotency_key:
+            attempt = self.select_attempt_by_idempotency_key(
+                exam_id=exam_id, student_id=student_id, idempotency_key=idempotency_key
+            )
+            if attempt is not None:
+                self.db.rollback()
+                return attempt
+
+        columns = self.attempt_model.__table__.columns
+        values = {**attempt_data.dict(exclude={"attempt_number"}), "idempotency_key": idempotency_key}
+        last_number = func.coalesce(func.max(self.attempt_model.attempt_number), 0)
+        attempt = self.db.execute(
+            insert(self.attempt_model)
+            .from_select(
+                ["attempt_number", *values],
+                select(last_number + 1, *(cast(value, columns[column].type) for column, value in values.items()))
+                .where(self.attempt_model.student_id == student_id, self.attempt_model.exam_id == exam_id)
+                .having(last_number < max_attempts)
+            )
+            .returning(*columns)
+        ).first()
+
+        if attempt is None:
+            self.db.rollback()
+            return None
+
+        if answers:
+            self.db.execute(insert(self.answer_model), [
+                {"answer_id": None, "answer_ids": None, **answer.dict(), "student_attempt_id": attempt.id}
+                for answer in answers
+            ])
+
+        if matching:
+            self.db.execute(insert(self.matching_model), [
+                {**match.dict(), "student_attempt_id": attempt.id} for match in matching
+            ])
 
-    def update_attempt_score(self, attempt_id: int, score: int) -> StudentExamAttemptsOrm:
-        attempt = self.select_attempt_by_id(attempt_id=attempt_id)
-        attempt.attempt_score = score
         self.db.commit()
-        self.db.refresh(attempt)
         return attempt
 
-    def select_student_attempts(self, exam_id: int, student_id: int) -> Union[List[StudentExamAttemptsOrm], None]:
-        res = (self.db.query(self.attempt_model)
-               .filter(self.attempt_model.student_id == student_id)
-               .filter(self.attempt_model.exam_id == exam_id)
-               .all())
+    def select_student_attempts(
+            self,
+            exam_id: int,
+            student_id: int,
+            page: Optional[PageParams] = None
+    ) -> Optional[Page]:
+        query = (self.db.query(self.attempt_model)
+                 .filter(self.attempt_model.student_id == student_id)
+                 .filter(self.attempt_model.exam_id == exam_id))
+        res = to_page(paginate(query, (self.attempt_model.id,), page).all(), (self.attempt_model.id,), page)
         return res if res else None
 
     def select_attempt_by_id(self, attempt_id: int) -> Optional[StudentExamAttemptsOrm]:
         return self.db.query(self.attempt_model).filter(self.attempt_model.id == attempt_id).first()
 
-    def select_last_attempt_number(self, exam_id: int, student_id: int) -> Optional[int]:
-        res = (self.db.query(self.attempt_model)
-               .filter(self.attempt_model.student_id == student_id)
-               .filter(self.attempt_model.exam_id == exam_id)
-               .order_by(desc(self.attempt_model.attempt_number))
-               .first())
-        return res.attempt_number if res else None
-
-    def create_student_answer(self, answer_data: StudentAnswerDetail) -> None:
-        new_answer = self.answer_model(**answer_data.dict())
-        self.db.add(new_answer)
-        self.db.commit()
-
-    def create_student_answers(self, answers_data: StudentAnswersDetail) -> None:
-        new_answers = self.answer_model(**answers_data.dict())
-        self.db.add(new_answers)
-        self.db.commit()
-
-    def create_student_matching(self, matching_data: StudentMatchingDetail) -> None:
-        new_matching = self.matching_model(**matching_data.dict())
-        self.db.add(new_matching)
-        self.db.commit()
+    def select_attempt_by_idempotency_key(self, exam_id: int, student_id: int, idempotency_key: str) -> Optional[Row]:
+        return self.db.execute(
+            select(*self.attempt_model.__table__.columns)
+            .where(self.attempt_model.student_id == student_id,
+                   self.attempt_model.exam_id == exam_id,
+                   self.attempt_model.idempotency_key == idempotency_key)
+        ).first()
 
     def select_student_exam_answers(self, attempt_id: int) -> list:
         answers = self.db.query(self.answer_model).filter(self.answer_model.student_attempt_id == attempt_id).all()
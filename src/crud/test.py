@@ -1,7 +1,8 @@
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from src.enums import LessonStatus, LessonType, QuestionTypeOption
+from src.crud.question_bank import TEST_BANK, QuestionBankRepository
+from src.enums import LessonType, QuestionTypeOption
 from src.models import (
     LessonOrm,
     StudentLessonOrm,
@@ -125,30 +126,6 @@ class TestRepository:
                 .filter(self.question_model.test_id == test_id)
                 .scalar())
 
-    def select_correct_answer(self, question_id: int):
-        return (self.db.query(self.answer_model.id)
-                .filter(self.answer_model.question_id == question_id)
-                .filter(self.answer_model.is_correct)
-                .scalar())
-
-    def select_correct_answers(self, question_id: int) -> list[int]:
-        answers_ids = (self.db.query(self.answer_model.id.label("id"))
-                       .filter(self.answer_model.question_id == question_id)
-                       .filter(self.answer_model.is_correct)
-                       .all())
-
-        answers = [answer.id for answer in answers_ids]
-        return answers
-
-    def select_count_correct_answers(self, question_id: int) -> int:
-        return (self.db.query(self.answer_model.id.label("id"))
-                .filter(self.answer_model.question_id == question_id)
-                .filter(self.answer_model.is_correct)
-                .count())
-
-    def select_correct_right_option(self, left_id: int) -> int:
-        return self.db.query(self.matching_left_model.right_id).filter(self.matching_left_model.id == left_id).scalar()
-
     def select_test_id(self, lesson_id: int) -> int:
         return self.db.query(self.model.id).filter(self.model.lesson_id == lesson_id).scalar()
 
@@ -279,96 +256,11 @@ class TestRepository:
             self.db.rollback()
 
     def select_test_data(self, lesson: LessonOrm, student_id: int = None):
-        test = self.db.query(TestOrm).filter(TestOrm.lesson_id == lesson.id).first()
-
-        if test:
-            test_questions = self.db.query(self.question_model).filter(self.question_model.test_id == test.id).all()
-            test_data = {"test_id": test.id, "score": test.score, "attempts": test.attempts, "questions": []}
-
-            if student_id:
-                student_test_info = (self.db.query(self.student_lesson_model)
-                                     .filter(self.student_lesson_model.lesson_id == lesson.id)
-                                     .filter(self.student_lesson_model.student_id == student_id)
-                                     .first())
-
-                if student_test_info.status == LessonStatus.completed.value:
-                    test_data["my_score"] = student_test_info.score
-                    test_data["my_attempt_id"] = student_test_info.attempt
-
-            for question in test_questions:
-
-                question_data = {
-                    "q_id": question.id,
-                    "q_text": question.q_text,
-                    "q_number": question.q_number,
-                    "q_score": question.q_score,
-                    "q_type": question.q_type,
-                    "hidden": question.hidden,
-                    "image_path": None,
-                    "answers": []
-                }
-
-                if question.q_type in [QuestionTypeOption.test.value, QuestionTypeOption.boolean.value]:
-                    answers = self.select_test_answers(question_id=question.id)
-
-                    for answer in answers:
-                        answer_data = {"a_id": answer.id, "a_text": answer.a_text, "is_correct": answer.is_correct}
-                        question_data["answers"].append(answer_data)
-
-                elif question.q_type == QuestionTypeOption.answer_with_photo.value:
-                    answers = self.select_test_answers(question_id=question.id)
-
-                    for answer in answers:
-                        answer_data = {"a_id": answer.id, "a_text": answer.a_text, "is_correct": answer.is_correct,
-                                       "image_path": answer.image_path}
-                        question_data["answers"].append(answer_data)
-
-                elif question.q_type == QuestionTypeOption.question_with_photo.value:
-                    question_data["image_path"] = question.image_path
-                    answers = self.select_test_answers(question_id=question.id)
-
-                    for answer in answers:
-                        answer_data = {"a_id": answer.id, "a_text": answer.a_text, "is_correct": answer.is_correct}
-                        question_data["answers"].append(answer_data)
-
-                elif question.q_type == QuestionTypeOption.multiple_choice.value:
-                    answers = self.select_test_answers(question_id=question.id)
-                    counter = 0
-
-                    for answer in answers:
-                        if answer.is_correct:
-                            counter += 1
-
-                        answer_data = {"a_id": answer.id, "a_text": answer.a_text, "is_correct": answer.is_correct}
-                        question_data["answers"].append(answer_data)
-                        question_data["count_correct"] = counter
-
-                else:
-                    left_options = (self.db.query(self.matching_left_model)
-                                    .filter(self.matching_left_model.question_id == question.id).all())
-
-                    right_options = (self.db.query(self.matching_right_model)
-                                     .filter(self.matching_right_model.question_id == question.id).all())
-
-                    question_data["answers"] = {
-                        "left": [
-                            {
-                                "value": left_option.text,
-                                "id": left_option.id
-                            } for left_option in left_options
-                        ],
-                        "right": [
-                            {
-                                "value": right_option.text,
-                                "id": right_option.id
-                            } for right_option in right_options
-                        ]
-                    }
-
-                test_data["questions"].append(question_data)
+        test_data = QuestionBankRepository(db=self.db, source=TEST_BANK).select_bank_data(
+            lesson_id=lesson.id,
+            student_id=student_id
+        )
 
+        if test_data:
             setattr(lesson, "test_data", test_data)
-            return lesson
-
-        else:
-            return lesson
+        return lesson
@@ -1,7 +1,8 @@
-from datetime import date, datetime
+from datetime import date
 
-from sqlalchemy import desc
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from src.enums import UserType
 from src.models import (
@@ -14,7 +15,7 @@ from src.models import (
     UserOrm,
 )
 from src.schemas.user import StudentCreate, StudentCreateViaGoogle, UserUpdate
-from src.utils.password import hash_password
+from src.utils.principal import invalidate_user_principals
 
 
 class UserRepository:
@@ -28,8 +29,7 @@ class UserRepository:
         self.reset_code_model = ResetPasswordLinkOrm
         self.course_model = StudentCourseAssociation
 
-    def create_admin(self, password: str, username: str):
-        hashed_pass = hash_password(password)
+    def create_admin(self, hashed_pass: str, username: str):
         new_user = self.model(
             usertype=UserType.moder,
             username=username,
@@ -41,8 +41,7 @@ class UserRepository:
         self.db.refresh(new_user)
         return new_user
 
-    def create_new_user(self, password: str, username: str):
-        hashed_pass = hash_password(password)
+    def create_new_user(self, hashed_pass: str, username: str):
         new_user = self.model(
             usertype=UserType.student,
             username=username,
@@ -58,19 +57,13 @@ class UserRepository:
     def create_new_user_with_google(
             self,
             username: str,
-            access_token: str,
-            refresh_token: str,
-            exp_token: datetime
+            hashed_pass: str
     ):
-        hashed_pass = hash_password(username)
         new_user = self.model(
             usertype=UserType.student,
             username=username,
             hashed_pass=hashed_pass,
             is_active=True,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            exp_token=exp_token,
             last_active=date.today()
         )
 
@@ -109,41 +102,28 @@ class UserRepository:
     def select_user_by_username(self, username: str):
         return self.db.query(self.model).filter(self.model.username == username).first()
 
+    def select_auth_user_by_username(self, username: str):
+        return (self.db.query(self.model)
+                .options(joinedload(self.model.student))
+                .filter(self.model.username == username)
+                .first())
+
     def select_activate_code(self, user_id: int):
         return self.db.query(self.activate_code_model.code).filter(self.activate_code_model.user_id == user_id).scalar()
 
-    def activate_user(self, user: UserOrm, access_token: str, refresh_token: str, exp_token: datetime):
+    def activate_user(self, user: UserOrm):
         user.is_active = True
-        user.access_token = access_token
-        user.refresh_token = refresh_token
-        user.exp_token = exp_token
-        user.last_active = date.today()
-
-        self.db.commit()
-        self.db.refresh(user)
-
-    def update_user_token(self, user: UserOrm, access_token: str, refresh_token: str, exp_token: datetime):
-        user.access_token = access_token
-        user.refresh_token = refresh_token
-        user.exp_token = exp_token
-        user.last_active = date.today()
-
-        self.db.commit()
-        self.db.refresh(user)
-
-    def user_logout_db(self, user: UserOrm):
-        user.access_token = None
-        user.refresh_token = None
-        user.exp_token = None
         user.last_active = date.today()
 
         self.db.commit()
         self.db.refresh(user)
+        invalidate_user_principals(user_id=user.id)
 
     def update_user_username_db(self, user: UserOrm, username: str):
         user.username = username
         self.db.commit()
         self.db.refresh(user)
+        invalidate_user_principals(user_id=user.id)
 
     def select_student_by_email(self, email: str):
         return self.db.query(self.student_model).filter(self.student_model.email == email).first()
@@ -201,13 +181,13 @@ class UserRepository:
             self.db.commit()
             self.db.refresh(image)
 
-    def update_user_password(self, user: UserOrm, password: str):
-        hashed_pass = hash_password(password)
+    def update_user_password(self, user: UserOrm, hashed_pass: str):
         user.hashed_pass = hashed_pass
         user.last_active = date.today()
 
         self.db.commit()
         self.db.refresh(user)
+        invalidate_user_principals(user_id=user.id)
 
     def create_student_image_db(self, user_id: int, image_path: str):
         new_image = self.image_model(
@@ -267,3 +247,17 @@ class UserRepository:
 
     def select_student_name_by_id(self, student_id: int):
         return self.db.query(self.student_model).filter(self.student_model.id == student_id).first()
+
+
+class AsyncUserRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.model = UserOrm
+
+    async def select_user_by_username(self, username: str):
+        result = await self.db.execute(
+            select(self.model)
+            .filter(self.model.username == username)
+            .options(selectinload(self.model.student))
+        )
+        return result.scalars().first()
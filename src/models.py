@@ -5,12 +5,18 @@ from sqlalchemy import (
     ARRAY,
     CheckConstraint,
     Column,
+    Computed,
     Date,
     DateTime,
+    FetchedValue,
     ForeignKey,
+    Index,
     Integer,
     String,
+    func,
+    text,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -44,6 +50,22 @@ class Base(DeclarativeBase):
 
 
 intpk = Annotated[int, mapped_column(primary_key=True, index=True)]
+# bumped by database triggers on every change of the row or of the content nested under it
+content_version = Annotated[int, mapped_column(server_default=text("1"), server_onupdate=FetchedValue())]
+content_updated_at = Annotated[
+    datetime, mapped_column(DateTime, server_default=func.now(), server_onupdate=FetchedValue())
+]
+
+TS_CONFIG = "english"
+
+
+def search_vector(*weighted_columns: tuple[str, str]):
+    """Stored tsvector of (column, weight) pairs, kept up to date by Postgres itself."""
+    expression = " || ".join(
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    )
+    return mapped_column(TSVECTOR, Computed(expression, persisted=True), deferred=True)
 
 
 class UserOrm(Base):
@@ -166,6 +188,10 @@ class StudentNotification(Base):
 
     student: Mapped["StudentOrm"] = relationship(back_populates="notifications")
 
+    __table_args__ = (
+        Index("ix_student_notifications_student_id_id", "student_id", "id"),
+    )
+
 
 class StudentCourseAssociation(Base):
     __tablename__ = "student_course_association"
@@ -175,10 +201,12 @@ class StudentCourseAssociation(Base):
     grade: Mapped[int] = mapped_column(default=0)
     progress: Mapped[int] = mapped_column(default=0)
     status: Mapped[CourseStatus]
+    enrolled_at: Mapped[Optional[datetime]] = mapped_column(server_default=func.now())
 
     __table_args__ = (
         CheckConstraint("progress <= 100", name="progress_less_then_100_present"),
-        CheckConstraint("grade <= 200", name="grade_less_then_200")
+        CheckConstraint("grade <= 200", name="grade_less_then_200"),
+        Index("ix_student_course_association_enrolled_at_course_id", "enrolled_at", "course_id"),
     )
 
 
@@ -195,6 +223,10 @@ class StudentLessonOrm(Base):
     student: Mapped["StudentOrm"] = relationship(back_populates="student_lesson")
     lesson: Mapped["LessonOrm"] = relationship(back_populates="student_lesson")
 
+    __table_args__ = (
+        Index("uq_student_lessons_student_id_lesson_id", "student_id", "lesson_id", unique=True),
+    )
+
 
 class StudentTestAttemptsOrm(Base):
     __tablename__ = "student_test_attempts"
@@ -202,6 +234,7 @@ class StudentTestAttemptsOrm(Base):
     id: Mapped[intpk]
     attempt_number: Mapped[int]
     attempt_score: Mapped[Optional[int]]
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(64))
     test_id: Mapped[int] = mapped_column(ForeignKey("tests.id"))
     student_id: Mapped[int] = mapped_column(ForeignKey("students.id"))
 
@@ -211,6 +244,13 @@ class StudentTestAttemptsOrm(Base):
     student_test_answers: Mapped[list["StudentTestAnswerOrm"]] = relationship(back_populates="student_attempt")
     student_test_matching: Mapped[list["StudentTestMatchingOrm"]] = relationship(back_populates="student_attempt")
 
+    __table_args__ = (
+        Index("uq_student_test_attempts_student_id_test_id_attempt", "student_id", "test_id", "attempt_number",
+              unique=True),
+        Index("uq_student_test_attempts_student_id_test_id_idempotency_key", "student_id", "test_id", "idempotency_key",
+              unique=True, postgresql_where=text("idempotency_key IS NOT NULL")),
+    )
+
 
 class StudentTestAnswerOrm(Base):
     __tablename__ = "student_test_answers"
@@ -252,6 +292,7 @@ class StudentExamAttemptsOrm(Base):
     attempt_number: Mapped[int]
     attempt_score: Mapped[Optional[int]]
     spent_minutes: Mapped[Optional[int]]
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(64))
     exam_id: Mapped[int] = mapped_column(ForeignKey("exams.id"))
     student_id: Mapped[int] = mapped_column(ForeignKey("students.id"))
 
@@ -261,6 +302,13 @@ class StudentExamAttemptsOrm(Base):
     student_exam_answers: Mapped[list["StudentExamAnswerOrm"]] = relationship(back_populates="student_attempt")
     student_exam_matching: Mapped[list["StudentExamMatchingOrm"]] = relationship(back_populates="student_attempt")
 
+    __table_args__ = (
+        Index("uq_student_exam_attempts_student_id_exam_id_attempt", "student_id", "exam_id", "attempt_number",
+              unique=True),
+        Index("uq_student_exam_attempts_student_id_exam_id_idempotency_key", "student_id", "exam_id", "idempotency_key",
+              unique=True, postgresql_where=text("idempotency_key IS NOT NULL")),
+    )
+
 
 class StudentExamAnswerOrm(Base):
     __tablename__ = "student_exam_answers"
@@ -328,11 +376,19 @@ class CategoryOrm(Base):
     is_published: Mapped[bool] = mapped_column(default=False, nullable=True)
     timestamp_add: Mapped[datetime] = mapped_column(nullable=True)
     timestamp_change: Mapped[datetime] = mapped_column(nullable=True)
+    version: Mapped[content_version]
+    updated_at: Mapped[content_updated_at]
+    search_vector: Mapped[Optional[str]] = search_vector(("title", "A"), ("description", "B"))
 
     courses: Mapped[list["CourseOrm"]] = relationship(back_populates="category")
     instruction: Mapped["InstructionOrm"] = relationship(back_populates="category")
     certificates: Mapped[list["CategoryCertificateOrm"]] = relationship(back_populates="category")
 
+    __table_args__ = (
+        Index("ix_categories_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_categories_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
 
 class StripeCourseOrm(Base):
     __tablename__ = "stripe_courses"
@@ -344,6 +400,10 @@ class StripeCourseOrm(Base):
 
     course: Mapped["CourseOrm"] = relationship(back_populates="stripe_data", uselist=False)
 
+    __table_args__ = (
+        Index("ix_stripe_courses_course_id", "course_id"),
+    )
+
 
 class CourseOrm(Base):
     __tablename__ = "courses"
@@ -372,6 +432,13 @@ class CourseOrm(Base):
     program_text: Mapped[str] = mapped_column(nullable=True)
 
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"))
+    version: Mapped[content_version]
+    updated_at: Mapped[content_updated_at]
+    # maintained by a trigger on student_course_association
+    purchase_count: Mapped[int] = mapped_column(server_default=text("0"), index=True)
+    search_vector: Mapped[Optional[str]] = search_vector(
+        ("title", "A"), ("intro_text", "B"), ("about_text", "C"), ("about_main_text", "C")
+    )
 
     category: Mapped["CategoryOrm"] = relationship(back_populates="courses", uselist=True)
 
@@ -389,6 +456,11 @@ class CourseOrm(Base):
     def total_quantity(self):
         return self.quantity_lecture + self.quantity_test
 
+    __table_args__ = (
+        Index("ix_courses_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_courses_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
 
 class CourseIconOrm(Base):
     __tablename__ = "course_icons"
@@ -415,6 +487,9 @@ class LessonOrm(Base):
     scheduled_time: Mapped[Optional[int]]
     image_path: Mapped[Optional[str]]
     course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"))
+    version: Mapped[content_version]
+    updated_at: Mapped[content_updated_at]
+    search_vector: Mapped[Optional[str]] = search_vector(("title", "A"), ("description", "B"))
 
     course: Mapped["CourseOrm"] = relationship(back_populates="lessons")
     lecture: Mapped["LectureOrm"] = relationship(back_populates="lesson")
@@ -422,6 +497,12 @@ class LessonOrm(Base):
     exam: Mapped["ExamOrm"] = relationship(back_populates="lesson")
     student_lesson: Mapped["StudentLessonOrm"] = relationship(back_populates="lesson")
 
+    __table_args__ = (
+        Index("ix_lessons_course_id_number", "course_id", "number"),
+        Index("ix_lessons_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_lessons_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
 
 class LectureOrm(Base):
     __tablename__ = "lectures"
@@ -429,6 +510,8 @@ class LectureOrm(Base):
     id: Mapped[intpk]
     audios = Column(ARRAY(String), nullable=True)
     lesson_id: Mapped[int] = mapped_column(ForeignKey("lessons.id"))
+    version: Mapped[content_version]
+    updated_at: Mapped[content_updated_at]
     lesson: Mapped["LessonOrm"] = relationship(back_populates="lecture")
 
     lecture_attributes: Mapped[list["LectureAttributeOrm"]] = relationship(back_populates="lecture")
@@ -445,6 +528,9 @@ class LectureAttributeOrm(Base):
     a_text: Mapped[Optional[str]]
     hidden: Mapped[bool] = mapped_column(default=False)
     lecture_id: Mapped[int] = mapped_column(ForeignKey("lectures.id"))
+    version: Mapped[content_version]
+    updated_at: Mapped[content_updated_at]
+    search_vector: Mapped[Optional[str]] = search_vector(("a_title", "A"), ("a_text", "B"))
 
     lecture: Mapped["LectureOrm"] = relationship(back_populates="lecture_attributes")
     files: Mapped[list["LectureFilesOrm"]] = relationship(back_populates="attribute")
@@ -452,6 +538,13 @@ class LectureAttributeOrm(Base):
 
     __table_args__ = (
         CheckConstraint("a_number > 0", name="check_a_number_positive"),
+        Index("ix_lecture_attributes_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_lecture_attributes_a_title_trgm",
+            "a_title",
+            postgresql_using="gin",
+            postgresql_ops={"a_title": "gin_trgm_ops"}
+        ),
     )
 
 
@@ -486,6 +579,8 @@ class TestOrm(Base):
     id: Mapped[intpk]
     score: Mapped[int] = mapped_column(default=40)
     attempts: Mapped[int] = mapped_column(default=10)
+    version: Mapped[content_version]
+    updated_at: Mapped[content_updated_at]
     lesson_id: Mapped[int] = mapped_column(ForeignKey("lessons.id"))
 
     lesson: Mapped["LessonOrm"] = relationship(back_populates="test")
@@ -536,6 +631,10 @@ class TestAnswerOrm(Base):
 
     question: Mapped["TestQuestionOrm"] = relationship(back_populates="answers")
 
+    __table_args__ = (
+        Index("ix_test_answers_question_id_is_correct", "question_id", "is_correct"),
+    )
+
 
 class TestMatchingRightOrm(Base):
     __tablename__ = "test_matching_right"
@@ -571,6 +670,8 @@ class ExamOrm(Base):
     attempts: Mapped[int] = mapped_column(default=10)
     timer: Mapped[int]
     lesson_id: Mapped[int] = mapped_column(ForeignKey("lessons.id"))
+    version: Mapped[content_version]
+    updated_at: Mapped[content_updated_at]
 
     lesson: Mapped["LessonOrm"] = relationship(back_populates="exam")
     exam_questions: Mapped[list["ExamQuestionOrm"]] = relationship(back_populates="exam")
@@ -620,6 +721,10 @@ class ExamAnswerOrm(Base):
 
     question: Mapped["ExamQuestionOrm"] = relationship(back_populates="answers")
 
+    __table_args__ = (
+        Index("ix_exam_answers_question_id_is_correct", "question_id", "is_correct"),
+    )
+
 
 class ExamMatchingRightOrm(Base):
     __tablename__ = "exam_matching_right"
@@ -757,6 +862,11 @@ class ChatMessageOrm(Base):
     recipient: Mapped["UserOrm"] = relationship(foreign_keys=[recipient_id], back_populates="received_messages")
     files: Mapped[list["MessageFilesOrm"]] = relationship(back_populates="message")
 
+    __table_args__ = (
+        Index("ix_chat_messages_chat_id_timestamp_id", "chat_id", "timestamp", "id"),
+        Index("ix_chat_messages_recipient_id_chat_id", "recipient_id", "chat_id"),
+    )
+
 
 class MessageFilesOrm(Base):
     __tablename__ = "message_files"
@@ -108,6 +108,11 @@ class AttachedIconResponse(BaseModel):
     message: str = "Successful attached"
 
 
+class BulkEnrollResponse(BaseModel):
+    enrolled_courses: int
+    created_lessons: int
+
+
 class ExamInfoModel(BaseModel):
     exam_id: int
     exam_score: int
@@ -140,6 +145,31 @@ class CourseDetailResponse(CourseResponse):
         return super().model_dump(exclude_none=True)
 
 
+class CourseCardResponse(BaseModel):
+    """Fields a course card shows; fields=card on the course endpoints returns only these."""
+    id: PositiveInt
+    title: str
+    image_path: Optional[str] = None
+    price: float
+    old_price: Optional[float] = None
+    category_id: PositiveInt
+    c_type: str
+    c_duration: str
+    c_award: str
+    c_language: str
+    c_level: str
+    c_access: str
+    quantity_lecture: Optional[PositiveInt] = None
+    quantity_test: Optional[PositiveInt] = None
+    is_published: bool
+
+    bought: Optional[bool] = None
+    grade: Optional[int] = None
+    progress: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class CourseCart(BaseModel):
     student_id: int
     payment_items: list[int]
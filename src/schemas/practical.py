@@ -207,3 +207,33 @@ class UpdateMessageResponse(BaseModel):
 
 class DeleteMessageResponse(BaseModel):
     message: str = "Successfully deleted"
+
+
+class RegradeStartedResponse(BaseModel):
+    message: str = "Regrade started"
+
+
+class AttemptScoreChange(BaseModel):
+    attempt_id: PositiveInt
+    student_id: PositiveInt
+    old_score: Optional[int] = None
+    new_score: int
+
+
+class RegradeReport(BaseModel):
+    version: int
+    dry_run: bool
+    attempts: int
+    changed_attempts: int
+    changed_lessons: int
+    truncated: bool
+    seconds: float
+    changes: List[AttemptScoreChange]
+
+
+class TestRegradeReport(RegradeReport):
+    test_id: PositiveInt
+
+
+class ExamRegradeReport(RegradeReport):
+    exam_id: PositiveInt
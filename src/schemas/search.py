@@ -0,0 +1,47 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from src.enums import LessonType
+
+
+class SearchHit(BaseModel):
+    id: int
+    title: str
+    rank: float
+    snippet: Optional[str] = None
+
+
+class CategorySearchHit(SearchHit):
+    image_path: Optional[str] = None
+
+
+class CourseSearchHit(SearchHit):
+    image_path: Optional[str] = None
+    category_id: int
+    price: Optional[float] = None
+
+
+class LessonSearchHit(SearchHit):
+    type: LessonType
+    image_path: Optional[str] = None
+    course_id: int
+
+
+class LectureSearchHit(SearchHit):
+    lecture_id: int
+    lesson_id: int
+    course_id: int
+
+
+class SearchResponse(BaseModel):
+    categories: list[CategorySearchHit]
+    courses: list[CourseSearchHit]
+    lessons: list[LessonSearchHit]
+    lectures: list[LectureSearchHit]
+
+
+class Suggestion(BaseModel):
+    kind: Literal["category", "course", "lesson"]
+    id: int
+    title: str
@@ -43,7 +43,7 @@ class SubmitStudentPractical(BaseModel):
 
 
 class NewAttempt(BaseModel):
-    attempt_number: PositiveInt
+    attempt_number: Optional[PositiveInt] = None
     attempt_score: Optional[int] = None
     student_id: PositiveInt
 
@@ -61,7 +61,7 @@ class StudentAnswerBase(BaseModel):
     score: int | float
     question_id: PositiveInt
     question_type: QuestionTypeOption
-    student_attempt_id: PositiveInt
+    student_attempt_id: Optional[PositiveInt] = None
 
 
 class StudentAnswerDetail(StudentAnswerBase):
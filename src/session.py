@@ -1,15 +1,127 @@
 import logging
+import random
+import time
+from uuid import uuid4
 
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import Delete, Insert, Update, create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
-from src.config import DATABASE_URL
+from src.config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_NULL_POOL,
+    DB_POOL_RECYCLE,
+    DB_POOLS,
+    PGBOUNCER_MODE,
+    REPLICA_ASYNC_DATABASE_URLS,
+    REPLICA_DATABASE_URLS,
+)
+from src.utils.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, register_engine
+from src.utils.query_counter import install_query_counter
+from src.utils.response_cache import install_cache_invalidation
+from src.utils.slow_query import install_slow_query_log
 
 logging.basicConfig()
-logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
 
-engine = create_engine(url=DATABASE_URL, echo=False, pool_size=20, max_overflow=30)
-SessionLocal = sessionmaker(bind=engine, class_=Session, autocommit=False, autoflush=False)
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
+
+def engine_options(role: str, is_async: bool = False) -> dict:
+    options = {"echo": False}
+
+    if DB_NULL_POOL:
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            pool_recycle=DB_POOL_RECYCLE,
+            **DB_POOLS[role]
+        )
+
+    # PgBouncer in transaction mode can't keep server-side prepared statements between transactions
+    if PGBOUNCER_MODE and is_async:
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    return options
+
+
+def build_engine(url: str, role: str, metrics_name: str, read_only: bool = False):
+    new_engine = create_engine(url=url, **engine_options(role))
+    register_engine(metrics_name, new_engine)
+    install_query_counter(new_engine)
+    install_slow_query_log(new_engine)
+    return new_engine.execution_options(postgresql_readonly=True) if read_only else new_engine
+
+
+def build_async_engine(url: str, role: str, metrics_name: str, read_only: bool = False):
+    new_engine = create_async_engine(url=url, **engine_options(role, is_async=True))
+    register_engine(metrics_name, new_engine.sync_engine)
+    install_query_counter(new_engine.sync_engine)
+    install_slow_query_log(new_engine.sync_engine)
+    return new_engine.execution_options(postgresql_readonly=True) if read_only else new_engine
+
+
+engine = build_engine(DATABASE_URL, role="api", metrics_name="api")
+async_engine = build_async_engine(ASYNC_DATABASE_URL, role="api", metrics_name="api_async")
+celery_engine = build_engine(DATABASE_URL, role="celery", metrics_name="celery")
+
+replica_engines = [
+    build_engine(url, role="api", metrics_name=f"api_replica_{index}", read_only=True)
+    for index, url in enumerate(REPLICA_DATABASE_URLS)
+]
+async_replica_engines = [
+    build_async_engine(url, role="api", metrics_name=f"api_async_replica_{index}", read_only=True)
+    for index, url in enumerate(REPLICA_ASYNC_DATABASE_URLS)
+]
+
+
+class RoutingSession(Session):
+    """
+    Sends reads to a replica when the session was opened as read-only
+    (session.info["replica"] is True). Any flush or DML pins the session to
+    the primary for the rest of its life, so it always reads its own writes.
+    """
+    primary = engine
+    replicas = replica_engines
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["replica"] = False
+
+        if self.info.get("replica") and self.replicas:
+            if "replica_bind" not in self.info:
+                self.info["replica_bind"] = random.choice(self.replicas)
+            return self.info["replica_bind"]
+
+        return self.primary
+
+
+class AsyncRoutingSession(RoutingSession):
+    primary = async_engine.sync_engine
+    replicas = [replica.sync_engine for replica in async_replica_engines]
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False
+)
+CelerySessionLocal = sessionmaker(bind=celery_engine, class_=Session, autocommit=False, autoflush=False)
+
+install_cache_invalidation(Session)
+
+
+def use_replica(request: Request) -> bool:
+    primary_until = request.cookies.get(PRIMARY_STICKY_COOKIE)
+    if primary_until and primary_until.isdigit() and int(primary_until) > time.time():
+        return False
+    return True
 
 
 def get_db() -> Session:
@@ -18,3 +130,21 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request) -> Session:
+    db = SessionLocal(info={"replica": use_replica(request)})
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request) -> AsyncSession:
+    async with AsyncSessionLocal(info={"replica": use_replica(request)}) as db:
+        yield db
@@ -0,0 +1,109 @@
+import logging
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+import orjson
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from src.config import ANSWER_KEY_CACHE_TTL
+from src.crud.question_bank import BankSource, QuestionBank, QuestionBankRepository
+from src.utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class KeyQuestion(NamedTuple):
+    score: int
+    correct: frozenset[int]
+    matches: Mapping[int, int]
+
+
+class AnswerKey(NamedTuple):
+    """Everything grading needs from a test or exam, compiled from its question bank."""
+    id: int
+    version: int
+    attempts: int
+    questions: Mapping[int, KeyQuestion]
+
+    def question(self, question_id: int) -> Optional[KeyQuestion]:
+        return self.questions.get(question_id)
+
+    def dumps(self) -> bytes:
+        return orjson.dumps({
+            "id": self.id,
+            "version": self.version,
+            "attempts": self.attempts,
+            "questions": [
+                [question_id, question.score, sorted(question.correct), list(question.matches.items())]
+                for question_id, question in self.questions.items()
+            ]
+        })
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "AnswerKey":
+        data = orjson.loads(raw)
+        return cls(
+            id=data["id"],
+            version=data["version"],
+            attempts=data["attempts"],
+            questions=MappingProxyType({
+                question_id: KeyQuestion(score, frozenset(correct), MappingProxyType(dict(matches)))
+                for question_id, score, correct, matches in data["questions"]
+            })
+        )
+
+
+def compile_answer_key(bank: QuestionBank) -> AnswerKey:
+    return AnswerKey(
+        id=bank.id,
+        version=bank.version,
+        attempts=dict(bank.settings)["attempts"],
+        questions=MappingProxyType({
+            question.id: KeyQuestion(
+                score=question.score,
+                correct=frozenset(answer.id for answer in question.answers if answer.is_correct),
+                matches=MappingProxyType({option.id: option.right_id for option in question.left})
+            )
+            for question in bank.questions
+        })
+    )
+
+
+def _key(source: BankSource, lesson_id: int, version: int) -> str:
+    return f"answer-key:{source.name}:{lesson_id}:{version}"
+
+
+def _compile(db: Session, source: BankSource, lesson_id: int) -> Optional[AnswerKey]:
+    bank = QuestionBankRepository(db=db, source=source).select_bank(lesson_id=lesson_id)
+    return compile_answer_key(bank) if bank is not None else None
+
+
+def select_answer_key(db: Session, source: BankSource, lesson_id: int) -> Optional[AnswerKey]:
+    """
+    The answer key of the lesson's test or exam, cached in Redis per content version.
+    The triggers bump the version on any change of its questions, answers or options,
+    so a key compiled before a commit is never read after it and just expires.
+    """
+    version = db.query(source.model.version).filter(source.model.lesson_id == lesson_id).scalar()
+    if version is None:
+        return None
+
+    try:
+        raw = redis_client.get(_key(source, lesson_id, version))
+        if raw is not None:
+            return AnswerKey.loads(raw)
+    except RedisError as e:
+        logger.warning(f"Answer key cache unavailable: {e}")
+        return _compile(db, source, lesson_id)
+
+    answer_key = _compile(db, source, lesson_id)
+    if answer_key is None:
+        return None
+
+    try:
+        redis_client.set(_key(source, lesson_id, answer_key.version), answer_key.dumps(), ex=ANSWER_KEY_CACHE_TTL)
+    except RedisError as e:
+        logger.warning(f"Answer key for {source.name} lesson {lesson_id} was not cached: {e}")
+
+    return answer_key
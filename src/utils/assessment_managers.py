@@ -1,11 +1,14 @@
+from typing import Optional
+
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
 from src.crud.exam import ExamRepository
+from src.crud.question_bank import EXAM_BANK, TEST_BANK
 from src.crud.student_exam import StudentExamRepository
 from src.crud.student_test import StudentTestRepository
 from src.crud.test import TestRepository
 from src.enums import QuestionTypeOption
-from src.models import StudentExamAttemptsOrm, StudentTestAttemptsOrm
 from src.schemas.student_practical import (
     ExamNewAttempt,
     StudentAnswer,
@@ -17,20 +20,23 @@ from src.schemas.student_practical import (
     StudentPractical,
     TestNewAttempt,
 )
-from src.utils.exceptions import MaxAttemptException
+from src.utils.answer_key import AnswerKey, select_answer_key
+from src.utils.exceptions import AssessmentNotFoundException, MaxAttemptException
 
 
 class AssessmentManager:
     _repository = None
     _student_repository = None
+    _answer_key = None
 
-    def __init__(self, student_id: int, data: StudentPractical, db: Session):
+    def __init__(self, student_id: int, data: StudentPractical, db: Session, idempotency_key: Optional[str] = None):
         self._lesson_id = data.lesson_id
         self._answers = data.student_answers
         self._db = db
         self._student_id = student_id
         self._final_score = 0
         self._spent_minutes = getattr(data, 'spent_minutes', None)
+        self._idempotency_key = idempotency_key
         self._assessment_id = self.get_assessment_id()
 
     @property
@@ -45,7 +51,18 @@ class AssessmentManager:
             self._student_repository = self.get_student_repository()
         return self._student_repository
 
-    def get_assessment_id(self):
+    @property
+    def answer_key(self) -> AnswerKey:
+        if self._answer_key is None:
+            self._answer_key = self.get_answer_key()
+            if self._answer_key is None:
+                raise AssessmentNotFoundException()
+        return self._answer_key
+
+    def get_assessment_id(self) -> int:
+        return self.answer_key.id
+
+    def get_answer_key(self) -> AnswerKey | None:
         raise NotImplementedError("This method should be implemented in subclasses")
 
     def get_repository(self):
@@ -54,66 +71,76 @@ class AssessmentManager:
     def get_student_repository(self):
         raise NotImplementedError("This method should be implemented in subclasses")
 
-    def get_attempt_number(self) -> int:
+    def select_submitted_attempt(self) -> Row | None:
         raise NotImplementedError("This method should be implemented in subclasses")
 
-    def format_attempt_data(self, number: int):
+    def format_attempt_data(self):
         raise NotImplementedError("This method should be implemented in subclasses")
 
-    def update_attempt_score(self, attempt_id: int):
-        raise NotImplementedError("This method should be implemented in subclasses")
+    def start_inspect(self) -> Row:
+        if self._idempotency_key:
+            # a retried submission gets back the attempt it already created
+            attempt = self.select_submitted_attempt()
+            if attempt is not None:
+                return attempt
 
-    def start_inspect(self) -> StudentExamAttemptsOrm | StudentTestAttemptsOrm:
-        attempt_number = self.get_attempt_number()
-        new_attempt_id = self.create_new_attempt(attempt_number)
+        answers, matching = [], []
 
         for answer in self._answers:
             if answer.q_type == QuestionTypeOption.matching.value:
                 question_score = self.inspect_match_question(q_id=answer.q_id, student_matching=answer.matching)
                 self._final_score += question_score
-                self.create_student_matching(
-                    new_attempt_id=new_attempt_id, question_score=question_score, answer=answer
-                )
+                matching.extend(self.format_student_matching(question_score=question_score, answer=answer))
 
             elif answer.q_type == QuestionTypeOption.multiple_choice.value:
                 question_score = self.inspect_multiple_question(q_id=answer.q_id, a_ids=answer.a_ids)
                 self._final_score += question_score
-                self.create_student_answers(
-                    new_attempt_id=new_attempt_id, question_score=question_score, answer=answer
-                )
+                answers.append(self.format_student_answers(question_score=question_score, answer=answer))
 
             else:
                 question_score = self.inspect_classic_question(q_id=answer.q_id, a_id=answer.a_id)
                 self._final_score += question_score
-                self.create_student_answer(
-                    new_attempt_id=new_attempt_id, question_score=question_score, answer=answer
-                )
+                answers.append(self.format_student_answer(question_score=question_score, answer=answer))
+
+        # graded in memory first, so the attempt is written with its final score in one transaction
+        attempt = self.student_repository.create_attempt(
+            attempt_data=self.format_attempt_data(),
+            answers=answers,
+            matching=matching,
+            max_attempts=self.answer_key.attempts,
+            idempotency_key=self._idempotency_key
+        )
+        if attempt is None:
+            raise MaxAttemptException()
 
-        attempt = self.update_attempt_score(attempt_id=new_attempt_id)
         return attempt
 
     def inspect_match_question(self, q_id: int, student_matching: list) -> int:
-        question = self.repository.select_question(question_id=q_id)
+        question = self.answer_key.question(q_id)
+        if question is None:
+            return 0
+
         total_score = 0
-        score_for_match = question.q_score / 4
+        score_for_match = question.score / 4
 
         for match in student_matching:
-            correct_right = self.repository.select_correct_right_option(left_id=match.left_id)
-            if match.right_id == correct_right:
+            if match.right_id == question.matches.get(match.left_id):
                 total_score += score_for_match
 
         return round(total_score)
 
     def inspect_multiple_question(self, q_id: int, a_ids: list[int]) -> int:
-        question = self.repository.select_question(question_id=q_id)
-        count_correct = self.repository.select_count_correct_answers(question_id=question.id)
-        correct_answers_ids = self.repository.select_correct_answers(question_id=question.id)
-        score_for_correct = question.q_score / count_correct
+        question = self.answer_key.question(q_id)
+        if question is None or not question.correct:
+            return 0
+
+        count_correct = len(question.correct)
+        score_for_correct = question.score / count_correct
         count_student_answer = len(a_ids)
         total_score = 0
 
         for a_id in a_ids:
-            if a_id in correct_answers_ids:
+            if a_id in question.correct:
                 total_score += score_for_correct
 
         if count_student_answer > count_correct:
@@ -124,53 +151,48 @@ class AssessmentManager:
         return round(total_score)
 
     def inspect_classic_question(self, q_id: int, a_id: int) -> int:
-        question = self.repository.select_question(question_id=q_id)
-        answer_id = self.repository.select_correct_answer(question_id=question.id)
-        if answer_id != a_id:
+        question = self.answer_key.question(q_id)
+        if question is None or a_id not in question.correct:
             return 0
         else:
-            return question.q_score
+            return question.score
 
-    def create_student_answer(self, new_attempt_id: int, question_score: int, answer: StudentAnswer) -> None:
-        answer_to_db = StudentAnswerDetail(
+    @staticmethod
+    def format_student_answer(question_score: int, answer: StudentAnswer) -> StudentAnswerDetail:
+        return StudentAnswerDetail(
             score=question_score,
             question_id=answer.q_id,
             question_type=answer.q_type,
-            student_attempt_id=new_attempt_id,
             answer_id=answer.a_id
         )
 
-        self.student_repository.create_student_answer(answer_data=answer_to_db)
-
-    def create_student_answers(self, new_attempt_id: int, question_score: int, answer: StudentAnswers) -> None:
-        answers_to_db = StudentAnswersDetail(
+    @staticmethod
+    def format_student_answers(question_score: int, answer: StudentAnswers) -> StudentAnswersDetail:
+        return StudentAnswersDetail(
             score=question_score,
             question_id=answer.q_id,
             question_type=answer.q_type,
-            student_attempt_id=new_attempt_id,
             answer_ids=answer.a_ids
         )
 
-        self.student_repository.create_student_answers(answers_data=answers_to_db)
-
-    def create_student_matching(self, new_attempt_id: int, question_score: int, answer: StudentMatchingList) -> None:
-        for match in answer.matching:
-            match_to_db = StudentMatchingDetail(
+    @staticmethod
+    def format_student_matching(question_score: int, answer: StudentMatchingList) -> list[StudentMatchingDetail]:
+        return [
+            StudentMatchingDetail(
                 score=(question_score / 4),
                 question_id=answer.q_id,
                 question_type=answer.q_type,
-                student_attempt_id=new_attempt_id,
                 left_id=match.left_id,
                 right_id=match.right_id
             )
-
-            self.student_repository.create_student_matching(matching_data=match_to_db)
+            for match in answer.matching
+        ]
 
 
 class ExamManager(AssessmentManager):
 
-    def get_assessment_id(self) -> int:
-        return self.repository.select_exam_id(lesson_id=self._lesson_id)
+    def get_answer_key(self) -> AnswerKey | None:
+        return select_answer_key(db=self._db, source=EXAM_BANK, lesson_id=self._lesson_id)
 
     def get_repository(self) -> ExamRepository:
         return ExamRepository(db=self._db)
@@ -178,28 +200,15 @@ class ExamManager(AssessmentManager):
     def get_student_repository(self) -> StudentExamRepository:
         return StudentExamRepository(db=self._db)
 
-    def create_new_attempt(self, number: int) -> int:
-        format_data = self.format_attempt_data(number=number)
-        new_attempt = self.student_repository.create_attempt(attempt_data=format_data)
-        return new_attempt.id
-
-    def get_attempt_number(self) -> int:
-        last_attempt = self.student_repository.select_last_attempt_number(
+    def select_submitted_attempt(self) -> Row | None:
+        return self.student_repository.select_attempt_by_idempotency_key(
             student_id=self._student_id,
-            exam_id=self._assessment_id
+            exam_id=self._assessment_id,
+            idempotency_key=self._idempotency_key
         )
 
-        attempt_number = last_attempt + 1 if last_attempt else 1
-        count_attempt = self.repository.select_count_attempt(lesson_id=self._lesson_id)
-
-        if attempt_number > count_attempt:
-            raise MaxAttemptException()
-
-        return attempt_number
-
-    def format_attempt_data(self, number: int) -> ExamNewAttempt:
+    def format_attempt_data(self) -> ExamNewAttempt:
         new_attempt_detail = ExamNewAttempt(
-            attempt_number=number,
             attempt_score=self._final_score,
             exam_id=self._assessment_id,
             student_id=self._student_id,
@@ -207,14 +216,11 @@ class ExamManager(AssessmentManager):
         )
         return new_attempt_detail
 
-    def update_attempt_score(self, attempt_id: int) -> StudentExamAttemptsOrm:
-        return self.student_repository.update_attempt_score(attempt_id=attempt_id, score=self._final_score)
-
 
 class TestManager(AssessmentManager):
 
-    def get_assessment_id(self) -> int:
-        return self.repository.select_test_id(lesson_id=self._lesson_id)
+    def get_answer_key(self) -> AnswerKey | None:
+        return select_answer_key(db=self._db, source=TEST_BANK, lesson_id=self._lesson_id)
 
     def get_repository(self) -> TestRepository:
         return TestRepository(db=self._db)
@@ -222,28 +228,17 @@ class TestManager(AssessmentManager):
     def get_student_repository(self) -> StudentTestRepository:
         return StudentTestRepository(db=self._db)
 
-    def get_attempt_number(self) -> int:
-        last_attempt = self.student_repository.select_last_attempt_number(
+    def select_submitted_attempt(self) -> Row | None:
+        return self.student_repository.select_attempt_by_idempotency_key(
             student_id=self._student_id,
-            test_id=self._assessment_id
+            test_id=self._assessment_id,
+            idempotency_key=self._idempotency_key
         )
 
-        attempt_number = last_attempt + 1 if last_attempt else 1
-        count_attempt = self.repository.select_count_attempt(lesson_id=self._lesson_id)
-
-        if attempt_number > count_attempt:
-            raise MaxAttemptException()
-
-        return attempt_number
-
-    def format_attempt_data(self, number: int) -> TestNewAttempt:
+    def format_attempt_data(self) -> TestNewAttempt:
         new_attempt_detail = TestNewAttempt(
-            attempt_number=number,
             attempt_score=self._final_score,
             test_id=self._assessment_id,
             student_id=self._student_id
         )
         return new_attempt_detail
-
-    def update_attempt_score(self, attempt_id: int) -> StudentTestAttemptsOrm:
-        return self.student_repository.update_attempt_score(attempt_id=attempt_id, score=self._final_score)
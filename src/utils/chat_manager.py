@@ -97,7 +97,7 @@ def serialize_messages(db: Session, messages: list[ChatMessageOrm]):
 
         result.append(message_data)
 
-    return {"data": result, "type": "chat-history"}
+    return {"data": result, "type": "chat-history", "next_cursor": getattr(messages, "next_cursor", None)}
 
 
 def serialize_new_message(db: Session, message: ChatMessageOrm):
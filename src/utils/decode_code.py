@@ -2,10 +2,10 @@ from datetime import datetime
 
 from jose import ExpiredSignatureError, JWTError
 from jose.jwt import decode
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import ALGORITHM, GOOGLE_AUTH_SECRET, SECRET_KEY
-from src.crud.user import UserRepository
+from src.crud.user import AsyncUserRepository
 from src.utils.exceptions import (
     AccessTokenExpireException,
     InvalidAuthenticationTokenException,
@@ -13,7 +13,9 @@ from src.utils.exceptions import (
     RefreshTokenExpireException,
     UserNotFoundException,
 )
+from src.utils.principal import UserPrincipal, cache_principal_async, get_cached_principal_async
 from src.utils.token import check_expire_token
+from src.utils.token_revocation import is_token_generation_current, is_token_generation_current_async
 
 
 def decode_google_token(token):
@@ -27,26 +29,41 @@ def decode_google_token(token):
     return decoded_data
 
 
-def decode_access_token(db: Session, access_token: str):
+async def decode_access_token(db: AsyncSession, access_token: str) -> UserPrincipal:
     try:
         payload = decode(access_token, SECRET_KEY, algorithms=ALGORITHM)
     except Exception:
         raise AccessTokenExpireException()
 
+    if "gen" in payload:
+        if payload.get("type") != "access":
+            raise InvalidAuthenticationTokenException()
+
+        if not await is_token_generation_current_async(user_id=payload["uid"], generation=payload["gen"]):
+            raise AccessTokenExpireException()
+
+        return UserPrincipal.from_claims(payload)
+
+    principal = await get_cached_principal_async(access_token)
+    if principal is not None:
+        return principal
+
     token_exp: int = payload.get("exp")
     username: str = payload.get("sub")
 
     if username is None:
         raise InvalidAuthenticationTokenException()
 
-    user_repository = UserRepository(db=db)
-    user = user_repository.select_user_by_username(username=username)
+    user_repository = AsyncUserRepository(db=db)
+    user = await user_repository.select_user_by_username(username=username)
 
     if user is None:
         raise UserNotFoundException()
 
-    if check_expire_token(user, token_exp):
-        return user
+    if check_expire_token(user, token_exp) and await is_token_generation_current_async(user_id=user.id, generation=0):
+        principal = UserPrincipal.from_user(user=user, token_exp=token_exp)
+        await cache_principal_async(access_token=access_token, principal=principal)
+        return principal
     else:
         raise AccessTokenExpireException()
 
@@ -57,7 +74,7 @@ def decode_and_check_refresh_token(refresh_token: str):
         token_exp = payload.get("exp")
         username = payload.get("sub")
 
-        if username is None:
+        if username is None or payload.get("type", "refresh") != "refresh":
             raise InvalidRefreshTokenException()
 
         exp_date = datetime.utcfromtimestamp(token_exp).strftime("%Y-%m-%d %H:%M:%S")
@@ -65,7 +82,10 @@ def decode_and_check_refresh_token(refresh_token: str):
         if exp_date <= datetime.today().strftime("%Y-%m-%d %H:%M:%S"):
             raise RefreshTokenExpireException()
 
-        return {"sub": username}
+        if "gen" in payload and not is_token_generation_current(user_id=payload["uid"], generation=payload["gen"]):
+            raise InvalidRefreshTokenException()
+
+        return payload
 
     except ExpiredSignatureError:
         raise RefreshTokenExpireException()
@@ -0,0 +1,30 @@
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def versions_etag(kind: str, rows: Iterable) -> str:
+    """Strong ETag of a payload built from rows carrying id and version, in any order."""
+    return make_etag(kind, sorted((row.id, row.version) for row in rows))
+
+
+def etag_matches(request: Optional[Request], etag: Optional[str]) -> bool:
+    if request is None or not etag:
+        return False
+
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -30,11 +30,21 @@ class CourseNotFoundException(HTTPException):
         super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
 
 
+class ChatNotFoundException(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+
+
 class InstructionNotFoundException(HTTPException):
     def __init__(self):
         super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail="Instruction not found")
 
 
+class AssessmentNotFoundException(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail="Test or exam not found")
+
+
 class AccessTokenExpireException(HTTPException):
     def __init__(self):
         super().__init__(
@@ -120,3 +130,39 @@ class UpdateEmailException(HTTPException):
 class MaxAttemptException(HTTPException):
     def __init__(self):
         super().__init__(status_code=status.HTTP_409_CONFLICT, detail="You have reached the maximum number of attempts")
+
+
+class ServiceOverloadedException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is overloaded, please try again later",
+            headers={"Retry-After": "1"}
+        )
+
+
+class AuthServiceUnavailableException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is temporarily unavailable",
+            headers={"Retry-After": "1"}
+        )
+
+
+class InvalidCursorException(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+class InvalidFieldsException(HTTPException):
+    def __init__(self, name: str):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown field: {name}")
+
+
+class InvalidEnrollmentFileException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Enrollment file must be a CSV of student_id,course_id rows with a header"
+        )
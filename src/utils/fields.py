@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from fastapi import Query
+from pydantic import BaseModel
+from sqlalchemy import inspect
+
+from src.models import LessonOrm
+from src.schemas.course import CourseCardResponse, CourseDetailResponse, IconResponse
+from src.schemas.lesson import LessonAuthResponse
+from src.utils.exceptions import InvalidFieldsException
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    """Fields a client asked for with fields=, nested collections as "lessons.title"."""
+    fields: tuple[str, ...]
+    nested: dict[str, tuple[str, ...]] = field(default_factory=dict)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+    def columns(self, model: type) -> list:
+        """Column attributes of model among the requested fields, for load_only()."""
+        mapper = inspect(model)
+        return [mapper.attrs[name].class_attribute for name in self.fields if name in mapper.column_attrs]
+
+    def nested_columns(self, name: str, model: type) -> list:
+        mapper = inspect(model)
+        return [mapper.attrs[item].class_attribute for item in self.nested.get(name, ()) if item in mapper.column_attrs]
+
+    def dump(self, obj: Any) -> dict:
+        data = {}
+        for name in self.fields:
+            value = getattr(obj, name, None)
+            if name in self.nested:
+                value = [{item: getattr(child, item, None) for item in self.nested[name]} for child in value or ()]
+            data[name] = value
+        return data
+
+    def cache_key(self) -> str:
+        return ",".join(
+            f"{name}({'|'.join(self.nested[name])})" if name in self.nested else name for name in self.fields
+        )
+
+
+def parse_fields(
+        fields: Optional[str],
+        schema: type[BaseModel],
+        nested: Optional[dict[str, type[BaseModel]]] = None,
+        presets: Optional[dict[str, Iterable[str]]] = None
+) -> Optional[FieldSet]:
+    """
+    Parses a comma separated fields= value against the fields of schema.
+    A preset name expands to its fields; a nested name alone selects all fields of its schema.
+    """
+    if not fields:
+        return None
+
+    nested = nested or {}
+    names = []
+    for name in (item.strip() for item in fields.split(",")):
+        if name:
+            names.extend((presets or {}).get(name, (name,)))
+
+    selected: dict[str, Optional[list[str]]] = {"id": None}
+    for name in names:
+        parent, _, child = name.partition(".")
+        if parent not in schema.model_fields:
+            raise InvalidFieldsException(name)
+
+        if not child:
+            selected[parent] = list(nested[parent].model_fields) if parent in nested else None
+            continue
+
+        if parent not in nested or child not in nested[parent].model_fields:
+            raise InvalidFieldsException(name)
+        children = selected.get(parent) or ["id"]
+        if child not in children:
+            children.append(child)
+        selected[parent] = children
+
+    return FieldSet(
+        fields=tuple(selected),
+        nested={name: tuple(children) for name, children in selected.items() if name in nested and children}
+    )
+
+
+def course_fields(
+        fields: Optional[str] = Query(
+            default=None,
+            description="Comma separated course fields, 'lessons.<field>' for lesson fields, or 'card'"
+        )
+) -> Optional[FieldSet]:
+    return parse_fields(
+        fields,
+        CourseDetailResponse,
+        nested={"lessons": LessonAuthResponse, "icons": IconResponse},
+        presets={"card": tuple(CourseCardResponse.model_fields)}
+    )
+
+
+# top-level keys of the /lesson/get payload: the lesson columns and the data of its type
+LESSON_FIELDS = (
+    *(column.key for column in LessonOrm.__table__.columns if column.key != "search_vector"),
+    "lecture_info",
+    "test_data",
+    "exam_data",
+)
+
+
+def lesson_fields(
+        fields: Optional[str] = Query(default=None, description="Comma separated top-level fields of the lesson")
+) -> Optional[tuple[str, ...]]:
+    if not fields:
+        return None
+
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    for name in names:
+        if name not in LESSON_FIELDS:
+            raise InvalidFieldsException(name)
+    return names or None
+
+
+def project_lesson(payload: dict, fields: tuple[str, ...]) -> dict:
+    return {name: payload[name] for name in fields if name in payload}
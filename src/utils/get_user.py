@@ -12,34 +12,51 @@ from src.utils.exceptions import (
     InvalidAuthenticationTokenException,
     UserNotFoundException,
 )
+from src.utils.principal import UserPrincipal, cache_principal, get_cached_principal
 from src.utils.token import check_expire_token
+from src.utils.token_revocation import is_token_generation_current
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/user/login")
 
 
-def get_current_user(db: Session = Depends(get_db), access_token: str = Depends(oauth2_scheme)):
+def get_current_user(db: Session = Depends(get_db), access_token: str = Depends(oauth2_scheme)) -> UserPrincipal:
     try:
         payload = decode(access_token, SECRET_KEY, algorithms=ALGORITHM)
-        token_exp: int = payload.get("exp")
-        username: str = payload.get("sub")
+    except ExpiredSignatureError:
+        raise AccessTokenExpireException()
+    except JWTError:
+        raise InvalidAuthenticationTokenException()
 
-        if username is None:
+    if "gen" in payload:
+        if payload.get("type") != "access":
             raise InvalidAuthenticationTokenException()
 
-        user_repository = UserRepository(db=db)
-        user = user_repository.select_user_by_username(username=username)
+        if not is_token_generation_current(user_id=payload["uid"], generation=payload["gen"]):
+            raise AccessTokenExpireException()
 
-        if user is None:
-            raise UserNotFoundException()
+        return UserPrincipal.from_claims(payload)
 
-        if check_expire_token(user, token_exp):
-            return user
+    # tokens issued before generation claims existed are checked against users.exp_token until they expire
+    principal = get_cached_principal(access_token)
+    if principal is not None:
+        return principal
 
-        else:
-            raise AccessTokenExpireException()
+    token_exp: int = payload.get("exp")
+    username: str = payload.get("sub")
 
-    except ExpiredSignatureError:
-        raise AccessTokenExpireException()
-
-    except JWTError:
+    if username is None:
         raise InvalidAuthenticationTokenException()
+
+    user_repository = UserRepository(db=db)
+    user = user_repository.select_auth_user_by_username(username=username)
+
+    if user is None:
+        raise UserNotFoundException()
+
+    if check_expire_token(user, token_exp) and is_token_generation_current(user_id=user.id, generation=0):
+        principal = UserPrincipal.from_user(user=user, token_exp=token_exp)
+        cache_principal(access_token=access_token, principal=principal)
+        return principal
+
+    else:
+        raise AccessTokenExpireException()
@@ -0,0 +1,24 @@
+from typing import Optional
+
+from src.config import LECTURE_CACHE_SIZE, LECTURE_CACHE_TTL
+from src.utils.cache import TTLCache
+
+# lesson_id -> (lecture_id, lesson version, rendered JSON)
+_documents = TTLCache(maxsize=LECTURE_CACHE_SIZE, ttl=LECTURE_CACHE_TTL)
+
+
+def get_lecture_document(lesson_id: int, version: int) -> Optional[bytes]:
+    """Rendered lecture of the lesson, if it was rendered from this lesson version."""
+    entry = _documents.get(lesson_id)
+    if entry is None or entry[1] != version:
+        return None
+    return entry[2]
+
+
+def store_lecture_document(lesson_id: int, lecture_id: int, version: int, body: bytes):
+    _documents.set(lesson_id, (lecture_id, version, body))
+
+
+def invalidate_lecture_document(lecture_id: Optional[int]):
+    # other processes see the bumped lesson version instead
+    _documents.delete_where(lambda lesson_id, entry: entry[0] == lecture_id)
@@ -0,0 +1,40 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+from src.config import METRICS_TOKEN
+from src.utils.exceptions import InvalidAuthenticationTokenException
+
+
+def multiprocess_mode() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    With PROMETHEUS_MULTIPROC_DIR set every uvicorn worker writes its samples there,
+    so any worker that answers the scrape reports all of them.
+    """
+    if not multiprocess_mode():
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics(authorization: Optional[str] = Header(default=None)) -> Response:
+    expected = f"Bearer {METRICS_TOKEN}"
+    if not authorization or not hmac.compare_digest(authorization.encode(), expected.encode()):
+        raise InvalidAuthenticationTokenException()
+
+    return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead():
+    # drops this worker's live gauges from the aggregated view
+    if multiprocess_mode():
+        multiprocess.mark_process_dead(os.getpid())
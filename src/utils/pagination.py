@@ -0,0 +1,23 @@
+from typing import Optional
+
+from fastapi import Query, Response
+
+from src.config import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
+from src.crud.pagination import Page, PageParams
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_params(
+        limit: int = Query(default=PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+        cursor: Optional[str] = None
+) -> PageParams:
+    return PageParams(limit=limit, cursor=cursor)
+
+
+def page_headers(page: Page) -> dict:
+    return {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else {}
+
+
+def set_page_headers(response: Response, page: Page):
+    response.headers.update(page_headers(page))
@@ -1,5 +1,16 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
 from passlib.hash import bcrypt
 
+from src.config import PASSWORD_POOL_SIZE, PASSWORD_QUEUE_TIMEOUT
+from src.utils.exceptions import ServiceOverloadedException
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots = asyncio.Semaphore(PASSWORD_POOL_SIZE * 2)
+
 
 def hash_password(password: str) -> str:
     hashed_password = bcrypt.hash(password)
@@ -8,3 +19,33 @@ def hash_password(password: str) -> str:
 
 def check_password(password: str, hashed_password: str) -> bool:
     return bcrypt.verify(password, hashed_password)
+
+
+def get_password_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_POOL_SIZE, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def _run_in_pool(func, *args):
+    try:
+        await asyncio.wait_for(_slots.acquire(), timeout=PASSWORD_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise ServiceOverloadedException()
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), func, *args)
+    finally:
+        _slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_pool(hash_password, password)
+
+
+async def check_password_async(password: str, hashed_password: str) -> bool:
+    return await _run_in_pool(check_password, password, hashed_password)
@@ -0,0 +1,59 @@
+import time
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    ["role"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+# gauges rather than a collector, so multiprocess mode sums them over the live workers
+POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ["role"], multiprocess_mode="livesum")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections in use", ["role"], multiprocess_mode="livesum")
+POOL_CHECKED_IN = Gauge("db_pool_checked_in", "Idle connections in the pool", ["role"], multiprocess_mode="livesum")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections opened above pool size", ["role"], multiprocess_mode="livesum")
+
+
+def observe_pool(pool: QueuePool):
+    POOL_SIZE.labels(pool.role).set(pool.size())
+    POOL_CHECKED_OUT.labels(pool.role).set(pool.checkedout())
+    POOL_CHECKED_IN.labels(pool.role).set(pool.checkedin())
+    POOL_OVERFLOW.labels(pool.role).set(max(pool.overflow(), 0))
+
+
+class InstrumentedPoolMixin:
+    role = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.role).observe(time.perf_counter() - started)
+            observe_pool(self)
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        observe_pool(self)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.role = self.role
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def register_engine(role: str, engine: Engine):
+    engine.pool.role = role
+    if isinstance(engine.pool, InstrumentedPoolMixin):
+        observe_pool(engine.pool)
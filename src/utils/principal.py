@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from redis.exceptions import RedisError
+
+from src.config import (
+    PRINCIPAL_CACHE_TTL,
+    PRINCIPAL_LOCAL_CACHE_SIZE,
+    PRINCIPAL_LOCAL_CACHE_TTL,
+    TOKEN_REVOCATION_MAX_DELAY,
+)
+from src.enums import UserType
+from src.models import UserOrm
+from src.utils.cache import TTLCache
+from src.utils.redis_client import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+# revocation only clears this process's copy, so other workers keep theirs for at most the revocation delay
+LOCAL_TTL = min(PRINCIPAL_LOCAL_CACHE_TTL, TOKEN_REVOCATION_MAX_DELAY)
+_local_cache = TTLCache(maxsize=PRINCIPAL_LOCAL_CACHE_SIZE, ttl=LOCAL_TTL)
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    id: int
+    usertype: UserType
+    username: str
+    student_id: Optional[int]
+    exp_token: Optional[datetime]
+    token_exp: int
+
+    @property
+    def is_moder(self):
+        return self.usertype == UserType.moder.value
+
+    @property
+    def is_student(self):
+        return self.usertype == UserType.student.value
+
+    @classmethod
+    def from_user(cls, user: UserOrm, token_exp: int) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            usertype=UserType(user.usertype),
+            username=user.username,
+            student_id=user.student.id if user.student else None,
+            exp_token=user.exp_token,
+            token_exp=token_exp
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "UserPrincipal":
+        return cls(
+            id=payload["uid"],
+            usertype=UserType(payload["utype"]),
+            username=payload["sub"],
+            student_id=payload["sid"],
+            exp_token=None,
+            token_exp=payload["exp"]
+        )
+
+    def dumps(self) -> bytes:
+        return orjson.dumps(asdict(self))
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "UserPrincipal":
+        data = orjson.loads(raw)
+        data["usertype"] = UserType(data["usertype"])
+        data["exp_token"] = datetime.fromisoformat(data["exp_token"]) if data["exp_token"] else None
+        return cls(**data)
+
+
+def _token_hash(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode()).hexdigest()
+
+
+def _principal_key(token_hash: str) -> str:
+    return f"auth:principal:{token_hash}"
+
+
+def _user_tokens_key(user_id: int) -> str:
+    return f"auth:user-tokens:{user_id}"
+
+
+def _ttl(principal: UserPrincipal) -> int:
+    return min(PRINCIPAL_CACHE_TTL, int(principal.token_exp - time.time()))
+
+
+def _check_local(token_hash: str) -> Optional[UserPrincipal]:
+    principal = _local_cache.get(token_hash)
+    if principal is not None and principal.token_exp <= time.time():
+        _local_cache.delete(token_hash)
+        return None
+    return principal
+
+
+def _from_redis(token_hash: str, raw: Optional[bytes]) -> Optional[UserPrincipal]:
+    if raw is None:
+        return None
+
+    principal = UserPrincipal.loads(raw)
+    ttl = _ttl(principal)
+    if ttl <= 0:
+        return None
+
+    _local_cache.set(token_hash, principal, ttl=min(ttl, LOCAL_TTL))
+    return principal
+
+
+def get_cached_principal(access_token: str) -> Optional[UserPrincipal]:
+    token_hash = _token_hash(access_token)
+    principal = _check_local(token_hash)
+    if principal is not None:
+        return principal
+
+    try:
+        raw = redis_client.get(_principal_key(token_hash))
+    except RedisError as e:
+        logger.warning(f"Principal cache unavailable: {e}")
+        return None
+
+    return _from_redis(token_hash, raw)
+
+
+async def get_cached_principal_async(access_token: str) -> Optional[UserPrincipal]:
+    token_hash = _token_hash(access_token)
+    principal = _check_local(token_hash)
+    if principal is not None:
+        return principal
+
+    try:
+        raw = await async_redis_client.get(_principal_key(token_hash))
+    except RedisError as e:
+        logger.warning(f"Principal cache unavailable: {e}")
+        return None
+
+    return _from_redis(token_hash, raw)
+
+
+def _store_local(access_token: str, principal: UserPrincipal) -> Optional[tuple[str, int]]:
+    ttl = _ttl(principal)
+    if ttl <= 0:
+        return None
+
+    token_hash = _token_hash(access_token)
+    _local_cache.set(token_hash, principal, ttl=min(ttl, LOCAL_TTL))
+    return token_hash, ttl
+
+
+def cache_principal(access_token: str, principal: UserPrincipal):
+    stored = _store_local(access_token, principal)
+    if stored is None:
+        return
+
+    token_hash, ttl = stored
+    try:
+        with redis_client.pipeline() as pipe:
+            pipe.setex(_principal_key(token_hash), ttl, principal.dumps())
+            pipe.sadd(_user_tokens_key(principal.id), token_hash)
+            pipe.expire(_user_tokens_key(principal.id), PRINCIPAL_CACHE_TTL)
+            pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Principal cache unavailable: {e}")
+
+
+async def cache_principal_async(access_token: str, principal: UserPrincipal):
+    stored = _store_local(access_token, principal)
+    if stored is None:
+        return
+
+    token_hash, ttl = stored
+    try:
+        async with async_redis_client.pipeline() as pipe:
+            pipe.setex(_principal_key(token_hash), ttl, principal.dumps())
+            pipe.sadd(_user_tokens_key(principal.id), token_hash)
+            pipe.expire(_user_tokens_key(principal.id), PRINCIPAL_CACHE_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Principal cache unavailable: {e}")
+
+
+def invalidate_user_principals(user_id: int):
+    _local_cache.delete_where(lambda _, principal: principal.id == user_id)
+
+    try:
+        token_hashes = redis_client.smembers(_user_tokens_key(user_id))
+        keys = [_principal_key(token_hash.decode()) for token_hash in token_hashes]
+        redis_client.delete(_user_tokens_key(user_id), *keys)
+    except RedisError as e:
+        logger.warning(f"Principal cache unavailable, cached tokens of user {user_id} expire by TTL: {e}")
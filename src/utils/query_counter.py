@@ -0,0 +1,117 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config import QUERY_REPEAT_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAM = re.compile(r"%\(\w+\)s|\$\d+|%s|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _BIND_PARAM.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _IN_LIST.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[normalize_statement(statement)] += 1
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> dict[str, int]:
+        return {
+            statement: count
+            for statement, count in self.fingerprints.items()
+            if count > threshold
+        }
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+
+@contextmanager
+def count_queries():
+    """
+    Collect statements executed inside the block:
+
+        with count_queries() as stats:
+            ...
+        assert stats.count <= 3
+    """
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_counter_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_counter_start"].pop()
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_counter_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def install_query_counter(engine: Engine):
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def report_query_stats(stats: QueryStats, endpoint: str, threshold: int = QUERY_REPEAT_THRESHOLD):
+    for statement, count in stats.repeated(threshold).items():
+        logger.warning(
+            f"Possible N+1 on {endpoint}: statement executed {count} times – {statement[:300]}"
+        )
+
+
+def query_stats_headers(stats: QueryStats) -> dict[str, str]:
+    most_repeated = max(stats.fingerprints.values(), default=0)
+    return {
+        "X-Query-Count": str(stats.count),
+        "X-Query-Time-Ms": f"{stats.duration_ms:.2f}",
+        "X-Query-Max-Repeats": str(most_repeated),
+    }
@@ -0,0 +1,11 @@
+import redis
+from redis import asyncio as aioredis
+
+from src.config import REDIS_SOCKET_TIMEOUT, REDIS_URL
+
+redis_client = redis.Redis.from_url(
+    REDIS_URL, socket_timeout=REDIS_SOCKET_TIMEOUT, socket_connect_timeout=REDIS_SOCKET_TIMEOUT
+)
+async_redis_client = aioredis.Redis.from_url(
+    REDIS_URL, socket_timeout=REDIS_SOCKET_TIMEOUT, socket_connect_timeout=REDIS_SOCKET_TIMEOUT
+)
@@ -0,0 +1,236 @@
+import logging
+import time
+from itertools import chain
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from src.config import REGRADE_CHUNK_SIZE, REGRADE_REPORT_LIMIT
+from src.crud.question_bank import QuestionBankRepository
+from src.crud.regrade import AttemptSource, RegradeRepository
+from src.utils.answer_key import AnswerKey, compile_answer_key
+from src.utils.exceptions import AssessmentNotFoundException
+
+logger = logging.getLogger(__name__)
+
+
+class KeyArrays:
+    """An answer key as sorted NumPy arrays, so scoring is lookups instead of Python loops."""
+
+    def __init__(self, answer_key: AnswerKey):
+        questions = sorted(answer_key.questions.items())
+        self.question_ids = np.array([question_id for question_id, _ in questions], dtype=np.int64)
+        self.scores = np.array([question.score for _, question in questions], dtype=np.float64)
+        self.count_correct = np.array([len(question.correct) for _, question in questions], dtype=np.int64)
+        self.correct_pairs = np.array(sorted(
+            _pair(question_id, answer_id) for question_id, question in questions for answer_id in question.correct
+        ), dtype=np.int64)
+
+        matches = sorted(
+            (left_id, question_id, right_id)
+            for question_id, question in questions for left_id, right_id in question.matches.items()
+        )
+        self.left_ids = np.array([left_id for left_id, _, _ in matches], dtype=np.int64)
+        self.left_questions = np.array([question_id for _, question_id, _ in matches], dtype=np.int64)
+        self.left_rights = np.array([right_id or 0 for _, _, right_id in matches], dtype=np.int64)
+
+    def question_positions(self, question_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Positions of question_ids in the key and whether the question is in the key at all."""
+        if not len(self.question_ids):
+            return np.zeros(len(question_ids), dtype=np.int64), np.zeros(len(question_ids), dtype=bool)
+
+        positions = np.minimum(np.searchsorted(self.question_ids, question_ids), len(self.question_ids) - 1)
+        return positions, self.question_ids[positions] == question_ids
+
+    def question_scores(self, question_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Score and number of correct answers per question, zero for questions not in the key."""
+        positions, known = self.question_positions(question_ids)
+        if not len(self.question_ids):
+            return np.zeros(len(question_ids)), np.zeros(len(question_ids), dtype=np.int64)
+        return np.where(known, self.scores[positions], 0), np.where(known, self.count_correct[positions], 0)
+
+
+def _pair(high: int, low: int) -> int:
+    return (high << 32) | low
+
+
+def score_answer_rows(key: KeyArrays, rows: list) -> np.ndarray:
+    """
+    Points of single and multiple choice answer rows, the same as
+    AssessmentManager.inspect_classic_question and inspect_multiple_question.
+    """
+    if not rows:
+        return np.zeros(0, dtype=np.int64)
+
+    selections = [row.answer_ids if row.answer_ids is not None else [row.answer_id] for row in rows]
+    is_multiple = np.fromiter((row.answer_ids is not None for row in rows), dtype=bool, count=len(rows))
+    question_ids = np.fromiter((row.question_id for row in rows), dtype=np.int64, count=len(rows))
+    selected_count = np.fromiter((len(selection) for selection in selections), dtype=np.int64, count=len(rows))
+
+    row_of = np.repeat(np.arange(len(rows)), selected_count)
+    selected = np.fromiter(
+        (answer_id or 0 for answer_id in chain.from_iterable(selections)),
+        dtype=np.int64,
+        count=int(selected_count.sum())
+    )
+    hits = np.isin((question_ids[row_of] << 32) | selected, key.correct_pairs)
+    hit_count = np.bincount(row_of, weights=hits, minlength=len(rows))
+
+    scores, count_correct = key.question_scores(question_ids)
+
+    classic = np.where(hit_count > 0, scores, 0)
+
+    per_correct = np.divide(scores, count_correct, out=np.zeros(len(rows)), where=count_correct > 0)
+    extra = np.maximum(selected_count - count_correct, 0)
+    multiple = np.where(count_correct > 0, np.round(np.maximum(hit_count * per_correct - extra * per_correct, 0)), 0)
+
+    return np.where(is_multiple, multiple, classic).astype(np.int64)
+
+
+def score_matching_rows(key: KeyArrays, rows: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Points of matching questions, as AssessmentManager.inspect_match_question.
+    Returns the (attempt_id, question_id) groups, their points and the group of every row.
+    """
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return np.zeros((0, 2), dtype=np.int64), empty, empty
+
+    attempt_ids = np.fromiter((row.student_attempt_id for row in rows), dtype=np.int64, count=len(rows))
+    question_ids = np.fromiter((row.question_id for row in rows), dtype=np.int64, count=len(rows))
+    left_ids = np.fromiter((row.left_id for row in rows), dtype=np.int64, count=len(rows))
+    right_ids = np.fromiter((row.right_id for row in rows), dtype=np.int64, count=len(rows))
+
+    if len(key.left_ids):
+        positions = np.minimum(np.searchsorted(key.left_ids, left_ids), len(key.left_ids) - 1)
+        hits = ((key.left_ids[positions] == left_ids)
+                & (key.left_questions[positions] == question_ids)
+                & (key.left_rights[positions] == right_ids))
+    else:
+        hits = np.zeros(len(rows), dtype=bool)
+
+    groups, row_group = np.unique(np.stack([attempt_ids, question_ids], axis=1), axis=0, return_inverse=True)
+    row_group = row_group.reshape(-1)
+    scores, _ = key.question_scores(groups[:, 1])
+    points = np.round(np.bincount(row_group, weights=hits, minlength=len(groups)) * scores / 4).astype(np.int64)
+    return groups, points, row_group
+
+
+class Regrader:
+    """
+    Re-scores every attempt of a test or exam against its current answer key,
+    chunk by chunk, and optionally writes the changed scores back.
+    """
+
+    def __init__(self, db: Session, source: AttemptSource, assessment_id: int):
+        self.db = db
+        self.source = source
+        self.assessment_id = assessment_id
+        self.repository = RegradeRepository(db=db, source=source)
+
+    def run(self, dry_run: bool = True, chunk_size: int = REGRADE_CHUNK_SIZE) -> dict:
+        started = time.perf_counter()
+        lesson = self.repository.select_lesson(assessment_id=self.assessment_id)
+        if lesson is None:
+            raise AssessmentNotFoundException()
+
+        bank = QuestionBankRepository(db=self.db, source=self.source.bank).select_bank(lesson_id=lesson.id)
+
+        answer_key = compile_answer_key(bank)
+        key = KeyArrays(answer_key)
+        report = {
+            f"{self.source.bank.name}_id": self.assessment_id,
+            "version": answer_key.version,
+            "dry_run": dry_run,
+            "attempts": 0,
+            "changed_attempts": 0,
+            "changed_lessons": 0,
+            "changes": [],
+        }
+
+        for chunk in self.repository.select_attempt_chunks(assessment_id=self.assessment_id, chunk_size=chunk_size):
+            changes = self._regrade_chunk(key, lesson, chunk, dry_run)
+            report["attempts"] += len(chunk)
+            report["changed_attempts"] += len(changes["attempts"])
+            report["changed_lessons"] += len(changes["student_lessons"])
+            room = REGRADE_REPORT_LIMIT - len(report["changes"])
+            report["changes"].extend(changes["report"][:max(room, 0)])
+
+        report["truncated"] = report["changed_attempts"] > len(report["changes"])
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(
+            f"Regraded {report['attempts']} attempts of {self.source.bank.name} {self.assessment_id}: "
+            f"{report['changed_attempts']} changed, dry run {dry_run}, {report['seconds']}s"
+        )
+        return report
+
+    def _regrade_chunk(self, key: KeyArrays, lesson, chunk: list, dry_run: bool) -> dict:
+        attempt_ids = np.fromiter((attempt.id for attempt in chunk), dtype=np.int64, count=len(chunk))
+        id_list = attempt_ids.tolist()
+        answer_rows = self.repository.select_answer_rows(attempt_ids=id_list)
+        matching_rows = self.repository.select_matching_rows(attempt_ids=id_list)
+
+        answer_points = score_answer_rows(key, answer_rows)
+        groups, group_points, row_group = score_matching_rows(key, matching_rows)
+
+        # attempt ids come sorted from the keyset query
+        totals = np.zeros(len(chunk), dtype=np.int64)
+        if answer_rows:
+            answer_attempts = np.fromiter((row.student_attempt_id for row in answer_rows), dtype=np.int64,
+                                          count=len(answer_rows))
+            np.add.at(totals, np.searchsorted(attempt_ids, answer_attempts), answer_points)
+        if len(groups):
+            np.add.at(totals, np.searchsorted(attempt_ids, groups[:, 0]), group_points)
+
+        old_totals = np.fromiter((attempt.attempt_score or 0 for attempt in chunk), dtype=np.int64, count=len(chunk))
+        changed = np.flatnonzero(totals != old_totals)
+        new_scores = dict(zip(id_list, totals.tolist()))
+
+        changes = {
+            "attempts": [{"id": id_list[index], "attempt_score": int(totals[index])} for index in changed],
+            "answers": [
+                {"id": row.id, "score": int(points)}
+                for row, points in zip(answer_rows, answer_points.tolist()) if row.score != points
+            ],
+            "matching": [
+                {"id": row.id, "score": points / 4}
+                for row, points in zip(matching_rows, group_points[row_group].tolist()) if row.score != points / 4
+            ],
+            "report": [
+                {
+                    "attempt_id": id_list[index],
+                    "student_id": chunk[index].student_id,
+                    "old_score": chunk[index].attempt_score,
+                    "new_score": int(totals[index]),
+                }
+                for index in changed
+            ],
+        }
+
+        changed_ids = [id_list[index] for index in changed]
+        student_lessons = []
+        if changed_ids:
+            student_lessons = self.repository.select_submitted_lessons(lesson_id=lesson.id, attempt_ids=changed_ids)
+        changes["student_lessons"] = [
+            {"id": student_lesson.id, "score": new_scores[student_lesson.attempt]} for student_lesson in student_lessons
+        ]
+        grades = [
+            {"b_student_id": student_lesson.student_id,
+             "b_delta": new_scores[student_lesson.attempt] - (student_lesson.score or 0)}
+            for student_lesson in student_lessons
+        ]
+
+        if not dry_run:
+            self.repository.update_scores(
+                course_id=lesson.course_id,
+                attempts=changes["attempts"],
+                answers=changes["answers"],
+                matching=changes["matching"],
+                student_lessons=changes["student_lessons"],
+                grades=grades
+            )
+        return changes
+
+
+def regrade_assessment(db: Session, source: AttemptSource, assessment_id: int, dry_run: bool = True) -> dict:
+    return Regrader(db=db, source=source, assessment_id=assessment_id).run(dry_run=dry_run)
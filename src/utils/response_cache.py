@@ -0,0 +1,237 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Callable, Iterable, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.config import RESPONSE_CACHE_LOCK_TTL, RESPONSE_CACHE_TTL, RESPONSE_CACHE_WAIT
+from src.models import (
+    CategoryOrm,
+    CourseIconOrm,
+    CourseOrm,
+    ExamOrm,
+    ExamQuestionOrm,
+    InstructionFilesOrm,
+    InstructionOrm,
+    LectureOrm,
+    LessonOrm,
+    StudentCourseAssociation,
+    TestOrm,
+    TestQuestionOrm,
+)
+from src.utils.etag import etag_matches, not_modified
+from src.utils.fields import FieldSet
+from src.utils.redis_client import async_redis_client, redis_client
+from src.utils.serialization import endpoint_label, render
+
+logger = logging.getLogger(__name__)
+
+MODEL_TAGS = {
+    CourseOrm: ("courses",),
+    CourseIconOrm: ("courses",),
+    LessonOrm: ("courses",),
+    LectureOrm: ("courses",),
+    TestOrm: ("courses",),
+    TestQuestionOrm: ("courses",),
+    ExamOrm: ("courses",),
+    ExamQuestionOrm: ("courses",),
+    CategoryOrm: ("categories",),
+    InstructionOrm: ("instructions",),
+    InstructionFilesOrm: ("instructions",),
+    # enrollments move purchase_count, which orders /course/most_popular
+    StudentCourseAssociation: ("popular",),
+}
+
+
+def _response_key(key: str) -> str:
+    return f"resp:{key}"
+
+
+def _lock_key(key: str) -> str:
+    return f"resp-lock:{key}"
+
+
+def _tag_key(tag: str) -> str:
+    return f"resp-tag:{tag}"
+
+
+def _tag_version_key(tag: str) -> str:
+    return f"resp-tag-version:{tag}"
+
+
+def _response(request: Optional[Request], body: bytes, headers: dict, cache_status: str) -> Response:
+    etag = headers.get("ETag")
+    if etag_matches(request, etag):
+        response = not_modified(etag)
+    else:
+        response = Response(content=body, media_type="application/json", headers=headers)
+
+    response.headers["X-Cache"] = cache_status
+    return response
+
+
+def _pack(body: bytes, headers: dict) -> bytes:
+    # stored as b"<headers json>\n<body>"; compact JSON never contains a raw newline
+    return orjson.dumps(headers) + b"\n" + body
+
+
+def _unpack(raw: bytes) -> tuple[bytes, dict]:
+    head, _, body = raw.partition(b"\n")
+    return body, orjson.loads(head)
+
+
+def _content_headers(content: Any, etag: Optional[Callable], headers: Optional[Callable]) -> dict:
+    result = {"ETag": etag(content)} if etag else {}
+    if headers:
+        result.update(headers(content))
+    return result
+
+
+async def _build(build: Callable) -> Any:
+    result = build()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def _wait_for(cache_key: str) -> bytes | None:
+    deadline = time.monotonic() + RESPONSE_CACHE_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        raw = await async_redis_client.get(cache_key)
+        if raw is not None:
+            return raw
+    return None
+
+
+async def _store(cache_key: str, body: bytes, tags: tuple[str, ...], versions: list):
+    version_keys = [_tag_version_key(tag) for tag in tags]
+    async with async_redis_client.pipeline() as pipe:
+        await pipe.watch(*version_keys)
+        # a write committed while the response was being built makes it stale
+        if await pipe.mget(*version_keys) != versions:
+            return
+
+        pipe.multi()
+        pipe.set(cache_key, body, ex=RESPONSE_CACHE_TTL)
+        for tag in tags:
+            pipe.sadd(_tag_key(tag), cache_key)
+            pipe.expire(_tag_key(tag), RESPONSE_CACHE_TTL)
+        await pipe.execute()
+
+
+async def cached_response(
+        key: str,
+        tags: Iterable[str],
+        response_model: Any,
+        build: Callable,
+        request: Optional[Request] = None,
+        etag: Optional[Callable[[Any], str]] = None,
+        headers: Optional[Callable[[Any], dict]] = None,
+        fields: Optional[FieldSet] = None
+):
+    """
+    Returns the cached JSON body for key, building it with build() on a miss.
+    Only one caller per key rebuilds at a time; the others wait for its result.
+    etag(content) and headers(content) are stored next to the body so conditional
+    requests are answered from the cache. fields renders only the requested fields;
+    key must then include fields.cache_key().
+    """
+    tags = tuple(tags)
+    cache_key = _response_key(key)
+
+    try:
+        raw = await async_redis_client.get(cache_key)
+        if raw is not None:
+            return _response(request, *_unpack(raw), "HIT")
+
+        locked = await async_redis_client.set(_lock_key(key), 1, nx=True, ex=RESPONSE_CACHE_LOCK_TTL)
+        if not locked:
+            raw = await _wait_for(cache_key)
+            if raw is not None:
+                return _response(request, *_unpack(raw), "HIT")
+
+        versions = await async_redis_client.mget(*[_tag_version_key(tag) for tag in tags]) if locked else None
+    except RedisError as e:
+        logger.warning(f"Response cache unavailable: {e}")
+        content = await _build(build)
+        content_headers = _content_headers(content, etag, headers)
+        if etag_matches(request, content_headers.get("ETag")):
+            return not_modified(content_headers["ETag"])
+        body = render(response_model, content, fields, endpoint=endpoint_label(request))
+        return _response(request, body, content_headers, "BYPASS")
+
+    try:
+        content = await _build(build)
+        content_headers = _content_headers(content, etag, headers)
+        body = render(response_model, content, fields, endpoint=endpoint_label(request))
+        if locked:
+            await _store(cache_key, _pack(body, content_headers), tags, versions)
+    except (RedisError, WatchError) as e:
+        logger.warning(f"Response for {key} was not cached: {e}")
+    finally:
+        if locked:
+            try:
+                await async_redis_client.delete(_lock_key(key))
+            except RedisError:
+                pass
+
+    return _response(request, body, content_headers, "MISS")
+
+
+async def select_tag_versions(tags: Iterable[str]) -> list:
+    """Current invalidation counters of tags; they change whenever tagged data is committed."""
+    return await async_redis_client.mget(*[_tag_version_key(tag) for tag in tags])
+
+
+def invalidate_tags(tags: Iterable[str]):
+    tags = tuple(tags)
+    try:
+        with redis_client.pipeline() as pipe:
+            for tag in tags:
+                pipe.incr(_tag_version_key(tag))
+                pipe.smembers(_tag_key(tag))
+            results = pipe.execute()
+
+        keys = {key for members in results[1::2] for key in members}
+        redis_client.delete(*keys, *[_tag_key(tag) for tag in tags])
+    except RedisError as e:
+        logger.warning(f"Response cache unavailable, {', '.join(tags)} entries expire by TTL: {e}")
+
+
+def _collect_tags(session: Session, models: Iterable[type]):
+    tags = session.info.setdefault("response_cache_tags", set())
+    for model in models:
+        tags.update(MODEL_TAGS.get(model, ()))
+
+
+def install_cache_invalidation(session_class: type[Session]):
+    """Invalidates cached responses for every tagged model a session committed changes to."""
+
+    @event.listens_for(session_class, "after_flush")
+    def after_flush(session, flush_context):
+        _collect_tags(session, {type(obj) for obj in (*session.new, *session.dirty, *session.deleted)})
+
+    @event.listens_for(session_class, "do_orm_execute")
+    def do_orm_execute(orm_execute_state):
+        if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+            mapper = orm_execute_state.bind_mapper
+            if mapper is not None:
+                _collect_tags(orm_execute_state.session, (mapper.class_,))
+
+    @event.listens_for(session_class, "after_commit")
+    def after_commit(session):
+        tags = session.info.pop("response_cache_tags", None)
+        if tags:
+            invalidate_tags(tags)
+
+    @event.listens_for(session_class, "after_rollback")
+    def after_rollback(session):
+        session.info.pop("response_cache_tags", None)
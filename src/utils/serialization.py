@@ -0,0 +1,70 @@
+import time
+from typing import Any, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from prometheus_client import Histogram
+from pydantic import TypeAdapter
+
+from src.utils.fields import FieldSet
+
+RESPONSE_SERIALIZATION_SECONDS = Histogram(
+    "http_response_serialization_seconds",
+    "Time spent validating and encoding a response body",
+    ["endpoint", "fields"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+RESPONSE_PAYLOAD_BYTES = Histogram(
+    "http_response_payload_bytes",
+    "Size of a response body",
+    ["endpoint"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+_adapters: dict[Any, TypeAdapter] = {}
+
+
+def endpoint_label(request: Optional[Request]) -> str:
+    route = request.scope.get("route") if request is not None else None
+    return f"{request.method} {route.path}" if route is not None else "unknown"
+
+
+def render(response_model: Any, content: Any, fields: Optional[FieldSet] = None, endpoint: str = "unknown") -> bytes:
+    """
+    Serializes content the same way FastAPI does for a route's response_model,
+    or only the requested fields when the client sent fields=.
+    """
+    started = time.perf_counter()
+    if fields is not None:
+        body = orjson.dumps(
+            [fields.dump(item) for item in content] if isinstance(content, list) else fields.dump(content)
+        )
+    else:
+        adapter = _adapters.get(response_model)
+        if adapter is None:
+            adapter = _adapters[response_model] = TypeAdapter(response_model)
+        body = orjson.dumps(adapter.dump_python(adapter.validate_python(content, from_attributes=True), mode="json"))
+
+    RESPONSE_SERIALIZATION_SECONDS.labels(endpoint, "sparse" if fields is not None else "full").observe(
+        time.perf_counter() - started
+    )
+    return body
+
+
+def json_response(
+        request: Request,
+        response_model: Any,
+        content: Any,
+        fields: Optional[FieldSet] = None,
+        headers: Optional[dict] = None
+) -> Response:
+    body = render(response_model, content, fields, endpoint=endpoint_label(request))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def observe_payload(request: Request, response: Response):
+    route = request.scope.get("route")
+    content_length = response.headers.get("content-length")
+    if route is not None and content_length:
+        RESPONSE_PAYLOAD_BYTES.labels(f"{request.method} {route.path}").observe(int(content_length))
@@ -0,0 +1,114 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config import (
+    SLOW_QUERY_EXPLAIN_RATE,
+    SLOW_QUERY_LOG_BACKUPS,
+    SLOW_QUERY_LOG_MAX_BYTES,
+    SLOW_QUERY_LOG_PATH,
+    SLOW_QUERY_MS,
+)
+
+logger = logging.getLogger("slow_query")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+file_handler = RotatingFileHandler(
+    SLOW_QUERY_LOG_PATH, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS, delay=True
+)
+file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+logger.addHandler(file_handler)
+
+_query_origin: ContextVar[Optional[str]] = ContextVar("query_origin", default=None)
+
+
+@contextmanager
+def query_origin(origin: str):
+    token = _query_origin.set(origin)
+    try:
+        yield
+    finally:
+        _query_origin.reset(token)
+
+
+def set_query_origin(origin: Optional[str]):
+    _query_origin.set(origin)
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    # ANALYZE executes the statement again, so only plain reads are explained
+    # (a WITH can hold data-modifying CTEs), inside a savepoint that is always rolled back
+    # so a failing EXPLAIN can't abort the request's transaction
+    if not statement.lstrip().lower().startswith("select"):
+        return None
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+    except Exception as e:
+        cursor.close()
+        return f"EXPLAIN skipped: {e}"
+
+    try:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+        return "\n".join(row[0] for row in cursor.fetchall())
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        cursor.close()
+
+
+def _parameter_types(parameters):
+    # values can be password hashes or tokens, so only their types are logged
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["slow_query_start"].pop()) * 1000
+    if duration_ms < SLOW_QUERY_MS:
+        return
+
+    message = (
+        f"Slow query {duration_ms:.1f}ms from {_query_origin.get() or 'unknown'}: "
+        f"{statement} | parameter types: {_parameter_types(parameters)}"
+    )
+
+    if not executemany and random.random() < SLOW_QUERY_EXPLAIN_RATE:
+        plan = _explain(conn, statement, parameters)
+        if plan:
+            message = f"{message}\n{plan}"
+
+    logger.warning(message)
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("slow_query_start"):
+        connection.info["slow_query_start"].pop()
+
+
+def install_slow_query_log(engine: Engine):
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,153 @@
+import asyncio
+import bisect
+import logging
+import re
+import threading
+import time
+import unicodedata
+from typing import Iterable, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import SUGGEST_KEY_LENGTH, SUGGEST_MAX_ENTRIES, SUGGEST_REFRESH_INTERVAL
+from src.crud.search import AsyncSearchRepository
+from src.utils.response_cache import select_tag_versions
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_TAGS = ("courses", "categories")
+
+_separators = re.compile(r"[\W_]+")
+_words = re.compile(r"\S+")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _separators.sub(" ", text).strip()
+
+
+class PrefixIndex:
+    """
+    Sorted array of (key, kind, id) entries, one per word start of every title,
+    so "pyth" finds both "Python basics" and "Intro to Python".
+    Keys are cut to SUGGEST_KEY_LENGTH characters and the array to max_entries.
+    """
+
+    def __init__(self, max_entries: int = SUGGEST_MAX_ENTRIES, key_length: int = SUGGEST_KEY_LENGTH):
+        self.max_entries = max_entries
+        self.key_length = key_length
+        self._entries: list[tuple[str, str, int]] = []
+        self._titles: dict[tuple[str, int], str] = {}
+        self._lock = threading.Lock()
+
+    def _keys(self, title: str) -> list[str]:
+        text = normalize(title)
+        return [text[word.start():word.start() + self.key_length] for word in _words.finditer(text)]
+
+    def build(self, items: Iterable[tuple[str, int, str]]):
+        entries, titles = [], {}
+        for kind, item_id, title in items:
+            keys = self._keys(title)
+            if len(entries) + len(keys) > self.max_entries:
+                logger.warning(f"Suggest index is full at {len(entries)} entries, remaining titles are skipped")
+                break
+
+            titles[(kind, item_id)] = title
+            entries.extend((key, kind, item_id) for key in keys)
+
+        entries.sort()
+        with self._lock:
+            self._entries, self._titles = entries, titles
+
+    def _remove(self, kind: str, item_id: int):
+        title = self._titles.pop((kind, item_id), None)
+        if title is None:
+            return
+
+        for key in self._keys(title):
+            position = bisect.bisect_left(self._entries, (key, kind, item_id))
+            if position < len(self._entries) and self._entries[position] == (key, kind, item_id):
+                del self._entries[position]
+
+    def upsert(self, kind: str, item_id: int, title: str):
+        keys = self._keys(title)
+        with self._lock:
+            self._remove(kind, item_id)
+            if len(self._entries) + len(keys) > self.max_entries:
+                logger.warning(f"Suggest index is full, {kind} {item_id} is not indexed")
+                return
+
+            self._titles[(kind, item_id)] = title
+            for key in keys:
+                bisect.insort(self._entries, (key, kind, item_id))
+
+    def remove(self, kind: str, item_id: int):
+        with self._lock:
+            self._remove(kind, item_id)
+
+    def suggest(self, prefix: str, limit: int) -> list[dict]:
+        prefix = normalize(prefix)[:self.key_length]
+        if not prefix:
+            return []
+
+        found: dict[tuple[str, int], str] = {}
+        with self._lock:
+            position = bisect.bisect_left(self._entries, (prefix,))
+            # a few extra candidates so whole-title matches can be ranked first
+            while position < len(self._entries) and len(found) < limit * 4:
+                key, kind, item_id = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault((kind, item_id), self._titles[(kind, item_id)])
+                position += 1
+
+        ranked = sorted(
+            found.items(),
+            key=lambda item: (not normalize(item[1]).startswith(prefix), len(item[1]), item[1])
+        )
+        return [{"kind": kind, "id": item_id, "title": title} for (kind, item_id), title in ranked[:limit]]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+suggest_index = PrefixIndex()
+
+_refresh_lock = asyncio.Lock()
+_state = {"checked_at": 0.0, "versions": None}
+
+
+async def _select_versions() -> Optional[list]:
+    try:
+        return await select_tag_versions(SUGGEST_TAGS)
+    except RedisError as e:
+        logger.warning(f"Suggest index freshness check skipped: {e}")
+        return None
+
+
+async def load_suggest_index(db: AsyncSession):
+    # read before the titles so a change committed meanwhile triggers another rebuild
+    versions = await _select_versions()
+    repository = AsyncSearchRepository(db=db)
+    suggest_index.build(await repository.select_suggest_titles())
+    _state["versions"] = versions
+    logger.info(f"Suggest index built with {len(suggest_index)} entries")
+
+
+async def refresh_suggest_index(db: AsyncSession):
+    """
+    Rebuilds the index when another process committed title changes since the last build.
+    Checked at most every SUGGEST_REFRESH_INTERVAL seconds; writes made by this process
+    are applied to the index right away by the repositories.
+    """
+    now = time.monotonic()
+    if now - _state["checked_at"] < SUGGEST_REFRESH_INTERVAL or _refresh_lock.locked():
+        return
+
+    async with _refresh_lock:
+        _state["checked_at"] = now
+        versions = await _select_versions()
+        if versions is not None and versions != _state["versions"]:
+            await load_suggest_index(db)
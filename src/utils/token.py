@@ -1,11 +1,16 @@
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Union
 
 from jose.jwt import encode
 
 from src.config import ACCESS_TOKEN_EXPIRE, ALGORITHM, REFRESH_TOKEN_EXPIRE, SECRET_KEY
+from src.enums import UserType
 from src.models import UserOrm
 from src.utils.exceptions import InvalidRefreshTokenException
 
+if TYPE_CHECKING:
+    from src.utils.principal import UserPrincipal
+
 
 def create_access_token(data: dict, expire_delta: timedelta = None):
     to_encode = data.copy()
@@ -25,13 +30,27 @@ def create_refresh_token(data: dict):
     return refresh_token, expire
 
 
-def check_expire_token(user: UserOrm, exp_token: int):
+def user_claims(user: UserOrm) -> dict:
+    return {
+        "sub": user.username,
+        "uid": user.id,
+        "utype": UserType(user.usertype).value,
+        "sid": user.student.id if user.student else None
+    }
+
+
+def payload_claims(payload: dict) -> dict:
+    return {key: payload[key] for key in ("sub", "uid", "utype", "sid")}
+
+
+def create_auth_tokens(claims: dict, generation: int):
+    access_token, access_token_expire = create_access_token(data={**claims, "gen": generation, "type": "access"})
+    refresh_token, refresh_token_expire = create_refresh_token(data={**claims, "gen": generation, "type": "refresh"})
+    return access_token, access_token_expire, refresh_token, refresh_token_expire
+
+
+def check_expire_token(user: Union[UserOrm, "UserPrincipal"], exp_token: int):
     try:
-        expire_token = datetime.utcfromtimestamp(exp_token)
-        expire_token_str = expire_token.strftime("%Y-%m-%d %H:%M:%S")
-        user_expire_token_str = user.exp_token.strftime("%Y-%m-%d %H:%M:%S")
-        if expire_token_str == user_expire_token_str:
-            return True
-        return False
+        return user.exp_token.replace(microsecond=0) == datetime.utcfromtimestamp(exp_token)
     except Exception:
         raise InvalidRefreshTokenException()
@@ -0,0 +1,76 @@
+import logging
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from src.config import PRINCIPAL_LOCAL_CACHE_SIZE, TOKEN_REVOCATION_MAX_DELAY
+from src.utils.cache import TTLCache
+from src.utils.exceptions import AuthServiceUnavailableException
+from src.utils.principal import invalidate_user_principals
+from src.utils.redis_client import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+# a cached counter can be behind a revocation on another worker for at most TOKEN_REVOCATION_MAX_DELAY
+_generations = TTLCache(maxsize=PRINCIPAL_LOCAL_CACHE_SIZE, ttl=TOKEN_REVOCATION_MAX_DELAY)
+
+
+def _generation_key(user_id: int) -> str:
+    return f"auth:gen:{user_id}"
+
+
+def _remember(user_id: int, raw: Optional[bytes]) -> int:
+    generation = int(raw) if raw else 0
+    _generations.set(user_id, generation)
+    return generation
+
+
+def get_token_generation(user_id: int) -> int:
+    try:
+        return _remember(user_id, redis_client.get(_generation_key(user_id)))
+    except RedisError as e:
+        logger.warning(f"Token generation store unavailable: {e}")
+        raise AuthServiceUnavailableException()
+
+
+def is_token_generation_current(user_id: int, generation: int) -> bool:
+    """
+    A token is valid while its generation equals the user's counter. A token
+    newer than the locally cached counter means the cache is stale (login on
+    another process), so only then is Redis asked again. Fails closed when
+    Redis is unavailable, so revoked tokens are never accepted.
+    """
+    cached = _generations.get(user_id)
+    if cached is not None and generation <= cached:
+        return generation == cached
+
+    try:
+        return generation == _remember(user_id, redis_client.get(_generation_key(user_id)))
+    except RedisError as e:
+        logger.warning(f"Token generation store unavailable: {e}")
+        raise AuthServiceUnavailableException()
+
+
+async def is_token_generation_current_async(user_id: int, generation: int) -> bool:
+    cached = _generations.get(user_id)
+    if cached is not None and generation <= cached:
+        return generation == cached
+
+    try:
+        return generation == _remember(user_id, await async_redis_client.get(_generation_key(user_id)))
+    except RedisError as e:
+        logger.warning(f"Token generation store unavailable: {e}")
+        raise AuthServiceUnavailableException()
+
+
+def revoke_user_tokens(user_id: int) -> int:
+    """Invalidates every token issued to the user so far and returns the new generation."""
+    try:
+        generation = redis_client.incr(_generation_key(user_id))
+    except RedisError as e:
+        logger.warning(f"Token generation store unavailable: {e}")
+        raise AuthServiceUnavailableException()
+
+    _generations.set(user_id, generation)
+    invalidate_user_principals(user_id=user_id)
+    return generation